@@ -1,11 +1,17 @@
 import type { PageContextServer } from 'vike/types'
-import booksData from '../../../public/data/books.json'
 import type { Book } from '../../../src/types'
 
+// export が書き出した書籍ごとの詳細（books/<id>.json）
+// 1ファイルずつ別のチャンクになり、表示する書籍のファイルだけを読み込む
+const bookFiles = import.meta.glob<Book>(
+  ['../../../public/data/books/*.json', '!../../../public/data/books/index.json'],
+  { import: 'default' },
+)
+
 export type Data = { book: Book | null }
 
-export function data(pageContext: PageContextServer): Data {
+export async function data(pageContext: PageContextServer): Promise<Data> {
   const id = pageContext.routeParams?.id
-  const book = (booksData as Book[]).find(b => b.id === id) || null
-  return { book }
+  const load = id ? bookFiles[`../../../public/data/books/${id}.json`] : undefined
+  return { book: load ? await load() : null }
 }
@@ -1,10 +1,13 @@
 import { useEffect, useState, useMemo } from 'react'
 import { useData } from 'vike-react/useData'
-import { fetchBooks } from '../../src/data'
+import { usePageContext } from 'vike-react/usePageContext'
+import { fetchBookById, fetchBooks, fetchRankingPage, fetchRankingsIn } from '../../src/data'
+import { matchesSearch, searchBooks, searchKey } from '../../src/search'
+import type { SearchDoc } from '../../src/search'
 import type { Data } from './+data'
-import type { Book, RankingEntry } from '../../src/types'
+import type { Book, RankingPageEntry, RankingSort } from '../../src/types'
 
-type SortMode = 'point' | 'count' | 'views' | 'likes'
+type SortMode = RankingSort
 
 const SORT_OPTIONS: { key: SortMode; label: string }[] = [
   { key: 'point', label: 'ポイント順' },
@@ -27,35 +30,33 @@ function calcPoint(book: Book): { point: number; channels: number } {
   return { point, channels: channelVideos.size }
 }
 
+// scripts/book_store.py の RANKING_PAGE_SIZE（ページ分割ランキングの1ファイルの件数）と同じにする
 const ITEMS_PER_PAGE = 20
 
-function getYearsFromBooks(books: Book[]): number[] {
-  const years = new Set<number>()
-  for (const book of books) {
-    for (const video of book.videos || []) {
-      if (video.published) {
-        const year = new Date(video.published).getFullYear()
-        if (year >= 2015 && year <= new Date().getFullYear()) {
-          years.add(year)
-        }
-      }
-    }
-  }
-  return Array.from(years).sort((a, b) => b - a)
-}
+// 直近N日の期間（scripts/ranking_windows.py の WINDOW_DAYS と同じ）
+const PERIOD_OPTIONS: { key: string; label: string; days: number }[] = [
+  { key: '7d', label: '直近7日', days: 7 },
+  { key: '30d', label: '直近30日', days: 30 },
+  { key: '365d', label: '直近1年', days: 365 },
+]
 
-function getChannelsFromBooks(books: Book[]): { name: string; count: number }[] {
-  const channelCounts = new Map<string, number>()
-  for (const book of books) {
-    for (const video of book.videos || []) {
-      if (video.channel) {
-        channelCounts.set(video.channel, (channelCounts.get(video.channel) || 0) + 1)
-      }
-    }
+const SORT_KEYS = { point: 'point', count: 'count', views: 'total_views', likes: 'total_likes' } as const
+
+function toPageEntry(book: Book): RankingPageEntry {
+  const { point, channels } = calcPoint(book)
+  return {
+    id: book.id,
+    title: book.title,
+    author: book.author,
+    publisher: book.publisher ?? undefined,
+    image_url: book.image_url,
+    amazon_url: book.amazon_url,
+    count: book.count,
+    total_views: book.total_views,
+    total_likes: book.total_likes,
+    point,
+    channels,
   }
-  return Array.from(channelCounts.entries())
-    .map(([name, count]) => ({ name, count }))
-    .sort((a, b) => b.count - a.count)
 }
 
 function filterBooksByYear(books: Book[], year: number | null): Book[] {
@@ -65,7 +66,8 @@ function filterBooksByYear(books: Book[], year: number | null): Book[] {
     .map(book => {
       const filteredVideos = (book.videos || []).filter(v => {
         if (!v.published) return false
-        return new Date(v.published).getFullYear() === year
+        // 年は公開日時（UTC）の年。ranking_windows.json の暦年の区切りと同じ
+        return new Date(v.published).getUTCFullYear() === year
       })
       if (filteredVideos.length === 0) return null
 
@@ -80,6 +82,27 @@ function filterBooksByYear(books: Book[], year: number | null): Book[] {
     .filter((b): b is Book => b !== null)
 }
 
+// 書籍を直近N日（今日を含む）の紹介動画でフィルタリングし、その期間の統計を再計算
+function filterBooksByPeriod(books: Book[], days: number | null): Book[] {
+  if (!days) return books
+
+  const since = new Date(Date.now() - (days - 1) * 24 * 60 * 60 * 1000).toISOString().slice(0, 10)
+  return books
+    .map(book => {
+      const filteredVideos = (book.videos || []).filter(v => v.published && v.published.slice(0, 10) >= since)
+      if (filteredVideos.length === 0) return null
+
+      return {
+        ...book,
+        videos: filteredVideos,
+        count: filteredVideos.length,
+        total_views: filteredVideos.reduce((sum, v) => sum + (v.view_count || 0), 0),
+        total_likes: filteredVideos.reduce((sum, v) => sum + (v.like_count || 0), 0),
+      }
+    })
+    .filter((b): b is Book => b !== null)
+}
+
 function filterBooksByChannel(books: Book[], channel: string | null): Book[] {
   if (!channel) return books
 
@@ -99,11 +122,10 @@ function filterBooksByChannel(books: Book[], channel: string | null): Book[] {
     .filter((b): b is Book => b !== null)
 }
 
+// 初期値はサーバー・ブラウザとも pageContext.urlParsed から取り、SSRとハイドレーションで同じ表示にする
 function useSearchParams() {
-  const [params, setParams] = useState(() => {
-    if (typeof window === 'undefined') return new URLSearchParams()
-    return new URLSearchParams(window.location.search)
-  })
+  const pageContext = usePageContext()
+  const [params, setParams] = useState(() => new URLSearchParams(pageContext.urlParsed.search))
 
   const updateParams = (newParams: Record<string, string>) => {
     const searchParams = new URLSearchParams()
@@ -119,74 +141,145 @@ function useSearchParams() {
 }
 
 export default function Page() {
-  const { rankings } = useData<Data>()
+  const { manifest, sort: initialSort, page: initialPage, entries: initialEntries } = useData<Data>()
   const [searchParams, setSearchParams] = useSearchParams()
-  const sortMode = (searchParams.get('sort') as SortMode) || 'point'
-  const currentPage = parseInt(searchParams.get('page') || '1', 10)
+  // +data.ts と同じ規則で読む（不正な値は先頭のページ・ポイント順）
+  const sortMode = SORT_OPTIONS.find(opt => opt.key === searchParams.get('sort'))?.key ?? 'point'
+  const currentPage = Math.max(parseInt(searchParams.get('page') || '1', 10) || 1, 1)
   const searchQuery = searchParams.get('q') || ''
   const yearParam = searchParams.get('year')
   const selectedYear = yearParam ? parseInt(yearParam, 10) : null
   const selectedChannel = searchParams.get('channel') || null
-
-  // Full book data loaded client-side for filtering/sorting
+  const selectedPeriod = PERIOD_OPTIONS.find(p => p.key === searchParams.get('period')) || null
+
+  // 期間（年・直近N日）だけなら期間別ランキング、検索だけなら検索インデックスを使い、
+  // チャンネルで絞り込むときと期間と検索を組み合わせるときだけ全書籍を読み込む。
+  // どれも無ければ表示するページのファイルだけで表示する（最初のページはSSRで埋め込み済み）
+  const periodKey = selectedPeriod?.key ?? (selectedYear ? String(selectedYear) : null)
+  const needsCatalog = Boolean(selectedChannel) || Boolean(periodKey && searchQuery)
+  const useWindows = Boolean(periodKey) && !needsCatalog
+  const useSearchIndex = Boolean(searchQuery) && !needsCatalog
+
+  const [pageKey, setPageKey] = useState(`${initialSort}/${initialPage}`)
+  const [pageEntries, setPageEntries] = useState(initialEntries)
   const [allBooks, setAllBooks] = useState<Book[] | null>(null)
   const [inputValue, setInputValue] = useState(searchQuery)
 
   useEffect(() => {
+    const key = `${sortMode}/${currentPage}`
+    if (needsCatalog || useWindows || useSearchIndex || key === pageKey) return
+    let cancelled = false
+    fetchRankingPage(sortMode, currentPage)
+      .then(entries => {
+        if (cancelled) return
+        setPageEntries(entries)
+        setPageKey(key)
+      })
+      .catch(err => console.error('Failed to fetch ranking page:', err))
+    return () => { cancelled = true }
+  }, [needsCatalog, useWindows, useSearchIndex, sortMode, currentPage, pageKey])
+
+  // 全書籍は年・チャンネルで絞り込んだときに1回だけ取得する
+  useEffect(() => {
+    if (!needsCatalog || allBooks) return
     fetchBooks()
       .then(data => setAllBooks(data))
       .catch(err => console.error('Failed to fetch books:', err))
-  }, [])
-
-  // Use full book data when available, fall back to SSR rankings
-  const hasFullData = allBooks !== null
-
-  const availableYears = useMemo(() => hasFullData ? getYearsFromBooks(allBooks) : [], [allBooks, hasFullData])
-  const availableChannels = useMemo(() => hasFullData ? getChannelsFromBooks(allBooks) : [], [allBooks, hasFullData])
-  const totalVideos = useMemo(() => {
-    if (!hasFullData) return 0
-    return allBooks.reduce((sum, b) => sum + (b.videos?.length || 0), 0)
-  }, [allBooks, hasFullData])
-
-  const books = useMemo(() => {
-    if (hasFullData) {
-      let filtered = filterBooksByYear(allBooks, selectedYear)
-      filtered = filterBooksByChannel(filtered, selectedChannel)
-      const sorted = [...filtered].sort((a, b) => {
-        if (sortMode === 'point') return calcPoint(b).point - calcPoint(a).point
-        if (sortMode === 'views') return b.total_views - a.total_views
-        if (sortMode === 'likes') return b.total_likes - a.total_likes
-        return b.count - a.count
-      })
-      return sorted
+  }, [needsCatalog, allBooks])
+
+  const filteredBooks = useMemo(() => {
+    if (!needsCatalog || !allBooks) return []
+    let filtered = filterBooksByYear(allBooks, selectedYear)
+    filtered = filterBooksByPeriod(filtered, selectedPeriod?.days ?? null)
+    filtered = filterBooksByChannel(filtered, selectedChannel)
+    if (searchQuery) {
+      // 検索インデックスと同じ規則（タイトル・著者・出版社の正規化後の部分一致）で絞り込む
+      const key = searchKey(searchQuery)
+      filtered = filtered.filter(book => matchesSearch(key, [book.title, book.author, book.publisher]))
     }
-    // SSR: use rankings data (already sorted by count)
-    return rankings as (RankingEntry & { videos?: never })[]
-  }, [allBooks, hasFullData, selectedYear, selectedChannel, sortMode, rankings])
-
-  const filteredBooks = searchQuery
-    ? books.filter(book =>
-        book.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        (book.author && book.author.toLowerCase().includes(searchQuery.toLowerCase()))
-      )
-    : books
-
-  const totalPages = Math.ceil(filteredBooks.length / ITEMS_PER_PAGE)
+    return filtered.map(toPageEntry).sort((a, b) => {
+      if (sortMode === 'point') return b.point - a.point
+      if (sortMode === 'views') return b.total_views - a.total_views
+      if (sortMode === 'likes') return b.total_likes - a.total_likes
+      return b.count - a.count
+    })
+  }, [needsCatalog, allBooks, selectedYear, selectedPeriod, selectedChannel, searchQuery, sortMode])
+
+  const [windowEntries, setWindowEntries] = useState<RankingPageEntry[]>([])
+
+  useEffect(() => {
+    if (!useWindows || !periodKey) return
+    let cancelled = false
+    fetchRankingsIn(periodKey, SORT_KEYS[sortMode])
+      .then(entries => { if (!cancelled) setWindowEntries(entries) })
+      .catch(err => console.error('Failed to fetch ranking windows:', err))
+    return () => { cancelled = true }
+  }, [useWindows, periodKey, sortMode])
+
+  const [searchResults, setSearchResults] = useState<SearchDoc[]>([])
+  const [searchEntries, setSearchEntries] = useState<RankingPageEntry[]>([])
+
+  useEffect(() => {
+    if (!useSearchIndex) return
+    let cancelled = false
+    searchBooks(searchQuery)
+      .then(docs => { if (!cancelled) setSearchResults(docs) })
+      .catch(err => console.error('Failed to search books:', err))
+    return () => { cancelled = true }
+  }, [useSearchIndex, searchQuery])
+
+  // 検索結果はポイント順で返るので、それ以外の並びのときだけ並べ替える
+  const sortedResults = useMemo(() => {
+    if (sortMode === 'point') return searchResults
+    return [...searchResults].sort((a, b) => {
+      if (sortMode === 'views') return b.total_views - a.total_views
+      if (sortMode === 'likes') return b.total_likes - a.total_likes
+      return b.count - a.count
+    })
+  }, [searchResults, sortMode])
+
   const startIndex = (currentPage - 1) * ITEMS_PER_PAGE
-  const currentBooks = filteredBooks.slice(startIndex, startIndex + ITEMS_PER_PAGE)
 
-  const buildParams = (overrides: Partial<{ sort: string; page: string; q: string; year: string; channel: string }>) => {
+  // 検索結果は表示するページの書籍の詳細ファイルだけを取得する
+  useEffect(() => {
+    if (!useSearchIndex) return
+    let cancelled = false
+    const ids = sortedResults.slice(startIndex, startIndex + ITEMS_PER_PAGE).map(doc => doc.id)
+    Promise.all(ids.map(fetchBookById))
+      .then(books => {
+        if (cancelled) return
+        setSearchEntries(books.filter((b): b is Book => b !== null).map(toPageEntry))
+      })
+      .catch(err => console.error('Failed to fetch books:', err))
+    return () => { cancelled = true }
+  }, [useSearchIndex, sortedResults, startIndex])
+
+  const matchCount = useWindows
+    ? windowEntries.length
+    : useSearchIndex ? sortedResults.length : filteredBooks.length
+  const totalPages = needsCatalog || useWindows || useSearchIndex
+    ? Math.ceil(matchCount / ITEMS_PER_PAGE)
+    : manifest.pages
+  const currentBooks = needsCatalog
+    ? filteredBooks.slice(startIndex, startIndex + ITEMS_PER_PAGE)
+    : useWindows
+      ? windowEntries.slice(startIndex, startIndex + ITEMS_PER_PAGE)
+      : useSearchIndex ? searchEntries : pageEntries
+
+  const buildParams = (overrides: Partial<{ sort: string; page: string; q: string; year: string; period: string; channel: string }>) => {
     const params: Record<string, string> = {}
     const sort = overrides.sort ?? sortMode
     const page = overrides.page ?? '1'
     const q = overrides.q ?? searchQuery
     const year = overrides.year !== undefined ? overrides.year : (selectedYear?.toString() || '')
+    const period = overrides.period !== undefined ? overrides.period : (selectedPeriod?.key || '')
     const channel = overrides.channel !== undefined ? overrides.channel : (selectedChannel || '')
 
     params.sort = sort
     params.page = page
     if (q) params.q = q
     if (year) params.year = year
+    if (period) params.period = period
     if (channel) params.channel = channel
     return params
   }
@@ -210,8 +303,10 @@ export default function Page() {
     setSearchParams(buildParams({ q: '', page: '1' }))
   }
 
-  const handleYearChange = (year: number | null) => {
-    setSearchParams(buildParams({ year: year?.toString() || '', page: '1' }))
+  // 期間の選択肢は年と直近N日（"7d" など）を1つのセレクトで切り替える
+  const handlePeriodChange = (value: string) => {
+    const isPeriod = PERIOD_OPTIONS.some(p => p.key === value)
+    setSearchParams(buildParams({ year: isPeriod ? '' : value, period: isPeriod ? value : '', page: '1' }))
   }
 
   const handleChannelChange = (channel: string | null) => {
@@ -271,8 +366,8 @@ export default function Page() {
   return (
     <div>
       <div className="summary-stats">
-        <span>投稿数: <strong>{hasFullData ? totalVideos.toLocaleString() : '...'}</strong></span>
-        <span>書籍数: <strong>{hasFullData ? allBooks.length.toLocaleString() : rankings.length.toLocaleString()}</strong></span>
+        <span>投稿数: <strong>{manifest.videos.toLocaleString()}</strong></span>
+        <span>書籍数: <strong>{manifest.books.toLocaleString()}</strong></span>
       </div>
       <form className="search-form" onSubmit={handleSearch}>
         <input
@@ -288,7 +383,7 @@ export default function Page() {
         )}
       </form>
       {searchQuery && (
-        <p className="search-result">「{searchQuery}」の検索結果: {filteredBooks.length}件</p>
+        <p className="search-result">「{searchQuery}」の検索結果: {matchCount}件</p>
       )}
       <div className="filter-row">
         <div className="sort-tabs">
@@ -305,11 +400,14 @@ export default function Page() {
         <div className="filter-selects">
           <select
             className="filter-select"
-            value={selectedYear || ''}
-            onChange={(e) => handleYearChange(e.target.value ? parseInt(e.target.value, 10) : null)}
+            value={periodKey || ''}
+            onChange={(e) => handlePeriodChange(e.target.value)}
           >
             <option value="">全期間</option>
-            {availableYears.map(year => (
+            {PERIOD_OPTIONS.map(p => (
+              <option key={p.key} value={p.key}>{p.label}</option>
+            ))}
+            {manifest.years.map(year => (
               <option key={year} value={year}>{year}年</option>
             ))}
           </select>
@@ -319,18 +417,18 @@ export default function Page() {
             onChange={(e) => handleChannelChange(e.target.value || null)}
           >
             <option value="">全チャンネル</option>
-            {availableChannels.map(ch => (
+            {manifest.channels.map(ch => (
               <option key={ch.name} value={ch.name}>{ch.name}</option>
             ))}
           </select>
         </div>
       </div>
-      {(selectedYear || selectedChannel) && (
+      {(periodKey || selectedChannel) && (
         <p className="filter-result">
-          {selectedYear && `${selectedYear}年`}
-          {selectedYear && selectedChannel && ' / '}
+          {selectedPeriod ? selectedPeriod.label : selectedYear && `${selectedYear}年`}
+          {periodKey && selectedChannel && ' / '}
           {selectedChannel && `${selectedChannel}`}
-          : {filteredBooks.length}件
+          : {matchCount}件
         </p>
       )}
       <div className="ranking-list">
@@ -350,11 +448,9 @@ export default function Page() {
                 {book.title}
               </a>
               {book.author && <span className="book-author">{book.author}</span>}
-              {'publisher' in book && book.publisher && <span className="book-publisher">{book.publisher}</span>}
+              {book.publisher && <span className="book-publisher">{book.publisher}</span>}
               <div className="book-stats">
-                {hasFullData && 'videos' in book && (() => { const { point, channels } = calcPoint(book as Book); return (
-                  <span>📊 <span className="stat-value">{point}pt</span>（{channels}ch）</span>
-                )})()}
+                <span>📊 <span className="stat-value">{book.point}pt</span>（{book.channels}ch）</span>
                 <span>📚 紹介: <span className="stat-value">{book.count}回</span></span>
                 <span>▶️ 再生回数: <span className="stat-value">{book.total_views.toLocaleString()}</span></span>
                 <span>👍 いいね: <span className="stat-value">{book.total_likes.toLocaleString()}</span></span>
@@ -1,8 +1,40 @@
-import rankingsData from '../../public/data/rankings.json'
-import type { RankingEntry } from '../../src/types'
+import type { PageContextServer } from 'vike/types'
+import type { RankingManifest, RankingPageEntry, RankingSort } from '../../src/types'
 
-export type Data = { rankings: RankingEntry[] }
+// export が書き出すマニフェスト。生成物でコミットしないので、未生成でも型検査・ビルドが
+// モジュール解決で失敗しないように glob で読み、無ければ data() で何を実行すべきかを示す
+// （vite.config.ts の requireExportedData がビルド開始時にも確認する）
+const manifestFiles = import.meta.glob<RankingManifest>(
+  '../../public/data/rankings/manifest.json',
+  { eager: true, import: 'default' },
+)
+const manifestData: RankingManifest | undefined = manifestFiles['../../public/data/rankings/manifest.json']
 
-export function data(): Data {
-  return { rankings: rankingsData as RankingEntry[] }
+// export が書き出したページ分割ランキング（rankings/<並べ替え>/page-0001.json …）
+// 1ファイルずつ別のチャンクになり、リクエストされたページのファイルだけを読み込む
+const pageFiles = import.meta.glob<RankingPageEntry[]>(
+  '../../public/data/rankings/*/page-*.json',
+  { import: 'default' },
+)
+
+export type Data = {
+  manifest: RankingManifest
+  sort: RankingSort
+  page: number
+  entries: RankingPageEntry[]
+}
+
+// 表示するページの分だけをHTMLに埋め込む
+export async function data(pageContext: PageContextServer): Promise<Data> {
+  if (!manifestData) {
+    throw new Error(
+      'public/data/rankings/manifest.json がありません。先にリポジトリのルートで `python scripts/pipeline.py` を実行してください',
+    )
+  }
+  const manifest = manifestData
+  const search = pageContext.urlParsed.search
+  const sort = manifest.sorts.includes(search.sort as RankingSort) ? (search.sort as RankingSort) : 'point'
+  const page = Math.max(parseInt(search.page || '1', 10) || 1, 1)
+  const load = pageFiles[`../../public/data/rankings/${sort}/page-${String(page).padStart(4, '0')}.json`]
+  return { manifest, sort, page, entries: load ? await load() : [] }
 }
@@ -1,30 +1,126 @@
-import type { Book, Channel, RankingEntry } from './types'
+import type {
+  Book, Catalog, CatalogBook, Channel, DataManifest, RankingEntry, RankingKey, RankingManifest, RankingPageEntry,
+  RankingSort, RankingTable, RankingWindows,
+} from './types'
 
 const BASE = import.meta.env.BASE_URL + 'data'
 
+// manifest.json だけを毎回再検証し、大きなファイルは内容のハッシュ付きの名前で取得する
+// （名前が変わらない限りCDN・ブラウザのキャッシュをそのまま使える）
+let dataManifest: Promise<DataManifest | null> | null = null
+
+function fetchDataManifest(): Promise<DataManifest | null> {
+  if (!dataManifest) {
+    dataManifest = fetch(`${BASE}/manifest.json`, { cache: 'no-cache' })
+      .then(res => (res.ok ? res.json() : null))
+      .catch(() => null)
+  }
+  return dataManifest
+}
+
+// manifest.json が無いとき（開発時など）は元の名前で取得する
+async function dataUrl(name: string): Promise<string> {
+  const manifest = await fetchDataManifest()
+  return `${BASE}/${manifest?.files[name]?.file ?? name}`
+}
+
+// 3種類のランキングで1つのファイルを共有するので、取得は1回だけにする
+let rankingTable: Promise<RankingTable> | null = null
+
+function fetchRankingTable(): Promise<RankingTable> {
+  if (!rankingTable) {
+    rankingTable = dataUrl('ranking_table.json')
+      .then(url => fetch(url))
+      .then(res => res.json())
+  }
+  return rankingTable
+}
+
+async function fetchRankingsBy(key: RankingKey): Promise<RankingEntry[]> {
+  const table = await fetchRankingTable()
+  return table.orders[key].map(i => table.entries[i])
+}
+
+let rankingWindows: Promise<RankingWindows> | null = null
+
+function fetchRankingWindows(): Promise<RankingWindows> {
+  if (!rankingWindows) {
+    rankingWindows = dataUrl('ranking_windows.json')
+      .then(url => fetch(url))
+      .then(res => res.json())
+  }
+  return rankingWindows
+}
+
+// 期間内の集計で並べたランキング（period は "7d"・"30d"・"365d" または年）
+export async function fetchRankingsIn(period: string, key: 'point' | RankingKey): Promise<RankingPageEntry[]> {
+  const [table, windows] = await Promise.all([fetchRankingTable(), fetchRankingWindows()])
+  const window = windows.windows[period]
+  if (!window) return []
+  return window.orders[key].map(r => {
+    const [i, count, total_views, total_likes, point, channels] = window.rows[r]
+    const entry = table.entries[i]
+    return {
+      id: entry.id,
+      title: entry.title,
+      author: entry.author,
+      publisher: entry.publisher,
+      image_url: entry.image_url,
+      amazon_url: entry.amazon_url,
+      count,
+      total_views,
+      total_likes,
+      point,
+      channels,
+    }
+  })
+}
+
 export async function fetchRankings(): Promise<RankingEntry[]> {
-  const res = await fetch(`${BASE}/rankings.json`)
-  return res.json()
+  return fetchRankingsBy('count')
 }
 
 export async function fetchRankingsViews(): Promise<RankingEntry[]> {
-  const res = await fetch(`${BASE}/rankings_views.json`)
-  return res.json()
+  return fetchRankingsBy('total_views')
 }
 
 export async function fetchRankingsLikes(): Promise<RankingEntry[]> {
-  const res = await fetch(`${BASE}/rankings_likes.json`)
+  return fetchRankingsBy('total_likes')
+}
+
+export async function fetchRankingManifest(): Promise<RankingManifest> {
+  const res = await fetch(`${BASE}/rankings/manifest.json`)
   return res.json()
 }
 
-export async function fetchBooks(): Promise<Book[]> {
-  const res = await fetch(`${BASE}/books.json`)
+// 一覧の1ページ分だけを取得する（page は1始まり）
+export async function fetchRankingPage(sort: RankingSort, page: number): Promise<RankingPageEntry[]> {
+  const res = await fetch(`${BASE}/rankings/${sort}/page-${String(page).padStart(4, '0')}.json`)
+  if (!res.ok) return []
+  return res.json()
+}
+
+async function fetchCatalog(): Promise<Catalog> {
+  const res = await fetch(await dataUrl('catalog.json'))
   return res.json()
 }
 
+// video_ids を動画データに置き換えて Book の形に戻す
+export function assembleBook(book: CatalogBook, videos: Catalog['videos']): Book {
+  const { video_ids, ...rest } = book
+  return { ...rest, videos: video_ids.map(id => ({ video_id: id, ...videos[id] })) }
+}
+
+export async function fetchBooks(): Promise<Book[]> {
+  const catalog = await fetchCatalog()
+  return catalog.books.map(b => assembleBook(b, catalog.videos))
+}
+
+// 書籍ページは書籍ごとの詳細ファイル（紹介動画を含む）だけを取得する
 export async function fetchBookById(id: string): Promise<Book | null> {
-  const books = await fetchBooks()
-  return books.find(b => b.id === id) || null
+  const res = await fetch(`${BASE}/books/${encodeURIComponent(id)}.json`)
+  if (!res.ok) return null
+  return res.json()
 }
 
 export async function fetchChannels(): Promise<Channel[]> {
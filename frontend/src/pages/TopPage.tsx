@@ -1,9 +1,10 @@
 import { useEffect, useState, useMemo } from 'react'
 import { Link, useSearchParams } from 'react-router-dom'
-import { fetchBooks } from '../data'
-import type { Book } from '../types'
+import { fetchBooks, fetchRankingManifest, fetchRankingPage } from '../data'
+import { matchesSearch, searchKey } from '../search'
+import type { Book, RankingManifest, RankingPageEntry, RankingSort } from '../types'
 
-type SortMode = 'point' | 'count' | 'views' | 'likes'
+type SortMode = RankingSort
 
 const SORT_OPTIONS: { key: SortMode; label: string }[] = [
   { key: 'point', label: 'ポイント順' },
@@ -27,37 +28,25 @@ function calcPoint(book: Book): { point: number; channels: number } {
   return { point, channels: channelVideos.size }
 }
 
+// scripts/book_store.py の RANKING_PAGE_SIZE（ページ分割ランキングの1ファイルの件数）と同じにする
 const ITEMS_PER_PAGE = 20
 
-// 書籍から紹介年のリストを取得
-function getYearsFromBooks(books: Book[]): number[] {
-  const years = new Set<number>()
-  for (const book of books) {
-    for (const video of book.videos || []) {
-      if (video.published) {
-        const year = new Date(video.published).getFullYear()
-        if (year >= 2015 && year <= new Date().getFullYear()) {
-          years.add(year)
-        }
-      }
-    }
+// 全書籍から絞り込んだときも、ページ分割ランキングと同じ形で一覧を表示する
+function toPageEntry(book: Book): RankingPageEntry {
+  const { point, channels } = calcPoint(book)
+  return {
+    id: book.id,
+    title: book.title,
+    author: book.author,
+    publisher: book.publisher ?? undefined,
+    image_url: book.image_url,
+    amazon_url: book.amazon_url,
+    count: book.count,
+    total_views: book.total_views,
+    total_likes: book.total_likes,
+    point,
+    channels,
   }
-  return Array.from(years).sort((a, b) => b - a) // 降順
-}
-
-// 書籍からチャンネルのリストを取得（動画数順）
-function getChannelsFromBooks(books: Book[]): { name: string; count: number }[] {
-  const channelCounts = new Map<string, number>()
-  for (const book of books) {
-    for (const video of book.videos || []) {
-      if (video.channel) {
-        channelCounts.set(video.channel, (channelCounts.get(video.channel) || 0) + 1)
-      }
-    }
-  }
-  return Array.from(channelCounts.entries())
-    .map(([name, count]) => ({ name, count }))
-    .sort((a, b) => b.count - a.count) // 動画数順
 }
 
 // 書籍を指定年でフィルタリングし、その年の統計を再計算
@@ -112,58 +101,79 @@ export function TopPage() {
   const selectedYear = yearParam ? parseInt(yearParam, 10) : null
   const selectedChannel = searchParams.get('channel') || null
 
-  const [allBooks, setAllBooks] = useState<Book[]>([])
-  const [loading, setLoading] = useState(true)
+  // 検索・絞り込みがなければ、一覧は表示するページのファイルだけを取得して表示する
+  const needsCatalog = Boolean(searchQuery || selectedYear || selectedChannel)
+
+  const [manifest, setManifest] = useState<RankingManifest | null>(null)
+  const [pageEntries, setPageEntries] = useState<RankingPageEntry[]>([])
+  const [pageLoading, setPageLoading] = useState(true)
+  const [allBooks, setAllBooks] = useState<Book[] | null>(null)
   const [inputValue, setInputValue] = useState(searchQuery)
 
+  // 総数・ページ数・絞り込みの選択肢
   useEffect(() => {
-    setLoading(true)
-    fetchBooks()
-      .then(data => {
-        setAllBooks(data)
-        setLoading(false)
+    fetchRankingManifest()
+      .then(setManifest)
+      .catch(err => console.error('Failed to fetch ranking manifest:', err))
+  }, [])
+
+  useEffect(() => {
+    if (needsCatalog) return
+    let cancelled = false
+    setPageLoading(true)
+    fetchRankingPage(sortMode, currentPage)
+      .then(entries => {
+        if (cancelled) return
+        setPageEntries(entries)
+        setPageLoading(false)
       })
       .catch(err => {
-        console.error('Failed to fetch books:', err)
-        setLoading(false)
+        console.error('Failed to fetch ranking page:', err)
+        if (!cancelled) setPageLoading(false)
       })
-  }, [])
+    return () => { cancelled = true }
+  }, [needsCatalog, sortMode, currentPage])
 
-  // 利用可能な年のリスト
-  const availableYears = useMemo(() => getYearsFromBooks(allBooks), [allBooks])
-
-  // 利用可能なチャンネルのリスト
-  const availableChannels = useMemo(() => getChannelsFromBooks(allBooks), [allBooks])
+  // 全書籍は検索・絞り込みを使ったときに1回だけ取得する
+  useEffect(() => {
+    if (!needsCatalog || allBooks) return
+    fetchBooks()
+      .then(setAllBooks)
+      .catch(err => {
+        console.error('Failed to fetch books:', err)
+        setAllBooks([])
+      })
+  }, [needsCatalog, allBooks])
 
-  // 総投稿数（動画数）
-  const totalVideos = useMemo(() => {
-    return allBooks.reduce((sum, b) => sum + (b.videos?.length || 0), 0)
-  }, [allBooks])
+  const availableYears = manifest?.years ?? []
+  const availableChannels = manifest?.channels ?? []
 
-  // 年・チャンネルでフィルタリング → ソート
-  const books = useMemo(() => {
+  // 年・チャンネル・検索語でフィルタリング → ソート
+  const filteredEntries = useMemo(() => {
+    if (!needsCatalog || !allBooks) return []
     let filtered = filterBooksByYear(allBooks, selectedYear)
     filtered = filterBooksByChannel(filtered, selectedChannel)
-    const sorted = [...filtered].sort((a, b) => {
-      if (sortMode === 'point') return calcPoint(b).point - calcPoint(a).point
+    if (searchQuery) {
+      // 検索インデックスと同じ規則（タイトル・著者・出版社の正規化後の部分一致）で絞り込む
+      const key = searchKey(searchQuery)
+      filtered = filtered.filter(book => matchesSearch(key, [book.title, book.author, book.publisher]))
+    }
+    return filtered.map(toPageEntry).sort((a, b) => {
+      if (sortMode === 'point') return b.point - a.point
       if (sortMode === 'views') return b.total_views - a.total_views
       if (sortMode === 'likes') return b.total_likes - a.total_likes
       return b.count - a.count
     })
-    return sorted
-  }, [allBooks, selectedYear, selectedChannel, sortMode])
-
-  // 検索フィルタ
-  const filteredBooks = searchQuery
-    ? books.filter(book =>
-        book.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        (book.author && book.author.toLowerCase().includes(searchQuery.toLowerCase()))
-      )
-    : books
-
-  const totalPages = Math.ceil(filteredBooks.length / ITEMS_PER_PAGE)
+  }, [needsCatalog, allBooks, selectedYear, selectedChannel, searchQuery, sortMode])
+
+  const loading = needsCatalog ? allBooks === null : pageLoading
+  const totalPages = needsCatalog
+    ? Math.ceil(filteredEntries.length / ITEMS_PER_PAGE)
+    : (manifest?.pages ?? 0)
   const startIndex = (currentPage - 1) * ITEMS_PER_PAGE
-  const currentBooks = filteredBooks.slice(startIndex, startIndex + ITEMS_PER_PAGE)
+  const currentEntries = needsCatalog
+    ? filteredEntries.slice(startIndex, startIndex + ITEMS_PER_PAGE)
+    : pageEntries
 
   const buildParams = (overrides: Partial<{ sort: string; page: string; q: string; year: string; channel: string }>) => {
     const params: Record<string, string> = {}
@@ -260,10 +270,10 @@ export function TopPage() {
 
   return (
     <div>
-      {!loading && (
+      {manifest && (
         <div className="summary-stats">
-          <span>投稿数: <strong>{totalVideos.toLocaleString()}</strong></span>
-          <span>書籍数: <strong>{allBooks.length.toLocaleString()}</strong></span>
+          <span>投稿数: <strong>{manifest.videos.toLocaleString()}</strong></span>
+          <span>書籍数: <strong>{manifest.books.toLocaleString()}</strong></span>
         </div>
       )}
       <form className="search-form" onSubmit={handleSearch}>
@@ -280,7 +290,7 @@ export function TopPage() {
         )}
       </form>
       {searchQuery && (
-        <p className="search-result">「{searchQuery}」の検索結果: {filteredBooks.length}件</p>
+        <p className="search-result">「{searchQuery}」の検索結果: {filteredEntries.length}件</p>
       )}
       <div className="filter-row">
         <div className="sort-tabs">
@@ -322,7 +332,7 @@ export function TopPage() {
           {selectedYear && `${selectedYear}年`}
           {selectedYear && selectedChannel && ' / '}
           {selectedChannel && `${selectedChannel}`}
-          : {filteredBooks.length}件
+          : {filteredEntries.length}件
         </p>
       )}
       {loading ? (
@@ -330,7 +340,7 @@ export function TopPage() {
       ) : (
         <>
           <div className="ranking-list">
-            {currentBooks.map((book, i) => (
+            {currentEntries.map((book, i) => (
               <div key={book.id} className="ranking-card">
                 <span className="rank">{startIndex + i + 1}</span>
                 {book.image_url && (
@@ -348,9 +358,7 @@ export function TopPage() {
                   {book.author && <span className="book-author">{book.author}</span>}
                   {book.publisher && <span className="book-publisher">{book.publisher}</span>}
                   <div className="book-stats">
-                    {(() => { const { point, channels } = calcPoint(book); return (
-                      <span>📊 <span className="stat-value">{point}pt</span>（{channels}ch）</span>
-                    )})()}
+                    <span>📊 <span className="stat-value">{book.point}pt</span>（{book.channels}ch）</span>
                     <span>📚 紹介: <span className="stat-value">{book.count}回</span></span>
                     <span>▶️ 再生回数: <span className="stat-value">{book.total_views.toLocaleString()}</span></span>
                     <span>👍 いいね: <span className="stat-value">{book.total_likes.toLocaleString()}</span></span>
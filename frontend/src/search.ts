@@ -0,0 +1,134 @@
+// 検索インデックス（scripts/build_search_index.py が書き出す search/）を使ったタイトル・著者・出版社の検索
+// クエリのバイグラムの先頭の文字のシャードだけを取得し、文書番号の集合の積を取る
+// バイグラムの積は候補の絞り込みなので、最後に候補の検索用テキストで確かめる
+// 検索用テキストは候補の文書番号を含むチャンク（docs-<4桁>.json）だけを取得する
+
+const SEARCH_BASE = import.meta.env.BASE_URL + 'data/search'
+
+// search/docs-<4桁>.json の1件: [書籍ID, 紹介回数, 再生回数, いいね数, ポイント, 検索用テキスト]
+// （文書番号 = ポイント順の順位。検索用テキストは searchKey したタイトル・著者・出版社を改行でつないだもの）
+type SearchDocRow = [string, number, number, number, number, string]
+
+// docs-<4桁>.json 1ファイルあたりの文書数（build_search_index.DOCS_CHUNK_SIZE と同じ）
+// 文書番号 n は docs-{n / DOCS_CHUNK_SIZE}.json の n % DOCS_CHUNK_SIZE 件目
+const DOCS_CHUNK_SIZE = 256
+
+export interface SearchDoc {
+  id: string
+  count: number
+  total_views: number
+  total_likes: number
+  point: number
+}
+
+const docChunks = new Map<number, Promise<SearchDocRow[]>>()
+const shards = new Map<string, Promise<Record<string, number[]>>>()
+
+function fetchDocChunk(chunk: number): Promise<SearchDocRow[]> {
+  let rows = docChunks.get(chunk)
+  if (!rows) {
+    rows = fetch(`${SEARCH_BASE}/docs-${String(chunk).padStart(4, '0')}.json`).then(res => res.json())
+    docChunks.set(chunk, rows)
+  }
+  return rows
+}
+
+// シャードは先頭の文字のコードポイント（16進）ごと。該当する書籍が無い文字はファイルも無い
+function fetchShard(char: string): Promise<Record<string, number[]>> {
+  const name = char.codePointAt(0)!.toString(16)
+  let shard = shards.get(name)
+  if (!shard) {
+    shard = fetch(`${SEARCH_BASE}/${name}.json`).then(res => (res.ok ? res.json() : {}))
+    shards.set(name, shard)
+  }
+  return shard
+}
+
+// build_search_index.search_key と同じ正規化（NFKC の後に fetch_videos.normalize_title_key と同じ置換を同じ順で行う）
+// 索引語と食い違わないよう、normalize_title_key を変えたらここも合わせる
+export function searchKey(text: string): string {
+  return text
+    .normalize('NFKC')
+    .replace(/[『』「」]/g, '')
+    .replace(/[（(](単行本|文庫|新書|ハードカバー|Kindle版)[）)]/g, '')
+    .replace(/^(改訂版|新版|新装版|増補版|決定版|完全版)\s*/, '')
+    .replace(/(改訂版です|改訂版)$/, '')
+    .replace(/[\s　、,：:]+/g, '')
+    .toLowerCase()
+}
+
+// 検索の一致の規則: 正規化したクエリ key がタイトル・著者・出版社のどれかに部分文字列として含まれる
+// （build_search_index.matches_search と同じ。検索インデックスを使わない絞り込みもこれを使う）
+// 正規化すると空になるクエリ（記号だけなど）はどの書籍にも一致しない
+export function matchesSearch(key: string, fields: (string | null | undefined)[]): boolean {
+  return Boolean(key) && fields.some(field => Boolean(field) && searchKey(field!).includes(key))
+}
+
+// 差分で保存された文書番号を元に戻す
+function decode(deltas: number[]): number[] {
+  const numbers: number[] = []
+  let n = 0
+  for (const d of deltas) {
+    n += d
+    numbers.push(n)
+  }
+  return numbers
+}
+
+function intersect(a: number[], b: number[]): number[] {
+  const result: number[] = []
+  let i = 0
+  let j = 0
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      result.push(a[i])
+      i++
+      j++
+    } else if (a[i] < b[j]) {
+      i++
+    } else {
+      j++
+    }
+  }
+  return result
+}
+
+// クエリに一致する文書番号（昇順）
+async function matchDocs(key: string): Promise<number[]> {
+  const chars = Array.from(key)
+  if (chars.length === 1) {
+    // 1文字: その文字で始まる索引語（バイグラムと末尾の1文字）のどれかを含む書籍
+    const shard = await fetchShard(chars[0])
+    const numbers = new Set<number>()
+    for (const deltas of Object.values(shard)) {
+      for (const n of decode(deltas)) numbers.add(n)
+    }
+    return Array.from(numbers).sort((a, b) => a - b)
+  }
+
+  const terms = new Set<string>()
+  for (let i = 0; i < chars.length - 1; i++) terms.add(chars[i] + chars[i + 1])
+  const postings = await Promise.all(
+    Array.from(terms).map(async term => decode((await fetchShard(term))[term] || []))
+  )
+  // 短いリストから順に積を取る
+  postings.sort((a, b) => a.length - b.length)
+  return postings.reduce((acc, list) => intersect(acc, list))
+}
+
+// 一致した書籍をポイント順で返す
+export async function searchBooks(query: string): Promise<SearchDoc[]> {
+  const key = searchKey(query)
+  if (!key) return []
+  const numbers = await matchDocs(key)
+  const chunks = Array.from(new Set(numbers.map(n => Math.floor(n / DOCS_CHUNK_SIZE))))
+  const rowsByChunk = new Map(await Promise.all(
+    chunks.map(async chunk => [chunk, await fetchDocChunk(chunk)] as const)
+  ))
+  const rows = numbers.map(n => rowsByChunk.get(Math.floor(n / DOCS_CHUNK_SIZE))![n % DOCS_CHUNK_SIZE])
+  // 検索用テキストはフィールドごとに正規化済みで改行をまたいで一致しないので、そのまま部分文字列で確かめる
+  // （build_search_index.matches_search と同じ判定。key は空でない）
+  return rows.filter(row => row[5].includes(key)).map(([id, count, total_views, total_likes, point]) => (
+    { id, count, total_views, total_likes, point }
+  ))
+}
@@ -23,6 +23,18 @@ export interface Book {
   isbn?: string
 }
 
+// catalog.json: 動画は video_id をキーに1件ずつ持ち、書籍は video_ids で参照する
+export type CatalogVideo = Omit<Video, 'video_id'>
+
+export interface CatalogBook extends Omit<Book, 'videos'> {
+  video_ids: string[]
+}
+
+export interface Catalog {
+  videos: Record<string, CatalogVideo>
+  books: CatalogBook[]
+}
+
 export interface Channel {
   name: string
   channel_id: string
@@ -42,3 +54,64 @@ export interface RankingEntry {
   publisher?: string
   publication_date?: string
 }
+
+// ranking_table.json: エントリは1回だけ持ち、並べ替えキーごとに entries のインデックスを並び順で持つ
+export type RankingKey = 'count' | 'total_views' | 'total_likes'
+
+export interface RankingTable {
+  entries: RankingEntry[]
+  orders: Record<RankingKey, number[]>
+}
+
+// rankings/<並べ替え>/page-0001.json: 一覧の1ページ分（一覧に表示するフィールドだけ）
+export type RankingSort = 'point' | 'count' | 'views' | 'likes'
+
+export interface RankingPageEntry {
+  id: string
+  title: string
+  author: string | null
+  publisher?: string
+  image_url?: string
+  amazon_url: string
+  count: number
+  total_views: number
+  total_likes: number
+  point: number
+  channels: number
+}
+
+// rankings/manifest.json: ページ数・件数と絞り込みの選択肢
+export interface RankingManifest {
+  page_size: number
+  pages: number
+  books: number
+  videos: number
+  sorts: RankingSort[]
+  years: number[]
+  channels: { name: string; count: number }[]
+}
+
+// manifest.json: 元のファイル名から、内容のハッシュ付きの名前への対応表
+export interface HashedFile {
+  file: string
+  size: number
+}
+
+export interface DataManifest {
+  files: Record<string, HashedFile>
+}
+
+// ranking_windows.json: 期間別ランキング（キーは "7d"・"30d"・"365d" と年）
+// rows は [ranking_table.json の entries の添字, 紹介回数, 再生回数, いいね数, ポイント, チャンネル数]、
+// orders は並べ替えキーごとの rows の添字
+export type RankingWindowRow = [number, number, number, number, number, number]
+
+export interface RankingWindow {
+  rows: RankingWindowRow[]
+  orders: Record<'point' | RankingKey, number[]>
+}
+
+export interface RankingWindows {
+  as_of: string
+  windows: Record<string, RankingWindow>
+}
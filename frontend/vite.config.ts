@@ -1,9 +1,29 @@
-import { defineConfig } from 'vite'
+import { existsSync } from 'node:fs'
+import { fileURLToPath } from 'node:url'
+import { defineConfig, type Plugin } from 'vite'
 import react from '@vitejs/plugin-react'
 import vike from 'vike/plugin'
 
+// 一覧ページが読むランキングのマニフェスト（python scripts/pipeline.py の export が書き出す生成物）
+const RANKING_MANIFEST = fileURLToPath(new URL('./public/data/rankings/manifest.json', import.meta.url))
+
+// public/data/ の生成物はコミットしないので、未生成のままのビルド・開発サーバーは最初に止める
+function requireExportedData(): Plugin {
+  return {
+    name: 'require-exported-data',
+    buildStart() {
+      if (!existsSync(RANKING_MANIFEST)) {
+        this.error(
+          'frontend/public/data/rankings/manifest.json がありません。' +
+            '先にリポジトリのルートで `python scripts/pipeline.py` を実行して public/data/ を書き出してください',
+        )
+      }
+    },
+  }
+}
+
 export default defineConfig({
-  plugins: [react(), vike()],
+  plugins: [requireExportedData(), react(), vike()],
   publicDir: 'public',
   build: {
     outDir: 'dist',
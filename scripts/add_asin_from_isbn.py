@@ -6,11 +6,8 @@ ISBN-13（978始まり）をISBN-10に変換し、ASINとして使用。
 amazon_urlを直接商品ページURLに更新する。
 """
 
-import json
-from pathlib import Path
+import book_store
 
-DATA_DIR = Path(__file__).parent.parent / "data"
-BOOKS_FILE = DATA_DIR / "books.json"
 AMAZON_TRACKING_ID = "business-book-ranking02-22"
 
 
@@ -44,23 +41,22 @@ def isbn13_to_asin(isbn13: str) -> str | None:
     return core + cd_str
 
 
-def main():
+def run(store):
+    """ISBN-13からASINとamazon_urlをストア上で更新する（pipeline.py からも呼ばれる）"""
     print("=== ISBN-13 → ASIN変換 ===")
 
-    with open(BOOKS_FILE, "r", encoding="utf-8") as f:
-        books = json.load(f)
+    # ISBN取得済みの書籍だけを読む
+    skipped_no_isbn = store.count()
+    books = store.books_with_isbn()
+    skipped_no_isbn -= len(books)
 
+    updates = {}  # book id -> 変更したフィールド
     updated = 0
-    skipped_no_isbn = 0
     skipped_non_978 = 0
     already_has_asin = 0
 
     for book in books:
-        isbn = book.get("isbn")
-
-        if not isbn:
-            skipped_no_isbn += 1
-            continue
+        isbn = book["isbn"]
 
         # 既に /dp/ 形式のURLがある場合、asinフィールドがなければ抽出
         current_url = book.get("amazon_url", "")
@@ -69,7 +65,7 @@ def main():
                 import re
                 m = re.search(r'/dp/([A-Z0-9]{10})', current_url)
                 if m:
-                    book["asin"] = m.group(1)
+                    updates[book["id"]] = {"asin": m.group(1)}
             already_has_asin += 1
             continue
 
@@ -81,13 +77,14 @@ def main():
             continue
 
         # amazon_urlを更新
-        book["asin"] = asin
-        book["amazon_url"] = f"https://www.amazon.co.jp/dp/{asin}?tag={AMAZON_TRACKING_ID}"
+        updates[book["id"]] = {
+            "asin": asin,
+            "amazon_url": f"https://www.amazon.co.jp/dp/{asin}?tag={AMAZON_TRACKING_ID}",
+        }
         updated += 1
 
-    # 保存
-    with open(BOOKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(books, f, ensure_ascii=False, indent=2)
+    # 変更した書籍だけを保存
+    store.update_books(updates)
 
     print(f"更新: {updated}件")
     print(f"既にASIN有り: {already_has_asin}件")
@@ -96,5 +93,13 @@ def main():
     print("=== 完了 ===")
 
 
+def main():
+    store = book_store.open_store()
+    run(store)
+    # books.json / rankings*.json を書き出す
+    store.export()
+    store.close()
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""生成物（JSON・sitemap.xml）の書き出し
+
+内容を1回だけシリアライズし、書き出し先ごとに既存ファイルとハッシュを比べて
+変わったものだけを一時ファイル + rename で置き換える。内容が同じ実行ではファイルに触れないので、
+git の差分やフロントエンドの再ビルドのきっかけにならない。
+書き出し先を複数渡せば data/ と frontend/public/data/ へのコピーも同じ手順で行う。
+write_hashed は内容のハッシュを含むファイル名で書き出す（CDNで期限なしにキャッシュできる。
+圧縮は配信側の Cloudflare に任せる）。
+
+使用例:
+    writer = ArtifactWriter()
+    writer.write_json(rankings, "data/rankings.json", "frontend/public/data/rankings.json")
+    writer.print_summary()
+"""
+
+import hashlib
+import json
+import os
+
+# 内容のハッシュを含むファイル名に使う16進の桁数
+HASH_LENGTH = 12
+
+
+def dump_json(data, compact=False):
+    """JSON文字列にする（compact なら改行・インデントなし）"""
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def hashed_name(name, data):
+    """"catalog.json" と内容 data（bytes）から "catalog.<ハッシュ>.json" を返す"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _file_matches(path, data):
+    """path の内容が data（bytes）と同じか"""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            existing = f.read()
+    except FileNotFoundError:
+        return False
+    return hashlib.sha256(existing).digest() == hashlib.sha256(data).digest()
+
+
+def atomic_write_bytes(path, data):
+    """一時ファイルに書いてから rename で置き換える"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ArtifactWriter:
+    """内容が変わった生成物だけを書き出し、書いた/書かなかったファイルを記録する"""
+
+    # print_summary で個別に表示する更新ファイル数の上限
+    SUMMARY_LIMIT = 20
+
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+        self.removed = []
+
+    def write_text(self, text, *paths):
+        """text を各パスに書き出す（内容が同じファイルはそのまま）。1つでも書いたら True"""
+        data = text.encode("utf-8")
+        changed = False
+        for path in paths:
+            if _file_matches(path, data):
+                self.unchanged.append(path)
+                continue
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            atomic_write_bytes(path, data)
+            self.written.append(path)
+            changed = True
+        return changed
+
+    def write_json(self, data, *paths, compact=False):
+        """data をJSONにして各パスに書き出す（compact なら改行・インデントなし）"""
+        return self.write_text(dump_json(data, compact), *paths)
+
+    def write_hashed(self, text, directory, name):
+        """text を内容のハッシュを含むファイル名で directory に書き出す
+
+        名前が同じなら内容も同じなので、既にあるファイルは読まない。
+        manifest 用に {"file", "size"} を返す（ファイル名は directory からの相対）。
+        """
+        data = text.encode("utf-8")
+        file_name = hashed_name(name, data)
+        path = os.path.join(directory, file_name)
+        if os.path.exists(path):
+            self.unchanged.append(path)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            atomic_write_bytes(path, data)
+            self.written.append(path)
+        return {"file": file_name, "size": len(data)}
+
+    def remove(self, path):
+        """不要になった生成物を削除"""
+        os.remove(path)
+        self.removed.append(path)
+
+    def print_summary(self):
+        line = f"書き出し: 更新{len(self.written)}件 / 変更なし{len(self.unchanged)}件"
+        if self.removed:
+            line += f" / 削除{len(self.removed)}件"
+        print(line)
+        for path in self.written[:self.SUMMARY_LIMIT]:
+            print(f"  更新: {os.path.relpath(path)}")
+        if len(self.written) > self.SUMMARY_LIMIT:
+            print(f"  ...ほか{len(self.written) - self.SUMMARY_LIMIT}件")
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""動画キャッシュの概要欄を使って、書籍抽出の処理速度を以前の実装と比較
+
+チャンネルごとに、book_extractors.extract_book_info_list（コンパイル済みパターン +
+ガード付きエクストラクタ）と、エクストラクタ化する前の fetch_videos.extract_book_info_list
+（下に写しを置く）の処理件数/秒を計測し、両者の抽出結果が一致することも確認する。
+あわせて、どのエクストラクタで確定したかの件数を表示する。channels.json で "extractors" を
+指定したチャンネルは、指定したチェーンの処理件数/秒と、既定のチェーンと結果が異なる件数も表示する。
+
+使用例:
+    python scripts/bench_extract.py
+    python scripts/bench_extract.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from book_extractors import DEFAULT_EXTRACTOR_ORDER, EXTRACTORS, extract_book_info_list, resolve_extractors
+from video_cache import DEFAULT_CACHE_FILE, VideoCache
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CHANNELS_FILE = os.path.join(DATA_DIR, "channels.json")
+
+
+def previous_extract_book_info_list(summary, video_title=None):
+    """以前の実装: 全パターンの正規表現を順に試す fetch_videos.extract_book_info_list（比較用の写し）"""
+    results = []
+
+    # パターン0: 動画タイトルから抽出「【要約】タイトル【著者】」（フェルミ漫画大学等）
+    if video_title:
+        m = re.match(r'【(?:要約|漫画)】(.+?)【(.+?)】', video_title)
+        if m:
+            book_title = m.group(1).strip()
+            author = m.group(2).strip()
+            results.append({
+                "title": book_title,
+                "author": author,
+                "publisher": None,
+            })
+            return results
+
+    # TODO: Amazonリンクから書籍情報を取得（時間がかかるため一時的に無効化）
+    # amazon_urls = re.findall(r'https?://amzn\.to/[A-Za-z0-9]+', summary)
+    # if amazon_urls:
+    #     amazon_books = extract_books_from_amazon_links(amazon_urls, max_books=5, context=summary)
+    #     for book in amazon_books:
+    #         results.append({
+    #             "title": book["title"],
+    #             "author": None,
+    #             "publisher": None,
+    #             "amazon_url": book["amazon_url"],
+    #         })
+    #     if results:
+    #         return results
+
+    # パターン1: 本要約チャンネル / サラタメさん「タイトル：」「著者：」「出版社：」
+    title_match = re.search(r'タイトル[：:](.+)', summary)
+    if title_match:
+        info = {
+            "title": title_match.group(1).strip(),
+            "author": None,
+            "publisher": None,
+        }
+        author_match = re.search(r'著者[：:](.+)', summary)
+        if author_match:
+            info["author"] = author_match.group(1).strip()
+        publisher_match = re.search(r'出版社[：:](.+)', summary)
+        if publisher_match:
+            info["publisher"] = publisher_match.group(1).strip()
+        results.append(info)
+        return results
+
+    # パターン2: フェルミ漫画大学「参考：書名 著者名 さま」
+    # 「参考文献：」も対応
+    ref_match = re.search(r'参考(?:文献)?[：:](.+?)(?:\s+さま|\s*$)', summary, re.MULTILINE)
+    if ref_match:
+        title_text = ref_match.group(1).strip()
+        # 著者名だけの行を除外（「さま」で終わる人名のみ、書籍タイトルなし）
+        if not re.match(r'^[\w\s・　]+さま', title_text) and title_text:
+            results.append({
+                "title": title_text,
+                "author": None,
+                "publisher": None,
+            })
+            return results
+
+    # パターン3: 学識サロン「【amazonリンク】\n『書名』著者 / 出版社」
+    if "【amazonリンク】" in summary:
+        gakushiki_match = re.search(r'『(.+?)』(.+?)(?:\s*/\s*(.+))?$', summary, re.MULTILINE)
+        if gakushiki_match:
+            info = {
+                "title": gakushiki_match.group(1).strip(),
+                "author": None,
+                "publisher": None,
+            }
+            if gakushiki_match.group(2):
+                info["author"] = gakushiki_match.group(2).strip()
+            if gakushiki_match.group(3):
+                info["publisher"] = gakushiki_match.group(3).strip()
+            results.append(info)
+            return results
+
+    # パターン4: サムの本解説ch「【今回の参考書籍📚】」セクション
+    sam_section = re.search(
+        r'【今回の参考書籍.*?】\s*\n(.*?)(?=【|$)', summary, re.DOTALL
+    )
+    if sam_section:
+        section_text = sam_section.group(1).strip()
+        lines = section_text.split('\n')
+        title_line = None
+        author_line = None
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('http'):
+                continue
+            # 著者行を判定: 「〜(著)」「〜（著）」を含む行
+            if re.search(r'[（(]著[）)]', line):
+                author_line = line
+            elif not title_line:
+                # 最初の非著者行をタイトルとして取得
+                title_line = re.sub(r'\s*(Kindle版|単行本|文庫|新書|ハードカバー)\s*$', '', line).strip()
+                # 先頭の「・」を除去
+                title_line = re.sub(r'^[・･]', '', title_line).strip()
+        if title_line:
+            info = {"title": title_line, "author": None, "publisher": None}
+            if author_line:
+                author_match = re.match(r'(.+?)\s*[（(]著[）)]', author_line)
+                if author_match:
+                    info["author"] = author_match.group(1).strip()
+                pub_match = re.search(r'([^\s]+?)[（(]編集[）)]', author_line)
+                if pub_match:
+                    info["publisher"] = pub_match.group(1).strip()
+            results.append(info)
+            return results
+
+    # パターン5: PIVOT系「＜参考書籍＞」「▼参考書籍」「▼関連書籍」「▼本映像で紹介した書籍」セクション
+    pivot_section = re.search(
+        r'(?:[＜<]参考書籍[＞>]|▼参考書籍|▼関連書籍|▼本映像で紹介した書籍)\s*\n(.*?)(?=\n[＜<]|\n▼[^参関本]|\n[■●]|\n※|\n\n\n|$)', summary, re.DOTALL
+    )
+    if pivot_section:
+        section_text = pivot_section.group(1).strip()
+        lines = section_text.split('\n')
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('http') or line.startswith('※'):
+                continue
+
+            title = None
+            author = None
+
+            # パターンA: 『タイトル』を優先（内部に「」が含まれてもOK）
+            book_match = re.search(r'『(.+?)』', line)
+            if book_match:
+                title = book_match.group(1).strip()
+                before = line[:book_match.start()].strip()
+                if before:
+                    author = before
+                after = line[book_match.end():].strip()
+                if not author and after:
+                    a_match = re.match(r'(.+?)\s*[（(]著[）)]', after)
+                    if a_match:
+                        author = a_match.group(1).strip()
+
+            # パターンB: 「タイトル」＋後続テキストも含める
+            if not title:
+                book_match = re.search(r'「(.+?)」(.+?)(?=[（(]|https?://|\s*$)', line)
+                if book_match:
+                    # 「タイトル」の後ろもタイトルの一部として結合
+                    title = book_match.group(1).strip() + book_match.group(2).strip()
+                    # 末尾の括弧内（出版社等）を除去
+                    title = re.sub(r'[（(][^）)]+[）)]$', '', title).strip()
+
+            if not title:
+                continue
+
+            results.append({
+                "title": title,
+                "author": author,
+                "publisher": None,
+            })
+        # PIVOTの参考書籍セクションがある場合は結果に関わらずここで返す
+        # （パターン6のamzn.to汎用抽出に落ちないようにする）
+        return results
+
+    # パターン5.5: flier「▼紹介した作品」セクション
+    # 形式: ▼紹介した作品
+    #       著者『タイトル』（出版社）
+    #       https://amzn.to/xxx
+    # 複数の場合: ①著者『タイトル』（出版社）
+    flier_section = re.search(
+        r'▼紹介した作品\s*\n(.*?)(?=\n▼[^紹]|\n※上記リンク|$)', summary, re.DOTALL
+    )
+
+    # パターン5.6: TBS CROSS DIG「◆書籍紹介◆」セクション
+    # 形式: ◆書籍紹介◆
+    #       ▼『タイトル』
+    #       著者
+    #       出版社
+    #       https://amzn.to/xxx
+    tbs_section = re.search(
+        r'◆書籍紹介◆\s*\n(.*?)(?=\n◆|$)', summary, re.DOTALL
+    )
+    if tbs_section:
+        section_text = tbs_section.group(1).strip()
+        lines = section_text.split('\n')
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            # ▼『タイトル』を探す
+            title_match = re.match(r'▼『(.+?)』', line)
+            if title_match:
+                title = title_match.group(1).strip()
+                author = None
+                publisher = None
+                # 次の行で著者、その次で出版社を取得
+                if i + 1 < len(lines) and not lines[i+1].strip().startswith('http'):
+                    author = lines[i+1].strip()
+                if i + 2 < len(lines) and not lines[i+2].strip().startswith('http'):
+                    publisher = lines[i+2].strip()
+                results.append({
+                    "title": title,
+                    "author": author,
+                    "publisher": publisher,
+                })
+            i += 1
+        if results:
+            return results
+    if flier_section:
+        section_text = flier_section.group(1).strip()
+        lines = section_text.split('\n')
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('http') or line.startswith('※'):
+                continue
+            # ①②等の番号を除去
+            line = re.sub(r'^[①②③④⑤⑥⑦⑧⑨⑩]\s*', '', line)
+            # 著者『タイトル』（出版社）パターン
+            match = re.match(r'(.+?)『(.+?)』(?:（(.+?)）)?', line)
+            if match:
+                author = match.group(1).strip() if match.group(1) else None
+                title = match.group(2).strip()
+                publisher = match.group(3).strip() if match.group(3) else None
+                results.append({
+                    "title": title,
+                    "author": author,
+                    "publisher": publisher,
+                })
+        if results:
+            return results
+
+    # パターン6: 七瀬アリーサ — amzn.toリンクから書籍タイトルを抽出
+    # 形式A: 「タイトル　https://amzn.to/xxx」(同一行)
+    # 形式B: 「タイトル」+ 次行「https://amzn.to/xxx」(別行)
+    amazon_lines = re.findall(r'https?://amzn\.to/[A-Za-z0-9]+', summary)
+    if amazon_lines:
+        lines = summary.split('\n')
+        ng_words = ['Amazon', 'URL', 'リンク', '七瀬', '商品紹介', '特典',
+                    'メッセージカード', 'Success Book', '動画', '概要欄',
+                    'おすすめ順ではない', 'アソシエイト', '購入ページ',
+                    '提供:', 'Mainichi Eikaiwa', '評判', 'おすすめ本', '出演本',
+                    '参考本', 'お勧め本', 'TOEIC', '勉強本', 'オーディブル',
+                    'Audible', 'Kindle', 'Udemy', '手帳', 'プランナー',
+                    'オンライン英会話', 'AQUES', 'チャンネル登録', 'LOWYAの',
+                    'Meta Quest', 'Kindle端末', '本棚デスク', 'はこちら',
+                    'タイマー', 'トレーナー', 'ボードゲーム', 'かっさ',
+                    'テラヘルツ', 'イヤホン', 'キーボード', 'マウス',
+                    'ディスプレイ', 'モニター', 'チェア', 'ライト付き',
+                    '金フレ', 'キクタン', 'でる1000問', '公式問題集',
+                    '精選問題集', '精選模試']
+
+        for i, line in enumerate(lines):
+            line_stripped = line.strip()
+            amazon_match = re.search(r'https?://amzn\.to/[A-Za-z0-9]+', line_stripped)
+            if not amazon_match:
+                continue
+
+            title_candidate = None
+            amazon_url = amazon_match.group(0)
+
+            # 形式A: amzn.toの前にテキストがある（同一行）
+            before_url = line_stripped[:amazon_match.start()].strip()
+            if before_url and not before_url.startswith('http'):
+                title_candidate = before_url
+            # 形式B: amzn.toだけの行 → 前の行がタイトル（著者・出版社行はスキップ）
+            elif line_stripped == amazon_url and i > 0:
+                for j in range(i-1, max(i-5, -1), -1):
+                    prev_line = lines[j].strip()
+                    if not prev_line or prev_line.startswith('http'):
+                        break
+                    # 著者・出版社などのメタデータ行はスキップ（空白入りも対応: 「著　者」「監　訳」）
+                    if re.match(r'^(著[\s　]*者|監[\s　]*訳|出版社|出版|発行|発売日|価格|定価)[\s\u200f\u200e]*[：:.\s　]', prev_line):
+                        continue
+                    # 括弧だけの補足行はスキップ（例: 「(日本語版)」「（完全版）」）
+                    if re.match(r'^[（(].+[）)]$', prev_line):
+                        continue
+                    # 著者行をスキップ（例: 「エミン・ユルマズ (著)」）
+                    if re.search(r'[（(]著[）)]', prev_line) and '『' not in prev_line and '「' not in prev_line:
+                        continue
+                    title_candidate = prev_line
+                    break
+
+            if not title_candidate:
+                continue
+
+            # NGワードチェック
+            if any(ng in title_candidate for ng in ng_words):
+                continue
+
+            # クリーンアップ
+            cleaned = re.sub(r'^[*\s・※❤️📕📗📘📙🔽▽↓]+', '', title_candidate).strip()
+            # 括弧付きの補足を除去: 「タイトル(Amazon)」→「タイトル」
+            cleaned = re.sub(r'[（(](?:Amazon|Amazonリンク|アマゾン)[）)]$', '', cleaned).strip()
+            # 『』「」で囲まれている場合は外す
+            if cleaned.startswith('『') and cleaned.endswith('』'):
+                cleaned = cleaned[1:-1]
+            if cleaned.startswith('「') and cleaned.endswith('」'):
+                cleaned = cleaned[1:-1]
+
+            if cleaned and len(cleaned) > 2:
+                results.append({
+                    "title": cleaned,
+                    "author": None,
+                    "publisher": None,
+                })
+
+        if results:
+            return results
+
+    # パターン5: アバタロー「書籍の購入」セクション
+    abataro_section = re.search(
+        r'(?:【書籍の購入】|▼書籍の購入)\s*\n?(.*?)(?=\n▼|\n\n\n|\Z)', summary, re.DOTALL
+    )
+    if abataro_section:
+        section_text = abataro_section.group(1)
+        lines = section_text.strip().split('\n')
+        seen_titles = set()
+        is_first = True
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            # 非書籍行をスキップ
+            if not line or line.startswith('http') or 'エッセンシャル版' in line or '簡易版' in line:
+                i += 1
+                continue
+            # セクションヘッダー・サービス宣伝・ハッシュタグ・絵文字付き動画タイトルをスキップ
+            if (line.startswith('【') or line.startswith('#') or
+                'Audible' in line or 'Kindle' in line or 'amzn.to' in line or
+                line.startswith('📗') or line.startswith('📕') or
+                '本を聴く' in line or '関連動画' in line or
+                '分解説' in line or 'チャンネル登録' in line or
+                'SNS' in line or 'Twitter' in line or 'Instagram' in line or
+                'OUTPUT読書術' in line):
+                i += 1
+                continue
+            line = re.sub(r'^・\s*', '', line)
+            book_match = re.match(r'(.+?)(?:[｜|](.+?))?(?:[（(](.+?)[）)])?$', line)
+            if book_match:
+                title = book_match.group(1).strip()
+                author = book_match.group(2).strip() if book_match.group(2) else None
+                publisher = book_match.group(3).strip() if book_match.group(3) else None
+                if title not in seen_titles:
+                    seen_titles.add(title)
+                    results.append({
+                        "title": title,
+                        "author": author,
+                        "publisher": publisher,
+                        "_is_first": is_first,
+                    })
+                is_first = False
+            i += 1
+        if results:
+            return results
+
+    return results
+
+
+def first_hit(summary, video_title):
+    """最初に結果を返したエクストラクタ名（どれも該当しなければ None）"""
+    for name in DEFAULT_EXTRACTOR_ORDER:
+        if EXTRACTORS[name](summary, video_title) is not None:
+            return name
+    return None
+
+
+def timed(func, docs, repeat):
+    """docs を repeat 回抽出し、(最後の抽出結果, 処理件数/秒) を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(summary, video_title) for summary, video_title in docs]
+    elapsed = time.perf_counter() - start
+    return results, (len(docs) * repeat / elapsed if elapsed else float("inf"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="書籍抽出の処理速度を以前の実装と比較")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の繰り返し回数（既定: 3）")
+    args = parser.parse_args()
+
+    if not os.path.exists(DEFAULT_CACHE_FILE):
+        print(f"ERROR: 動画キャッシュ {DEFAULT_CACHE_FILE} がありません。先に fetch_videos.py を実行してください。")
+        sys.exit(1)
+    with open(CHANNELS_FILE, "r", encoding="utf-8") as f:
+        channels = json.load(f)["channels"]
+
+    cache = VideoCache(DEFAULT_CACHE_FILE)
+    total_docs = 0
+    total_current = 0.0
+    total_previous = 0.0
+    total_mismatches = 0
+
+    for ch in channels:
+        docs = [(r["description"], r["title"])
+                for r in cache.channel_records(ch["channel_id"]) if r["duration_sec"] > 60]
+        if not docs:
+            continue
+        current, current_rate = timed(extract_book_info_list, docs, args.repeat)
+        previous, previous_rate = timed(previous_extract_book_info_list, docs, args.repeat)
+        mismatches = [doc for doc, a, b in zip(docs, current, previous) if a != b]
+        total_docs += len(docs)
+        total_current += len(docs) / current_rate
+        total_previous += len(docs) / previous_rate
+        total_mismatches += len(mismatches)
+
+        print(f"\n=== {ch['name']} ({len(docs)}件) ===")
+        for name, n in Counter(first_hit(s, t) for s, t in docs).most_common():
+            print(f"  {name or '(該当なし)'}: {n}件")
+        print(f"  現在の実装: {current_rate:,.0f}件/秒 / 以前の実装: {previous_rate:,.0f}件/秒 "
+              f"({current_rate / previous_rate:.1f}倍)")
+        if mismatches:
+            print(f"  [WARN] 抽出結果が以前と異なる: {len(mismatches)}件 (例: {mismatches[0][1]})")
+        if ch.get("extractors"):
+            chain = resolve_extractors(ch["extractors"])
+            configured, configured_rate = timed(
+                lambda summary, video_title: extract_book_info_list(summary, video_title, chain),
+                docs, args.repeat)
+            lost = [doc for doc, a, b in zip(docs, configured, current) if a != b]
+            print(f"  指定のエクストラクタ（{', '.join(ch['extractors'])}）: {configured_rate:,.0f}件/秒 "
+                  f"(既定のチェーンの{configured_rate / current_rate:.1f}倍)")
+            if lost:
+                print(f"  [WARN] 既定のチェーンと抽出結果が異なる: {len(lost)}件 (例: {lost[0][1]})")
+    cache.close()
+
+    if total_docs:
+        print(f"\n合計 {total_docs}件: 現在の実装 {total_docs / total_current:,.0f}件/秒 / "
+              f"以前の実装 {total_docs / total_previous:,.0f}件/秒 "
+              f"({total_previous / total_current:.1f}倍)")
+        print("抽出結果: " + ("すべて一致" if not total_mismatches else f"{total_mismatches}件が不一致"))
+
+
+if __name__ == "__main__":
+    main()
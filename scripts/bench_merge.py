@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""merge_similar_books の統合先計算（build_merge_map）の処理時間を合成キーで計測
+
+書籍タイトルの正規化キーに似せた合成キー（一部は別のキーの前方一致＝副題違い）を作り、
+辞書順スタックによる build_merge_map と、以前の全キー走査（O(n²)）を比較する。
+全キー走査は --max-quadratic 件までだけ実行し、両者の統合先が一致することも確認する。
+
+使用例:
+    python scripts/bench_merge.py
+    python scripts/bench_merge.py --sizes 1000 10000 30000 --max-quadratic 30000
+"""
+
+import argparse
+import random
+import time
+
+from fetch_videos import MERGE_MIN_KEY_LEN, build_merge_map
+
+# 合成キーに使う文字（ひらがな・カタカナ・よく使う漢字・英数字）
+KEY_CHARS = (
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわん"
+    "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+    "人生仕事時間習慣思考成功投資経営戦略心理入門技術大全教科書新版"
+    "abcdefghijklmnopqrstuvwxyz0123456789"
+)
+
+
+def synthetic_keys(n, seed=0):
+    """n 件の重複しない合成キーを生成（約3割は既存キーに副題を付けたもの）"""
+    rng = random.Random(seed)
+    keys = []
+    seen = set()
+    while len(keys) < n:
+        if keys and rng.random() < 0.3:
+            key = rng.choice(keys) + "".join(rng.choices(KEY_CHARS, k=rng.randint(1, 15)))
+        else:
+            key = "".join(rng.choices(KEY_CHARS, k=rng.randint(3, 30)))
+        if key not in seen:
+            seen.add(key)
+            keys.append(key)
+    rng.shuffle(keys)
+    return keys
+
+
+def quadratic_merge_map(keys):
+    """以前の実装: 長さ順に並べ、各キーについてより長い全キーを startswith で走査"""
+    keys = sorted(keys, key=len)
+    merge_map = {}
+    for i, short_key in enumerate(keys):
+        if short_key in merge_map or len(short_key) < MERGE_MIN_KEY_LEN:
+            continue
+        for long_key in keys[i+1:]:
+            if long_key in merge_map:
+                continue
+            if long_key.startswith(short_key):
+                merge_map[short_key] = long_key
+                break
+    return merge_map
+
+
+def timed(func, keys):
+    start = time.perf_counter()
+    result = func(keys)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="build_merge_map の処理時間を計測")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 30000, 100000],
+                        help="計測するキー数（既定: 1000 10000 30000 100000）")
+    parser.add_argument("--max-quadratic", type=int, default=10000,
+                        help="以前の実装を実行する最大キー数。超える場合は n² で推定（既定: 10000）")
+    args = parser.parse_args()
+
+    last_quadratic = None  # (件数, 秒) 推定用
+    for n in args.sizes:
+        keys = synthetic_keys(n)
+        merge_map, elapsed = timed(build_merge_map, keys)
+        line = f"{n:>7,}件: build_merge_map {elapsed:8.3f}秒 (統合{len(merge_map):,}件)"
+        if n <= args.max_quadratic:
+            expected, q_elapsed = timed(quadratic_merge_map, keys)
+            if list(expected.items()) != list(merge_map.items()):
+                raise SystemExit(f"ERROR: {n}件で統合先が以前の実装と一致しません")
+            last_quadratic = (n, q_elapsed)
+            line += f" / 以前の実装 {q_elapsed:8.3f}秒 ({q_elapsed / elapsed:,.0f}倍)"
+        elif last_quadratic:
+            q_n, q_elapsed = last_quadratic
+            estimate = q_elapsed * (n / q_n) ** 2
+            line += f" / 以前の実装 推定{estimate:8.0f}秒 (約{estimate / elapsed:,.0f}倍)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
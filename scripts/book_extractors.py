@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""動画の概要欄・タイトルから書籍情報を抽出するエクストラクタ群
+
+各チャンネルの概要欄の書式ごとにエクストラクタを登録し、既定の順に試す。
+channels.json の各チャンネルに "extractors": ["labeled_fields", ...] を書くと、
+そのチャンネルの動画では指定したエクストラクタだけを（この順で）試す。
+
+- 正規表現はすべてモジュール読み込み時にコンパイル済み
+- 各エクストラクタは安価な文字列判定（ガード）を通過したときだけ正規表現を実行する
+- エクストラクタは結果リストを返すと確定（空リストでも確定）、None を返すと次へ進む
+"""
+
+import re
+
+import denylist
+
+# =============================================================================
+# コンパイル済みパターン
+# =============================================================================
+
+# パターン0: 動画タイトル「【要約】タイトル【著者】」
+RE_TITLE_BRACKET = re.compile(r'【(?:要約|漫画)】(.+?)【(.+?)】')
+
+# パターン1: 「タイトル：」「著者：」「出版社：」
+RE_LABEL_TITLE = re.compile(r'タイトル[：:](.+)')
+RE_LABEL_AUTHOR = re.compile(r'著者[：:](.+)')
+RE_LABEL_PUBLISHER = re.compile(r'出版社[：:](.+)')
+
+# パターン2: 「参考：書名 著者名 さま」
+RE_SANKOU = re.compile(r'参考(?:文献)?[：:](.+?)(?:\s+さま|\s*$)', re.MULTILINE)
+RE_SAMA_ONLY = re.compile(r'^[\w\s・　]+さま')
+
+# パターン3: 「【amazonリンク】\n『書名』著者 / 出版社」
+RE_GAKUSHIKI = re.compile(r'『(.+?)』(.+?)(?:\s*/\s*(.+))?$', re.MULTILINE)
+
+# パターン4: 「【今回の参考書籍📚】」セクション
+RE_SAM_SECTION = re.compile(r'【今回の参考書籍.*?】\s*\n(.*?)(?=【|$)', re.DOTALL)
+RE_AUTHOR_MARK = re.compile(r'[（(]著[）)]')
+RE_FORMAT_SUFFIX = re.compile(r'\s*(Kindle版|単行本|文庫|新書|ハードカバー)\s*$')
+RE_LEADING_DOT = re.compile(r'^[・･]')
+RE_AUTHOR_BEFORE_MARK = re.compile(r'(.+?)\s*[（(]著[）)]')
+RE_EDITOR_MARK = re.compile(r'([^\s]+?)[（(]編集[）)]')
+
+# パターン5: PIVOT系「＜参考書籍＞」「▼参考書籍」「▼関連書籍」「▼本映像で紹介した書籍」
+RE_PIVOT_SECTION = re.compile(
+    r'(?:[＜<]参考書籍[＞>]|▼参考書籍|▼関連書籍|▼本映像で紹介した書籍)\s*\n(.*?)(?=\n[＜<]|\n▼[^参関本]|\n[■●]|\n※|\n\n\n|$)',
+    re.DOTALL,
+)
+RE_DOUBLE_BRACKET = re.compile(r'『(.+?)』')
+RE_KAGI_WITH_TAIL = re.compile(r'「(.+?)」(.+?)(?=[（(]|https?://|\s*$)')
+RE_TRAILING_PAREN = re.compile(r'[（(][^）)]+[）)]$')
+
+# パターン5.5: flier「▼紹介した作品」
+RE_FLIER_SECTION = re.compile(r'▼紹介した作品\s*\n(.*?)(?=\n▼[^紹]|\n※上記リンク|$)', re.DOTALL)
+RE_CIRCLED_NUMBER = re.compile(r'^[①②③④⑤⑥⑦⑧⑨⑩]\s*')
+RE_FLIER_LINE = re.compile(r'(.+?)『(.+?)』(?:（(.+?)）)?')
+
+# パターン5.6: TBS CROSS DIG「◆書籍紹介◆」
+RE_TBS_SECTION = re.compile(r'◆書籍紹介◆\s*\n(.*?)(?=\n◆|$)', re.DOTALL)
+RE_TBS_TITLE = re.compile(r'▼『(.+?)』')
+
+# パターン6: amzn.to リンク
+RE_AMAZON_SHORT = re.compile(r'https?://amzn\.to/[A-Za-z0-9]+')
+RE_META_LINE = re.compile(r'^(著[\s　]*者|監[\s　]*訳|出版社|出版|発行|発売日|価格|定価)[\s\u200f\u200e]*[：:.\s　]')
+RE_PAREN_ONLY = re.compile(r'^[（(].+[）)]$')
+RE_AMAZON_LEADING = re.compile(r'^[*\s・※❤️📕📗📘📙🔽▽↓]+')
+RE_AMAZON_LABEL_SUFFIX = re.compile(r'[（(](?:Amazon|Amazonリンク|アマゾン)[）)]$')
+
+# アバタロー「書籍の購入」
+RE_ABATARO_SECTION = re.compile(r'(?:【書籍の購入】|▼書籍の購入)\s*\n?(.*?)(?=\n▼|\n\n\n|\Z)', re.DOTALL)
+RE_BULLET = re.compile(r'^・\s*')
+RE_ABATARO_LINE = re.compile(r'(.+?)(?:[｜|](.+?))?(?:[（(](.+?)[）)])?$')
+
+# アバタロー書籍セクションで読み飛ばす行に含まれる語
+ABATARO_SKIP_WORDS = (
+    'Audible', 'Kindle', 'amzn.to', '本を聴く', '関連動画',
+    '分解説', 'チャンネル登録', 'SNS', 'Twitter', 'Instagram', 'OUTPUT読書術',
+)
+
+
+def _book(title, author=None, publisher=None):
+    return {"title": title, "author": author, "publisher": publisher}
+
+
+# =============================================================================
+# レジストリ
+# =============================================================================
+
+EXTRACTORS = {}
+
+
+def register_extractor(name):
+    """エクストラクタを名前付きで登録するデコレータ
+
+    登録する関数は (summary, video_title) を受け取り、
+    書籍情報のリスト（確定）または None（該当なし・次へ）を返す。
+    """
+    def decorator(func):
+        EXTRACTORS[name] = func
+        return func
+    return decorator
+
+
+@register_extractor("title_bracket")
+def extract_title_bracket(summary, video_title):
+    """パターン0: 動画タイトルから「【要約】タイトル【著者】」（フェルミ漫画大学等）"""
+    if not video_title or not video_title.startswith('【'):
+        return None
+    m = RE_TITLE_BRACKET.match(video_title)
+    if not m:
+        return None
+    return [_book(m.group(1).strip(), m.group(2).strip())]
+
+
+@register_extractor("labeled_fields")
+def extract_labeled_fields(summary, video_title):
+    """パターン1: 本要約チャンネル / サラタメさん「タイトル：」「著者：」「出版社：」"""
+    if 'タイトル' not in summary:
+        return None
+    title_match = RE_LABEL_TITLE.search(summary)
+    if not title_match:
+        return None
+    info = _book(title_match.group(1).strip())
+    if '著者' in summary:
+        author_match = RE_LABEL_AUTHOR.search(summary)
+        if author_match:
+            info["author"] = author_match.group(1).strip()
+    if '出版社' in summary:
+        publisher_match = RE_LABEL_PUBLISHER.search(summary)
+        if publisher_match:
+            info["publisher"] = publisher_match.group(1).strip()
+    return [info]
+
+
+@register_extractor("sankou")
+def extract_sankou(summary, video_title):
+    """パターン2: フェルミ漫画大学「参考：書名 著者名 さま」（「参考文献：」も対応）"""
+    if '参考' not in summary:
+        return None
+    ref_match = RE_SANKOU.search(summary)
+    if not ref_match:
+        return None
+    title_text = ref_match.group(1).strip()
+    # 著者名だけの行を除外（「さま」で終わる人名のみ、書籍タイトルなし）
+    if not title_text or RE_SAMA_ONLY.match(title_text):
+        return None
+    return [_book(title_text)]
+
+
+@register_extractor("gakushiki")
+def extract_gakushiki(summary, video_title):
+    """パターン3: 学識サロン「【amazonリンク】\\n『書名』著者 / 出版社」"""
+    if "【amazonリンク】" not in summary:
+        return None
+    m = RE_GAKUSHIKI.search(summary)
+    if not m:
+        return None
+    info = _book(m.group(1).strip())
+    if m.group(2):
+        info["author"] = m.group(2).strip()
+    if m.group(3):
+        info["publisher"] = m.group(3).strip()
+    return [info]
+
+
+@register_extractor("sam_section")
+def extract_sam_section(summary, video_title):
+    """パターン4: サムの本解説ch「【今回の参考書籍📚】」セクション"""
+    if '【今回の参考書籍' not in summary:
+        return None
+    sam_section = RE_SAM_SECTION.search(summary)
+    if not sam_section:
+        return None
+    title_line = None
+    author_line = None
+    for line in sam_section.group(1).strip().split('\n'):
+        line = line.strip()
+        if not line or line.startswith('http'):
+            continue
+        # 著者行を判定: 「〜(著)」「〜（著）」を含む行
+        if RE_AUTHOR_MARK.search(line):
+            author_line = line
+        elif not title_line:
+            # 最初の非著者行をタイトルとして取得（形態表記・先頭の「・」を除去）
+            title_line = RE_FORMAT_SUFFIX.sub('', line).strip()
+            title_line = RE_LEADING_DOT.sub('', title_line).strip()
+    if not title_line:
+        return None
+    info = _book(title_line)
+    if author_line:
+        author_match = RE_AUTHOR_BEFORE_MARK.match(author_line)
+        if author_match:
+            info["author"] = author_match.group(1).strip()
+        pub_match = RE_EDITOR_MARK.search(author_line)
+        if pub_match:
+            info["publisher"] = pub_match.group(1).strip()
+    return [info]
+
+
+@register_extractor("pivot_section")
+def extract_pivot_section(summary, video_title):
+    """パターン5: PIVOT系「＜参考書籍＞」「▼参考書籍」「▼関連書籍」「▼本映像で紹介した書籍」
+
+    セクションがあれば結果が空でも確定する（amzn.to 汎用抽出に落ちないようにする）。
+    """
+    if ('参考書籍' not in summary and '▼関連書籍' not in summary
+            and '▼本映像で紹介した書籍' not in summary):
+        return None
+    pivot_section = RE_PIVOT_SECTION.search(summary)
+    if not pivot_section:
+        return None
+    results = []
+    for line in pivot_section.group(1).strip().split('\n'):
+        line = line.strip()
+        if not line or line.startswith('http') or line.startswith('※'):
+            continue
+
+        title = None
+        author = None
+
+        # パターンA: 『タイトル』を優先（内部に「」が含まれてもOK）
+        book_match = RE_DOUBLE_BRACKET.search(line) if '『' in line else None
+        if book_match:
+            title = book_match.group(1).strip()
+            before = line[:book_match.start()].strip()
+            if before:
+                author = before
+            after = line[book_match.end():].strip()
+            if not author and after:
+                a_match = RE_AUTHOR_BEFORE_MARK.match(after)
+                if a_match:
+                    author = a_match.group(1).strip()
+
+        # パターンB: 「タイトル」＋後続テキストも含める
+        if not title and '「' in line:
+            book_match = RE_KAGI_WITH_TAIL.search(line)
+            if book_match:
+                # 「タイトル」の後ろもタイトルの一部として結合し、末尾の括弧内（出版社等）を除去
+                title = book_match.group(1).strip() + book_match.group(2).strip()
+                title = RE_TRAILING_PAREN.sub('', title).strip()
+
+        if not title:
+            continue
+        results.append(_book(title, author))
+    return results
+
+
+@register_extractor("tbs_section")
+def extract_tbs_section(summary, video_title):
+    """パターン5.6: TBS CROSS DIG「◆書籍紹介◆」（▼『タイトル』の次行が著者、その次が出版社）"""
+    if '◆書籍紹介◆' not in summary:
+        return None
+    tbs_section = RE_TBS_SECTION.search(summary)
+    if not tbs_section:
+        return None
+    results = []
+    lines = tbs_section.group(1).strip().split('\n')
+    for i, line in enumerate(lines):
+        title_match = RE_TBS_TITLE.match(line.strip())
+        if not title_match:
+            continue
+        author = None
+        publisher = None
+        if i + 1 < len(lines) and not lines[i+1].strip().startswith('http'):
+            author = lines[i+1].strip()
+        if i + 2 < len(lines) and not lines[i+2].strip().startswith('http'):
+            publisher = lines[i+2].strip()
+        results.append(_book(title_match.group(1).strip(), author, publisher))
+    return results or None
+
+
+@register_extractor("flier_section")
+def extract_flier_section(summary, video_title):
+    """パターン5.5: flier「▼紹介した作品」（①著者『タイトル』（出版社））"""
+    if '▼紹介した作品' not in summary:
+        return None
+    flier_section = RE_FLIER_SECTION.search(summary)
+    if not flier_section:
+        return None
+    results = []
+    for line in flier_section.group(1).strip().split('\n'):
+        line = line.strip()
+        if not line or line.startswith('http') or line.startswith('※'):
+            continue
+        # ①②等の番号を除去
+        line = RE_CIRCLED_NUMBER.sub('', line)
+        match = RE_FLIER_LINE.match(line)
+        if match:
+            author = match.group(1).strip() if match.group(1) else None
+            publisher = match.group(3).strip() if match.group(3) else None
+            results.append(_book(match.group(2).strip(), author, publisher))
+    return results or None
+
+
+def _amazon_link_title_candidate(lines, i, line_stripped, amazon_match):
+    """amzn.to リンク行から書籍タイトル候補を求める"""
+    # 形式A: amzn.toの前にテキストがある（同一行）
+    before_url = line_stripped[:amazon_match.start()].strip()
+    if before_url and not before_url.startswith('http'):
+        return before_url
+    # 形式B: amzn.toだけの行 → 前の行がタイトル（著者・出版社行はスキップ）
+    if line_stripped == amazon_match.group(0) and i > 0:
+        for j in range(i-1, max(i-5, -1), -1):
+            prev_line = lines[j].strip()
+            if not prev_line or prev_line.startswith('http'):
+                break
+            # 著者・出版社などのメタデータ行はスキップ（空白入りも対応: 「著　者」「監　訳」）
+            if RE_META_LINE.match(prev_line):
+                continue
+            # 括弧だけの補足行はスキップ（例: 「(日本語版)」「（完全版）」）
+            if RE_PAREN_ONLY.match(prev_line):
+                continue
+            # 著者行をスキップ（例: 「エミン・ユルマズ (著)」）
+            if RE_AUTHOR_MARK.search(prev_line) and '『' not in prev_line and '「' not in prev_line:
+                continue
+            return prev_line
+    return None
+
+
+@register_extractor("amazon_links")
+def extract_amazon_links(summary, video_title):
+    """パターン6: 七瀬アリーサ — amzn.toリンクから書籍タイトルを抽出
+
+    形式A: 「タイトル　https://amzn.to/xxx」(同一行)
+    形式B: 「タイトル」+ 次行「https://amzn.to/xxx」(別行)
+    """
+    if 'amzn.to/' not in summary:
+        return None
+    results = []
+    lines = summary.split('\n')
+    for i, line in enumerate(lines):
+        if 'amzn.to/' not in line:
+            continue
+        line_stripped = line.strip()
+        amazon_match = RE_AMAZON_SHORT.search(line_stripped)
+        if not amazon_match:
+            continue
+
+        title_candidate = _amazon_link_title_candidate(lines, i, line_stripped, amazon_match)
+        if not title_candidate:
+            continue
+
+        # NGワードチェック（data/denylists.json の amazon_link_ng_words）
+        if denylist.first_match(title_candidate, "amazon_link_ng_words"):
+            continue
+
+        # クリーンアップ: 先頭の記号、「(Amazon)」等の補足、囲みの『』「」を除去
+        cleaned = RE_AMAZON_LEADING.sub('', title_candidate).strip()
+        cleaned = RE_AMAZON_LABEL_SUFFIX.sub('', cleaned).strip()
+        if cleaned.startswith('『') and cleaned.endswith('』'):
+            cleaned = cleaned[1:-1]
+        if cleaned.startswith('「') and cleaned.endswith('」'):
+            cleaned = cleaned[1:-1]
+
+        if cleaned and len(cleaned) > 2:
+            results.append(_book(cleaned))
+    return results or None
+
+
+@register_extractor("abataro")
+def extract_abataro(summary, video_title):
+    """アバタロー「書籍の購入」セクション（先頭の1冊は自著宣伝の可能性があるため _is_first を付ける）"""
+    if '書籍の購入' not in summary:
+        return None
+    abataro_section = RE_ABATARO_SECTION.search(summary)
+    if not abataro_section:
+        return None
+    results = []
+    seen_titles = set()
+    is_first = True
+    for line in abataro_section.group(1).strip().split('\n'):
+        line = line.strip()
+        # 非書籍行をスキップ
+        if not line or line.startswith('http') or 'エッセンシャル版' in line or '簡易版' in line:
+            continue
+        # セクションヘッダー・サービス宣伝・ハッシュタグ・絵文字付き動画タイトルをスキップ
+        if (line.startswith('【') or line.startswith('#') or
+                line.startswith('📗') or line.startswith('📕') or
+                any(word in line for word in ABATARO_SKIP_WORDS)):
+            continue
+        line = RE_BULLET.sub('', line)
+        book_match = RE_ABATARO_LINE.match(line)
+        if book_match:
+            title = book_match.group(1).strip()
+            if title not in seen_titles:
+                seen_titles.add(title)
+                info = _book(
+                    title,
+                    book_match.group(2).strip() if book_match.group(2) else None,
+                    book_match.group(3).strip() if book_match.group(3) else None,
+                )
+                info["_is_first"] = is_first
+                results.append(info)
+            is_first = False
+    return results or None
+
+
+# channels.json で指定がない場合に試す順序（先に確定したものが優先）
+DEFAULT_EXTRACTOR_ORDER = (
+    "title_bracket",
+    "labeled_fields",
+    "sankou",
+    "gakushiki",
+    "sam_section",
+    "pivot_section",
+    "tbs_section",
+    "flier_section",
+    "amazon_links",
+    "abataro",
+)
+
+
+def resolve_extractors(names=None):
+    """エクストラクタ名のリストを関数のタプルに変換（Noneなら既定の順序）
+
+    Raises:
+        ValueError: 未登録の名前が含まれている場合
+    """
+    names = DEFAULT_EXTRACTOR_ORDER if names is None else names
+    unknown = [n for n in names if n not in EXTRACTORS]
+    if unknown:
+        raise ValueError(f"未登録のエクストラクタ: {', '.join(unknown)} "
+                         f"(利用可能: {', '.join(EXTRACTORS)})")
+    return tuple(EXTRACTORS[n] for n in names)
+
+
+_DEFAULT_CHAIN = resolve_extractors()
+
+
+def extract_book_info_list(summary, video_title=None, extractors=None):
+    """概要欄・動画タイトルから書籍情報を抽出
+
+    Args:
+        summary: 概要欄
+        video_title: 動画タイトル
+        extractors: resolve_extractors() の結果。Noneなら既定の全エクストラクタ。
+    """
+    for extractor in extractors or _DEFAULT_CHAIN:
+        results = extractor(summary, video_title)
+        if results is not None:
+            return results
+    return []
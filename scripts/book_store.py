@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+"""書籍データの保存先（SQLite）と JSON への書き出し
+
+書籍・動画・書籍と動画の対応・書誌情報の取得履歴を data/books.sqlite3 に保存する。
+各スクリプトは books.json 全体を読み書きせず、必要な書籍だけを読み、変更した行だけを更新する。
+export() は data/ と frontend/public/data/ に catalog.json・ranking_table.json・ranking_windows.json・
+books/（書籍ごとの詳細）・rankings/（一覧ページ用のページ分割ランキング）を、
+data/ にはスクリプト向けの books.json・rankings*.json を、
+frontend/public/data/ には内容のハッシュ付きの名前のコピー（hashed/）と manifest.json も1回で書き出す。
+これらは生成物なので直接編集しない（内容が変わったファイルだけを書き直す）。
+
+テーブル:
+    books        書籍1件1行。position は books.json 上の並び順
+    videos       動画1件1行（video_id がキー。複数の書籍で紹介されても1行）
+    book_videos  書籍ごとの紹介動画（seq は書籍内の並び順）
+    enrichment   書誌情報の取得元と取得した値（book_id, source ごとに最新の1件）
+    video_stats  動画の再生数・いいね数を最後に取得した日時（統計更新の対象を選ぶのに使う）
+    book_series  書籍ごとの期間別ランキングの時系列（ranking_windows.BookSeries）と、
+                 それに含めた動画・保存した日時（export で増えた動画だけを追記する）
+
+ストアが空で data/books.json がある場合、open_store() は books.json を取り込んでから返す。
+
+使用例:
+    import book_store
+    store = book_store.open_store()
+    for book in store.books_without_isbn():
+        store.update_book(book["id"], {"isbn": "9784478025819"})
+    store.export()
+    store.close()
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+
+from artifact_writer import ArtifactWriter, dump_json
+from ranking_windows import BookSeries, build_windows
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+FRONTEND_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "frontend", "public", "data")
+DEFAULT_STORE_FILE = os.path.join(DATA_DIR, "books.sqlite3")
+BOOKS_FILE = os.path.join(DATA_DIR, "books.json")
+CATALOG_FILE = os.path.join(DATA_DIR, "catalog.json")
+
+# export() の書き出し先
+EXPORT_DIRS = (DATA_DIR, FRONTEND_DATA_DIR)
+# 書籍ごとの詳細ファイルを置くディレクトリ名（<書き出し先>/books/<id>.json と books/index.json）
+SHARD_DIR = "books"
+SHARD_INDEX = "index.json"
+# 一覧ページ用のページ分割ランキング（<書き出し先>/rankings/<並べ替え>/page-0001.json と rankings/manifest.json）
+RANKING_PAGE_DIR = "rankings"
+RANKING_PAGE_MANIFEST = "manifest.json"
+# 1ページの件数（フロントエンドの一覧の1ページ分と同じにする）
+RANKING_PAGE_SIZE = 20
+# ブラウザ向けの書き出し先（EXPORT_DIRS の2番目以降）で、内容のハッシュ付きの名前でも書き出すファイル
+HASHED_FILES = ("catalog.json", "ranking_table.json", "ranking_windows.json")
+# ハッシュ付きのファイルを置くディレクトリ名と、元の名前からの対応表
+HASHED_DIR = "hashed"
+DATA_MANIFEST = "manifest.json"
+
+# books.json の書籍の基本フィールド（この順で出力し、"videos" はこの後ろに置く）
+BOOK_FIELDS = ("id", "title", "author", "publisher", "amazon_url", "count", "total_views", "total_likes")
+# 書誌情報APIなどで後から付くフィールド（値がある場合だけ出力）
+ENRICHMENT_FIELDS = ("isbn", "asin", "image_url", "publication_date", "openbd_title")
+# 紹介動画のフィールド
+VIDEO_FIELDS = ("video_id", "video_title", "channel", "link", "published", "view_count", "like_count")
+
+# ランキングの並べ替えキー（ranking_table.json の "orders" に並び順を出力する）
+RANKING_KEYS = ("count", "total_views", "total_likes")
+# 以前の形式のランキングファイル名と並べ替えのキー（スクリプト向けに data/ にだけ書き出す）
+RANKING_FILES = (
+    ("rankings.json", "count"),
+    ("rankings_views.json", "total_views"),
+    ("rankings_likes.json", "total_likes"),
+)
+# ページ分割ランキングのディレクトリ名（フロントエンドの並べ替えの名前）と並べ替えのキー
+RANKING_PAGE_SORTS = (
+    ("point", "point"),
+    ("count", "count"),
+    ("views", "total_views"),
+    ("likes", "total_likes"),
+)
+# manifest.json の紹介年に含める最初の年
+FIRST_YEAR = 2015
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id               TEXT PRIMARY KEY,
+    position         INTEGER NOT NULL,
+    title            TEXT NOT NULL,
+    author           TEXT,
+    publisher        TEXT,
+    amazon_url       TEXT,
+    count            INTEGER NOT NULL DEFAULT 0,
+    total_views      INTEGER NOT NULL DEFAULT 0,
+    total_likes      INTEGER NOT NULL DEFAULT 0,
+    isbn             TEXT,
+    asin             TEXT,
+    image_url        TEXT,
+    publication_date TEXT,
+    openbd_title     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_books_position ON books (position);
+CREATE INDEX IF NOT EXISTS idx_books_isbn ON books (isbn);
+CREATE TABLE IF NOT EXISTS videos (
+    video_id    TEXT PRIMARY KEY,
+    video_title TEXT,
+    channel     TEXT,
+    link        TEXT,
+    published   TEXT,
+    view_count  INTEGER NOT NULL DEFAULT 0,
+    like_count  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_videos_published ON videos (published);
+CREATE TABLE IF NOT EXISTS book_videos (
+    book_id  TEXT NOT NULL,
+    seq      INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    PRIMARY KEY (book_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_book_videos_video ON book_videos (video_id);
+CREATE TABLE IF NOT EXISTS enrichment (
+    book_id    TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    fields     TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (book_id, source)
+);
+CREATE TABLE IF NOT EXISTS video_stats (
+    video_id     TEXT PRIMARY KEY,
+    refreshed_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS book_series (
+    book_id   TEXT PRIMARY KEY,
+    video_ids TEXT NOT NULL,
+    series    TEXT NOT NULL,
+    built_at  TEXT NOT NULL
+);
+"""
+
+_BOOK_COLUMNS = BOOK_FIELDS + ENRICHMENT_FIELDS
+# update_book で変更できる列
+_UPDATABLE = frozenset(_BOOK_COLUMNS) - {"id"}
+
+# SQLiteのプレースホルダ上限に余裕を持たせたIN句の分割サイズ
+_IN_CHUNK = 500
+
+
+def make_ranking_entry(book):
+    """ランキング用の軽量データを生成（出版社は値がある場合だけ）"""
+    entry = {
+        "id": book["id"],
+        "title": book["title"],
+        "author": book.get("author"),
+        "count": book["count"],
+        "total_views": book["total_views"],
+        "total_likes": book["total_likes"],
+        "amazon_url": book["amazon_url"],
+        "image_url": book.get("image_url"),
+    }
+    if book.get("publisher"):
+        entry["publisher"] = book["publisher"]
+    return entry
+
+
+def book_point(book):
+    """ポイントと紹介チャンネル数を返す（チャンネルごとに1本目5pt + 同チャンネル2本目以降1pt）"""
+    per_channel = Counter(v["channel"] for v in book["videos"] if v.get("channel"))
+    return sum(4 + n for n in per_channel.values()), len(per_channel)
+
+
+def make_page_entry(book):
+    """ページ分割ランキングの1件（一覧に表示するフィールドだけ）"""
+    point, channels = book_point(book)
+    entry = {
+        "id": book["id"],
+        "title": book["title"],
+        "author": book.get("author"),
+        "count": book["count"],
+        "total_views": book["total_views"],
+        "total_likes": book["total_likes"],
+        "point": point,
+        "channels": channels,
+        "amazon_url": book["amazon_url"],
+    }
+    for key in ("publisher", "image_url"):
+        if book.get(key):
+            entry[key] = book[key]
+    return entry
+
+
+def ranking_orders(books, keys=RANKING_KEYS):
+    """キーごとに、books を降順に並べたときのインデックスの配列を返す（同点は元の順）"""
+    orders = {}
+    for key in keys:
+        values = [b[key] for b in books]
+        orders[key] = sorted(range(len(values)), key=values.__getitem__, reverse=True)
+    return orders
+
+
+def assemble_books(books, videos):
+    """"video_ids" で動画を参照する書籍を、"videos" に動画を埋め込んだ books.json の形に戻す
+
+    Args:
+        books: load_catalog() または catalog.json の書籍のリスト
+        videos: {video_id: 動画（video_id 以外のフィールド）}
+    """
+    assembled = []
+    for book in books:
+        full = {key: book.get(key) for key in BOOK_FIELDS}
+        full["videos"] = [{"video_id": vid, **videos[vid]} for vid in book.get("video_ids", [])]
+        for key in ENRICHMENT_FIELDS:
+            if book.get(key) is not None:
+                full[key] = book[key]
+        assembled.append(full)
+    return assembled
+
+
+def load_catalog_file(path=CATALOG_FILE):
+    """catalog.json を読み込み、books.json と同じ形の書籍のリストを返す"""
+    with open(path, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    return assemble_books(catalog["books"], catalog["videos"])
+
+
+def _chunks(keys, everything=False):
+    """IN句のプレースホルダ文字列と値の組を返す（everything なら絞り込まない1組だけ）"""
+    if everything:
+        return [("", ())]
+    return [(",".join("?" * len(keys[i:i + _IN_CHUNK])), keys[i:i + _IN_CHUNK])
+            for i in range(0, len(keys), _IN_CHUNK)]
+
+
+class BookStore:
+    """書籍データのSQLiteストア（スレッド間で共有可能）"""
+
+    def __init__(self, path=DEFAULT_STORE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    # -------------------------------------------------------------------------
+    # 読み込み
+    # -------------------------------------------------------------------------
+
+    def load_books(self, with_videos=True, where=None, params=()):
+        """書籍を books.json と同じ形の dict のリストで返す（position 順）
+
+        Args:
+            with_videos: False なら "videos" を含めない（紹介動画を読まない分速い）
+            where: 絞り込みのSQL条件（books の列を参照）
+            params: where のプレースホルダに渡す値
+        """
+        if with_videos:
+            return assemble_books(*self.load_catalog(where, params))
+        with self._lock:
+            return self._select_books(where, params)
+
+    def load_catalog(self, where=None, params=()):
+        """書籍と動画を正規化した形で返す
+
+        Returns:
+            (books, videos): books は紹介動画を "video_ids" で参照する書籍のリスト（position 順）、
+            videos は {video_id: 動画（video_id 以外のフィールド）}（books が参照する動画のみ、初出順）
+        """
+        with self._lock:
+            books = self._select_books(where, params)
+            video_ids = self._video_ids_of([b["id"] for b in books], everything=where is None)
+            for book in books:
+                book["video_ids"] = video_ids.get(book["id"], [])
+            referenced = list(dict.fromkeys(vid for b in books for vid in b["video_ids"]))
+            found = self._select_videos(referenced, everything=where is None)
+        videos = {vid: found[vid] for vid in referenced if vid in found}
+        return books, videos
+
+    def books_without_isbn(self):
+        """ISBN未取得の書籍（紹介動画なし）"""
+        return self.load_books(with_videos=False, where="isbn IS NULL OR isbn = ''")
+
+    def books_with_isbn(self):
+        """ISBN取得済みの書籍（紹介動画なし）"""
+        return self.load_books(with_videos=False, where="isbn IS NOT NULL AND isbn != ''")
+
+    def books_sharing_isbn(self):
+        """他の書籍と同じISBNを持つ書籍を load_catalog() と同じ (books, videos) で返す"""
+        return self.load_catalog(where=(
+            "isbn IN (SELECT isbn FROM books WHERE isbn IS NOT NULL AND isbn != '' "
+            "GROUP BY isbn HAVING COUNT(*) > 1)"
+        ))
+
+    def stats_refreshed_at(self, video_ids):
+        """統計を最後に取得した日時を {video_id: ISO文字列} で返す（記録の無い動画は含まない）"""
+        found = {}
+        with self._lock:
+            for chunk, args in _chunks(list(video_ids)):
+                sql = f"SELECT video_id, refreshed_at FROM video_stats WHERE video_id IN ({chunk})"
+                found.update(self._conn.execute(sql, args))
+        return found
+
+    def book_ids(self):
+        """全書籍のIDを position 順で返す"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM books ORDER BY position")]
+
+    # 以下の _select_* は呼び出し側で self._lock を保持していること
+
+    def _select_books(self, where, params):
+        sql = f"SELECT {', '.join(_BOOK_COLUMNS)} FROM books"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY position"
+        books = []
+        for row in self._conn.execute(sql, params):
+            book = dict(zip(BOOK_FIELDS, row[:len(BOOK_FIELDS)]))
+            for key, value in zip(ENRICHMENT_FIELDS, row[len(BOOK_FIELDS):]):
+                if value is not None:
+                    book[key] = value
+            books.append(book)
+        return books
+
+    def _video_ids_of(self, book_ids, everything=False):
+        """{book_id: [video_id, ...]}（書籍内の並び順）"""
+        sql = "SELECT book_id, video_id FROM book_videos"
+        video_ids = {}
+        for chunk, args in _chunks(book_ids, everything):
+            query = sql + (f" WHERE book_id IN ({chunk})" if chunk else "") + " ORDER BY book_id, seq"
+            for book_id, vid in self._conn.execute(query, args):
+                video_ids.setdefault(book_id, []).append(vid)
+        return video_ids
+
+    def _select_videos(self, video_ids, everything=False):
+        """{video_id: 動画（video_id 以外のフィールド）}"""
+        sql = f"SELECT {', '.join(VIDEO_FIELDS)} FROM videos"
+        videos = {}
+        for chunk, args in _chunks(video_ids, everything):
+            query = sql + (f" WHERE video_id IN ({chunk})" if chunk else "")
+            for row in self._conn.execute(query, args):
+                videos[row[0]] = dict(zip(VIDEO_FIELDS[1:], row[1:]))
+        return videos
+
+    # -------------------------------------------------------------------------
+    # 書き込み
+    # -------------------------------------------------------------------------
+
+    def replace_books(self, books):
+        """全書籍を books（この順が position になる）で置き換える
+
+        books に無い書籍の書誌情報の取得履歴も同じトランザクションで削除する。
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM book_videos")
+            self._conn.execute("DELETE FROM books")
+            for position, book in enumerate(books):
+                self._insert_book(book, position)
+            self._conn.execute("DELETE FROM enrichment WHERE book_id NOT IN (SELECT id FROM books)")
+            self._prune_videos()
+
+    def upsert_books(self, books):
+        """書籍を追加・置き換え（既存の書籍は position を保ち、紹介動画も置き換える）"""
+        with self._lock, self._conn:
+            next_position = self._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM books").fetchone()[0]
+            for book in books:
+                row = self._conn.execute(
+                    "SELECT position FROM books WHERE id = ?", (book["id"],)).fetchone()
+                if row:
+                    position = row[0]
+                else:
+                    position = next_position
+                    next_position += 1
+                self._conn.execute("DELETE FROM book_videos WHERE book_id = ?", (book["id"],))
+                self._insert_book(book, position)
+            self._prune_videos()
+
+    def update_book(self, book_id, fields):
+        """書籍の指定フィールドだけを更新（紹介動画は変更しない）"""
+        self.update_books({book_id: fields})
+
+    def update_books(self, updates):
+        """複数の書籍のフィールドを1トランザクションで更新
+
+        Args:
+            updates: {book_id: {フィールド: 値}}
+        """
+        with self._lock, self._conn:
+            for book_id, fields in updates.items():
+                unknown = set(fields) - _UPDATABLE
+                if unknown:
+                    raise KeyError(f"更新できないフィールド: {', '.join(sorted(unknown))}")
+                if not fields:
+                    continue
+                assignments = ", ".join(f"{key} = ?" for key in fields)
+                self._conn.execute(f"UPDATE books SET {assignments} WHERE id = ?",
+                                   (*fields.values(), book_id))
+
+    def delete_books(self, book_ids):
+        """書籍と、どの書籍からも参照されなくなった動画を削除し、削除件数を返す"""
+        book_ids = list(book_ids)
+        deleted = 0
+        with self._lock, self._conn:
+            for i in range(0, len(book_ids), _IN_CHUNK):
+                chunk = book_ids[i:i + _IN_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                self._conn.execute(f"DELETE FROM book_videos WHERE book_id IN ({marks})", chunk)
+                self._conn.execute(f"DELETE FROM enrichment WHERE book_id IN ({marks})", chunk)
+                deleted += self._conn.execute(
+                    f"DELETE FROM books WHERE id IN ({marks})", chunk).rowcount
+            self._prune_videos()
+        return deleted
+
+    def record_enrichment(self, book_id, source, fields):
+        """書誌情報の取得結果を記録し、書籍にも反映する
+
+        Args:
+            source: 取得元（"openbd", "google_books" など）
+            fields: 書籍に反映するフィールド
+        """
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.update_book(book_id, fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO enrichment (book_id, source, fields, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (book_id, source, json.dumps(fields, ensure_ascii=False), now),
+            )
+
+    def record_stats_refresh(self, video_ids, refreshed_at=None):
+        """video_ids の統計を取得した日時を記録する（省略時は現在時刻）"""
+        refreshed_at = refreshed_at or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO video_stats (video_id, refreshed_at) VALUES (?, ?)",
+                [(vid, refreshed_at) for vid in video_ids],
+            )
+
+    def _insert_book(self, book, position):
+        # 呼び出し側で self._lock を保持し、トランザクション内であること
+        values = [book.get(key) for key in _BOOK_COLUMNS]
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO books (position, {', '.join(_BOOK_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' * len(_BOOK_COLUMNS))})",
+            (position, *values),
+        )
+        if "video_ids" in book:
+            # 正規化した形の書籍は登録済みの動画を参照するだけ
+            video_ids = book["video_ids"]
+        else:
+            videos = book.get("videos", [])
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO videos ({', '.join(VIDEO_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(VIDEO_FIELDS))})",
+                [tuple(v.get(key) for key in VIDEO_FIELDS) for v in videos],
+            )
+            video_ids = [v["video_id"] for v in videos]
+        self._conn.executemany(
+            "INSERT INTO book_videos (book_id, seq, video_id) VALUES (?, ?, ?)",
+            [(book["id"], seq, vid) for seq, vid in enumerate(video_ids)],
+        )
+
+    def _prune_videos(self):
+        # 呼び出し側で self._lock を保持し、トランザクション内であること
+        self._conn.execute(
+            "DELETE FROM videos WHERE video_id NOT IN (SELECT video_id FROM book_videos)")
+        self._conn.execute(
+            "DELETE FROM video_stats WHERE video_id NOT IN (SELECT video_id FROM videos)")
+
+    # -------------------------------------------------------------------------
+    # JSON への書き出し
+    # -------------------------------------------------------------------------
+
+    def update_series(self, books, videos):
+        """書籍ごとの期間別ランキングの時系列を保存済みのものから更新し、books と同じ順で返す
+
+        保存済みの時系列には、前回から増えた動画だけを追記する（BookSeries.extend）。
+        紹介動画が外れた書籍と、保存した日時以降に統計を取得し直した動画（video_stats）を含む
+        書籍は作り直す。変わった書籍の行だけを書き直し、無くなった書籍の行は消す。
+
+        Args:
+            books: load_catalog() の書籍（"video_ids" で動画を参照する）
+            videos: load_catalog() の {video_id: 動画}
+
+        Returns:
+            (時系列のリスト, {"reused": 件数, "appended": 件数, "rebuilt": 件数})
+        """
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self._lock:
+            stored = {book_id: (json.loads(video_ids), series, built_at)
+                      for book_id, video_ids, series, built_at in self._conn.execute(
+                          "SELECT book_id, video_ids, series, built_at FROM book_series")}
+            oldest = min((built_at for _, _, built_at in stored.values()), default=now)
+            refreshed = dict(self._conn.execute(
+                "SELECT video_id, refreshed_at FROM video_stats WHERE refreshed_at >= ?", (oldest,)))
+
+        result = []
+        changed = []
+        counts = Counter()
+        for book in books:
+            video_ids = book["video_ids"]
+            previous = stored.get(book["id"])
+            if previous:
+                seen, state, built_at = previous
+                current = set(video_ids)
+                # 統計の取得は秒単位なので、保存と同じ秒に取得した動画も作り直しの対象にする
+                stale = any(vid not in current or refreshed.get(vid, "") >= built_at for vid in seen)
+            if not previous or stale:
+                series = BookSeries({"video_id": vid, **videos[vid]} for vid in video_ids)
+                counts["rebuilt"] += 1
+                changed.append((book["id"], video_ids, series))
+            else:
+                series = BookSeries.from_state(json.loads(state))
+                seen = set(seen)
+                added = [vid for vid in video_ids if vid not in seen]
+                if added:
+                    series.extend(videos[vid] for vid in added)
+                    counts["appended"] += 1
+                    changed.append((book["id"], video_ids, series))
+                else:
+                    counts["reused"] += 1
+            result.append(series)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO book_series (book_id, video_ids, series, built_at) VALUES (?, ?, ?, ?)",
+                [(book_id, json.dumps(video_ids), json.dumps(series.to_state(), ensure_ascii=False), now)
+                 for book_id, video_ids, series in changed])
+            self._conn.execute("DELETE FROM book_series WHERE book_id NOT IN (SELECT id FROM books)")
+        return result, {key: counts[key] for key in ("reused", "appended", "rebuilt")}
+
+    def import_json(self, path=BOOKS_FILE):
+        """books.json の内容でストアを置き換え、書籍数を返す
+
+        動画の統計も置き換わるので、保存済みの期間別ランキングの時系列は捨てる。
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            books = json.load(f)
+        self.replace_books(books)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM book_series")
+        return len(books)
+
+    def export(self, dirs=EXPORT_DIRS):
+        """catalog.json・ranking_table.json・books.json・rankings*.json を1回の読み込みで生成して書き出す
+
+        catalog.json は動画を1件ずつ video_id をキーに持ち、書籍は "video_ids" で参照する
+        （{"videos": {video_id: 動画}, "books": [書籍]}。assemble_books() で books.json の形に戻せる）。
+        ranking_table.json はランキング用データを書籍順に1回だけ持ち、キーごとの並び順を
+        インデックスの配列で持つ（{"entries": [...], "orders": {"count": [3, 0, ...], ...}}）。
+        books/<id>.json は書籍1件分（紹介動画をすべて含む）、books/index.json はその一覧と
+        内容のハッシュ（[{"id", "title", "author", "count", "hash"}, ...]）。
+        ブラウザ向けの書き出し先（dirs の2番目以降）には HASHED_FILES を hashed/ に
+        内容のハッシュ付きの名前（catalog.<ハッシュ>.json）でも書き出し、
+        元の名前との対応を manifest.json に書く。
+        ranking_windows.json は直近7日・30日・365日と暦年ごとの期間別ランキング
+        （ranking_table.json の entries の添字と期間内の集計。形は ranking_windows を参照）。
+        その元の時系列は update_series() で保存済みのものに増えた動画だけを足して作る。
+        rankings/<並べ替え>/page-0001.json は一覧の1ページ分（RANKING_PAGE_SIZE 件、
+        一覧に表示するフィールドだけ）、rankings/manifest.json は件数とページ数などの集計。
+        動画を埋め込んだ books.json と以前の形式の rankings*.json はスクリプト向けに
+        dirs の先頭にだけ書き出す。
+        書籍は position 順、ランキングは各キーの降順（同点は position 順）。
+        内容が変わっていないファイルは書き直さない。
+        """
+        catalog_books, videos = self.load_catalog()
+        books = assemble_books(catalog_books, videos)
+        entries = [make_ranking_entry(b) for b in books]
+        orders = ranking_orders(books)
+        series, series_counts = self.update_series(catalog_books, videos)
+        print("期間別ランキングの時系列: " + " / ".join(
+            f"{label}{series_counts[key]}件" for key, label in
+            (("reused", "そのまま"), ("appended", "追記"), ("rebuilt", "作り直し"))))
+        writer = ArtifactWriter()
+        # ブラウザが読むファイルは改行・インデントなしで書き出す
+        texts = {
+            "catalog.json": dump_json({"videos": videos, "books": catalog_books}, compact=True),
+            "ranking_table.json": dump_json({"entries": entries, "orders": orders}, compact=True),
+            "ranking_windows.json": dump_json(build_windows(books, series=series), compact=True),
+        }
+        for name, text in texts.items():
+            writer.write_text(text, *[os.path.join(d, name) for d in dirs])
+        _export_hashed({name: texts[name] for name in HASHED_FILES}, dirs[1:], writer)
+        writer.write_json(books, os.path.join(dirs[0], "books.json"))
+        for name, key in RANKING_FILES:
+            writer.write_json([entries[i] for i in orders[key]], os.path.join(dirs[0], name))
+        _export_shards(books, [os.path.join(d, SHARD_DIR) for d in dirs], writer)
+        _export_ranking_pages(books, [os.path.join(d, RANKING_PAGE_DIR) for d in dirs], writer)
+        writer.print_summary()
+        return books
+
+
+def _manifest_files(manifest_path):
+    """manifest.json が参照している hashed/ 内のファイル名"""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            files = json.load(f)["files"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        return set()
+    return {os.path.basename(entry["file"]) for entry in files.values()}
+
+
+def _export_hashed(texts, data_dirs, writer):
+    """texts（{元の名前: 内容}）をハッシュ付きの名前で hashed/ に書き出し、対応表を manifest.json に書く
+
+    manifest.json は {"files": {"catalog.json": {"file": "hashed/catalog.<ハッシュ>.json", "size"}}}
+    の形（パスは書き出し先からの相対）。
+    古い manifest.json を読み込み済みのブラウザのために、前回の manifest が参照していた
+    ファイルは1世代だけ残し、それより古いものを消す。
+    """
+    for data_dir in data_dirs:
+        hashed_dir = os.path.join(data_dir, HASHED_DIR)
+        manifest_path = os.path.join(data_dir, DATA_MANIFEST)
+        keep = _manifest_files(manifest_path)
+        files = {}
+        for name, text in texts.items():
+            entry = writer.write_hashed(text, hashed_dir, name)
+            keep.add(entry["file"])
+            entry["file"] = f"{HASHED_DIR}/{entry['file']}"
+            files[name] = entry
+        for file_name in os.listdir(hashed_dir):
+            if file_name not in keep:
+                writer.remove(os.path.join(hashed_dir, file_name))
+        writer.write_json({"files": files}, manifest_path, compact=True)
+
+
+def _load_shard_hashes(index_path):
+    """前回書き出した books/index.json から {book_id: hash} を返す"""
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return {entry["id"]: entry["hash"] for entry in json.load(f)}
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        return {}
+
+
+def _export_shards(books, shard_dirs, writer):
+    """書籍ごとの詳細ファイルと一覧（index.json）を書き出し、無くなった書籍のファイルを消す
+
+    前回の index.json とハッシュが同じ書籍は、既存ファイルを読まずにそのままにする。
+    """
+    previous = _load_shard_hashes(os.path.join(shard_dirs[0], SHARD_INDEX))
+    index = []
+    for book in books:
+        text = json.dumps(book, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        paths = [os.path.join(d, f"{book['id']}.json") for d in shard_dirs]
+        if previous.get(book["id"]) == digest and all(os.path.exists(p) for p in paths):
+            writer.unchanged.extend(paths)
+        else:
+            writer.write_text(text, *paths)
+        index.append({"id": book["id"], "title": book["title"], "author": book.get("author"),
+                      "count": book["count"], "hash": digest})
+
+    keep = {f"{book['id']}.json" for book in books} | {SHARD_INDEX}
+    for shard_dir in shard_dirs:
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in os.listdir(shard_dir):
+            if name.endswith(".json") and name not in keep:
+                writer.remove(os.path.join(shard_dir, name))
+    writer.write_json(index, *[os.path.join(d, SHARD_INDEX) for d in shard_dirs], compact=True)
+
+
+def _ranking_manifest(books, pages):
+    """rankings/manifest.json の内容（書籍数・動画数・ページ数と、絞り込みの選択肢）"""
+    years = set()
+    channels = Counter()
+    last_year = datetime.now(timezone.utc).year
+    for book in books:
+        for video in book["videos"]:
+            if video.get("channel"):
+                channels[video["channel"]] += 1
+            year = int(video["published"][:4]) if video.get("published") else None
+            if year and FIRST_YEAR <= year <= last_year:
+                years.add(year)
+    return {
+        "page_size": RANKING_PAGE_SIZE,
+        "pages": pages,
+        "books": len(books),
+        "videos": sum(len(book["videos"]) for book in books),
+        "sorts": [name for name, _ in RANKING_PAGE_SORTS],
+        "years": sorted(years, reverse=True),
+        "channels": [{"name": name, "count": n} for name, n in channels.most_common()],
+    }
+
+
+def _export_ranking_pages(books, page_dirs, writer):
+    """並べ替えごとに一覧を RANKING_PAGE_SIZE 件ずつのページに分けて書き出す
+
+    ページの境界は件数だけで決まるので、順位が動いた範囲のページだけが書き直される。
+    書籍が減って不要になったページは消す。
+    """
+    entries = [make_page_entry(b) for b in books]
+    orders = ranking_orders(entries, [key for _, key in RANKING_PAGE_SORTS])
+    pages = -(-len(entries) // RANKING_PAGE_SIZE)
+    for name, key in RANKING_PAGE_SORTS:
+        sort_dirs = [os.path.join(d, name) for d in page_dirs]
+        order = orders[key]
+        for page in range(pages):
+            start = page * RANKING_PAGE_SIZE
+            writer.write_json([entries[i] for i in order[start:start + RANKING_PAGE_SIZE]],
+                              *[os.path.join(d, _page_file(page + 1)) for d in sort_dirs],
+                              compact=True)
+        keep = {_page_file(page + 1) for page in range(pages)}
+        for sort_dir in sort_dirs:
+            if not os.path.isdir(sort_dir):
+                continue
+            for file_name in os.listdir(sort_dir):
+                if file_name.startswith("page-") and file_name not in keep:
+                    writer.remove(os.path.join(sort_dir, file_name))
+    writer.write_json(_ranking_manifest(books, pages),
+                      *[os.path.join(d, RANKING_PAGE_MANIFEST) for d in page_dirs], compact=True)
+
+
+def _page_file(page):
+    return f"page-{page:04d}.json"
+
+
+def exported_paths(dirs=EXPORT_DIRS):
+    """export() が書き出すファイルのパス（書籍ごとの詳細ファイル・ランキングのページは一覧と manifest だけ）"""
+    shared = [os.path.join(d, name) for d in dirs
+              for name in ("catalog.json", "ranking_table.json", "ranking_windows.json",
+                           os.path.join(SHARD_DIR, SHARD_INDEX),
+                           os.path.join(RANKING_PAGE_DIR, RANKING_PAGE_MANIFEST))]
+    browser_only = [os.path.join(d, DATA_MANIFEST) for d in dirs[1:]]
+    scripts_only = [os.path.join(dirs[0], name)
+                    for name in ["books.json"] + [name for name, _ in RANKING_FILES]]
+    return shared + browser_only + scripts_only
+
+
+def open_store(path=DEFAULT_STORE_FILE, bootstrap_file=BOOKS_FILE):
+    """ストアを開く。空で bootstrap_file があればその内容を取り込む"""
+    store = BookStore(path)
+    if store.count() == 0 and bootstrap_file and os.path.exists(bootstrap_file):
+        imported = store.import_json(bootstrap_file)
+        print(f"{os.path.basename(bootstrap_file)} から {imported}件をストアに取り込みました")
+    return store
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""タイトル・著者・出版社の検索用の転置インデックス（文字バイグラム）を書き出す
+
+ブラウザで検索するたびに全書籍を読み込んで文字列を走査しないよう、export の後に
+frontend/public/data/search/ へ次のファイルを書き出す。
+
+    search/docs-<4桁>.json 文書番号 → [書籍ID, 紹介回数, 再生回数, いいね数, ポイント, 検索用テキスト]
+                       を DOCS_CHUNK_SIZE 件ずつに分けたもの（文書番号 n は docs-{n // DOCS_CHUNK_SIZE}.json）
+                       （文書番号はポイント順の順位。検索結果は番号順に並べればポイント順になる。
+                       検索用テキストは正規化したタイトル・著者・出版社を改行でつないだもの）
+    search/<16進>.json 先頭の文字ごとのシャード {バイグラム: [文書番号の差分, ...]}
+                       （ファイル名は先頭の文字のコードポイント。例: "仕事" → search/4ed5.json）
+
+タイトルは normalize_title_key、著者・出版社も同じ正規化（NFKC・記号と空白の除去・小文字化）を
+かけてから、隣り合う2文字の組（バイグラム）と各フィールドの末尾の1文字を索引語にする。
+クエリも同じように正規化して、そのバイグラムを含むシャードだけを取得し、文書番号の集合の積を取る。
+1文字のクエリはその文字のシャード全体の和になる（末尾の1文字も索引語にしてあるので漏れない）。
+バイグラムの積は候補の絞り込みなので、離れた位置や別のフィールドのバイグラムでも残る。
+最後に候補の検索用テキストで matches_search（正規化したクエリがタイトル・著者・出版社の
+どれかに部分文字列として含まれるか）を確かめ、余分な書籍を除く。検索用テキストは全書籍分を
+まとめて持たず、候補の文書番号を含むチャンクだけを取得する。
+フロントエンドの search.ts も、検索インデックスを使わない絞り込みも同じ規則で一致を判定する。
+
+使用例:
+    python scripts/build_search_index.py
+"""
+
+import os
+import unicodedata
+from collections import defaultdict
+
+import book_store
+from artifact_writer import ArtifactWriter
+from fetch_videos import normalize_title_key
+
+SEARCH_DIR = os.path.join(book_store.FRONTEND_DATA_DIR, "search")
+# docs-<4桁>.json 1ファイルあたりの文書数（フロントエンドの search.ts の DOCS_CHUNK_SIZE と合わせる）
+DOCS_CHUNK_SIZE = 256
+
+
+def docs_file(chunk):
+    """文書番号 chunk * DOCS_CHUNK_SIZE から始まるチャンクのファイル名"""
+    return f"docs-{chunk:04d}.json"
+
+
+def search_key(text):
+    """索引・クエリ共通の正規化（全角英数などを NFKC でそろえてから normalize_title_key）"""
+    return normalize_title_key(unicodedata.normalize("NFKC", text or ""))
+
+
+def search_text(title, author, publisher):
+    """docs-<4桁>.json に持たせる検索用テキスト（正規化したフィールドを改行でつなぐ）
+
+    正規化で空白は除かれるので、改行をまたいでクエリが一致することはない。
+    """
+    return "\n".join(search_key(text) for text in (title, author, publisher))
+
+
+def matches_search(key, text):
+    """正規化したクエリ key が検索用テキスト text のどれかのフィールドに含まれるか（空のクエリは一致しない）"""
+    return bool(key) and key in text
+
+
+def index_terms(key):
+    """正規化済みの文字列の索引語（バイグラムと末尾の1文字）"""
+    if not key:
+        return set()
+    return {key[i:i + 2] for i in range(len(key) - 1)} | {key[-1]}
+
+
+def shard_file(term):
+    """索引語を入れるシャードのファイル名（先頭の文字のコードポイント）"""
+    return f"{ord(term[0]):x}.json"
+
+
+def search_inputs(store):
+    """インデックスの元データ（ポイント順の [(id, title, author, publisher, count, views, likes, point)]）"""
+    books = store.load_books()
+    entries = [book_store.make_page_entry(b) for b in books]
+    order = book_store.ranking_orders(entries, ["point"])["point"]
+    return [(entries[i]["id"], books[i]["title"], books[i].get("author"), books[i].get("publisher"),
+             entries[i]["count"], entries[i]["total_views"], entries[i]["total_likes"], entries[i]["point"])
+            for i in order]
+
+
+def build_index(docs, chunk_size=DOCS_CHUNK_SIZE):
+    """search_inputs() の結果から (文書表のチャンクのリスト, {シャードのファイル名: {索引語: 差分の配列}}) を返す
+
+    チャンク i は docs_file(i) の内容（文書番号 i * chunk_size から chunk_size 件）。
+    """
+    postings = defaultdict(list)
+    for doc, (_, title, author, publisher, *_) in enumerate(docs):
+        terms = set()
+        for text in (title, author, publisher):
+            terms |= index_terms(search_key(text))
+        for term in terms:
+            postings[term].append(doc)
+
+    shards = defaultdict(dict)
+    for term in sorted(postings):
+        # 文書番号は昇順に追加しているので、差分はすべて正になる
+        numbers = postings[term]
+        shards[shard_file(term)][term] = [numbers[0]] + [b - a for a, b in zip(numbers, numbers[1:])]
+    doc_table = [[book_id, count, views, likes, point, search_text(title, author, publisher)]
+                 for book_id, title, author, publisher, count, views, likes, point in docs]
+    # 書籍が無くても先頭のチャンクは書き出す（パイプラインが出力の有無を確かめる）
+    doc_chunks = [doc_table[i:i + chunk_size] for i in range(0, len(doc_table), chunk_size)] or [[]]
+    return doc_chunks, shards
+
+
+def _decode(deltas):
+    numbers = []
+    n = 0
+    for d in deltas:
+        n += d
+        numbers.append(n)
+    return numbers
+
+
+def search(doc_chunks, shards, query, chunk_size=DOCS_CHUNK_SIZE):
+    """build_index() の結果をフロントエンドの searchBooks と同じ手順で検索し、書籍IDをポイント順で返す
+
+    doc_chunks は候補の文書番号を含むチャンクだけを（添字で）読む。
+    """
+    key = search_key(query)
+    if not key:
+        return []
+    if len(key) == 1:
+        candidates = set()
+        for deltas in shards.get(shard_file(key), {}).values():
+            candidates.update(_decode(deltas))
+    else:
+        terms = {key[i:i + 2] for i in range(len(key) - 1)}
+        candidates = set.intersection(
+            *(set(_decode(shards.get(shard_file(term), {}).get(term, []))) for term in terms))
+    rows = (doc_chunks[n // chunk_size][n % chunk_size] for n in sorted(candidates))
+    return [row[0] for row in rows if matches_search(key, row[5])]
+
+
+def write_index(doc_chunks, shards, search_dir=SEARCH_DIR, writer=None):
+    """インデックスを書き出し、使われなくなったシャード・チャンク（以前の docs.json も）を消す"""
+    writer = writer or ArtifactWriter()
+    os.makedirs(search_dir, exist_ok=True)
+    for name, terms in shards.items():
+        writer.write_json(terms, os.path.join(search_dir, name), compact=True)
+    for chunk, rows in enumerate(doc_chunks):
+        writer.write_json(rows, os.path.join(search_dir, docs_file(chunk)), compact=True)
+    written = set(shards) | {docs_file(chunk) for chunk in range(len(doc_chunks))}
+    for name in os.listdir(search_dir):
+        if name.endswith(".json") and name not in written:
+            writer.remove(os.path.join(search_dir, name))
+    return writer
+
+
+def generate_search_index(store, search_dir=SEARCH_DIR):
+    doc_chunks, shards = build_index(search_inputs(store))
+    writer = write_index(doc_chunks, shards, search_dir)
+    terms = sum(len(terms) for terms in shards.values())
+    docs = sum(len(rows) for rows in doc_chunks)
+    print(f"検索インデックス: {docs}件（{len(doc_chunks)}ファイル） / 索引語{terms}個 / シャード{len(shards)}個")
+    writer.print_summary()
+
+
+def main():
+    store = book_store.open_store()
+    generate_search_index(store)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
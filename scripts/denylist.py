@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""NGワード・YouTuber名などの除外リスト（data/denylists.json）と共有マッチャー
+
+除外リストはすべて1つの Aho-Corasick オートマトンにまとめてコンパイルし、
+書籍タイトルの妥当性チェック・amzn.to リンクの候補判定・YouTuber自著判定で共有する。
+1回の照合はテキスト長に比例するだけなので、リストの語数が増えても判定コストはほぼ変わらない。
+
+data/denylists.json の形式:
+    {
+      "<リスト名>": {
+        "description": "説明",
+        "categories": {"<分類>": ["語", ...], ...}
+      },
+      ...
+    }
+
+使用例:
+    import denylist
+    rule = denylist.first_match(title, "title_ng_words")
+    if rule:
+        print(f"除外: {rule.list_name}/{rule.category}: {rule.word}")
+
+    python scripts/denylist.py "テキスト" ...   # どのルールに一致するかを表示
+"""
+
+import json
+import os
+import sys
+from collections import deque, namedtuple
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DENYLIST_FILE = os.path.join(DATA_DIR, "denylists.json")
+
+# 一致したルール（どのリストのどの分類のどの語か）
+Rule = namedtuple("Rule", ["list_name", "category", "word"])
+
+
+class DenylistMatcher:
+    """複数の除外リストをまとめた Aho-Corasick マッチャー（構築後は読み取り専用でスレッドセーフ）"""
+
+    def __init__(self, lists):
+        """
+        Args:
+            lists: {リスト名: {分類: [語, ...]}}
+        """
+        self.list_names = list(lists)
+        self._list_bits = {name: 1 << i for i, name in enumerate(self.list_names)}
+        self._goto = [{}]      # 状態 -> {文字: 次の状態}
+        self._fail = [0]
+        self._outputs = [()]   # 状態 -> その状態で終わるルール（失敗リンク先の分も含む）
+        self._masks = [0]      # 状態 -> _outputs に含まれるリストのビット和
+        self.rule_count = 0
+
+        for list_name, categories in lists.items():
+            for category, words in categories.items():
+                for word in words:
+                    if word:
+                        self._add(word, Rule(list_name, category, word))
+        self._build()
+
+    def _add(self, word, rule):
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+                self._masks.append(0)
+            state = nxt
+        if rule not in self._outputs[state]:
+            self._outputs[state] += (rule,)
+            self._masks[state] |= self._list_bits[rule.list_name]
+            self.rule_count += 1
+
+    def _build(self):
+        """幅優先で失敗リンクを張り、出力を失敗リンク先から引き継ぐ"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._outputs[nxt] += self._outputs[self._fail[nxt]]
+                self._masks[nxt] |= self._masks[self._fail[nxt]]
+
+    def _mask(self, list_names):
+        mask = 0
+        for name in list_names:
+            if name not in self._list_bits:
+                raise KeyError(f"未定義の除外リスト: {name}")
+            mask |= self._list_bits[name]
+        return mask
+
+    def iter_matches(self, text, *list_names):
+        """text に含まれるルールを出現順に列挙（list_names 未指定なら全リスト）"""
+        if not text:
+            return
+        mask = self._mask(list_names) if list_names else -1
+        goto, fail, masks, outputs = self._goto, self._fail, self._masks, self._outputs
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if masks[state] & mask:
+                for rule in outputs[state]:
+                    if self._list_bits[rule.list_name] & mask:
+                        yield rule
+
+    def first_match(self, text, *list_names):
+        """text に含まれる最初のルールを返す（なければ None）"""
+        if not text:
+            return None
+        mask = self._mask(list_names) if list_names else -1
+        goto, fail, masks = self._goto, self._fail, self._masks
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if masks[state] & mask:
+                for rule in self._outputs[state]:
+                    if self._list_bits[rule.list_name] & mask:
+                        return rule
+        return None
+
+
+def load_denylists(path=DENYLIST_FILE):
+    """除外リストを {リスト名: {分類: [語, ...]}} で読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {name: entry["categories"] for name, entry in data.items()}
+
+
+# =============================================================================
+# 共有インスタンス
+# =============================================================================
+
+_default_matcher = DenylistMatcher(load_denylists())
+
+
+def first_match(text, *list_names):
+    """共有マッチャーで text に含まれる最初のルールを返す（なければ None）"""
+    return _default_matcher.first_match(text, *list_names)
+
+
+def iter_matches(text, *list_names):
+    """共有マッチャーで text に含まれるルールを出現順に列挙"""
+    return _default_matcher.iter_matches(text, *list_names)
+
+
+def main():
+    if len(sys.argv) < 2:
+        m = _default_matcher
+        print(f"除外リスト: {len(m.list_names)}種 / ルール{m.rule_count}件 / 状態数{len(m._goto)}")
+        for name, categories in load_denylists().items():
+            print(f"  {name}: {sum(len(w) for w in categories.values())}語")
+        return
+    for text in sys.argv[1:]:
+        rules = list(iter_matches(text))
+        print(text if rules else f"{text}: 一致なし")
+        for rule in rules:
+            print(f"  {rule.list_name}/{rule.category}: {rule.word}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,56 @@
 #!/usr/bin/env python3
 """openBD + Google Books API で書籍情報（画像・著者・出版社・出版日）を取得するスクリプト"""
 
+import argparse
 import csv
 import json
 import os
 import sys
 import time
+import urllib.error
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import book_store
+import http_client
+import lookup_cache
+from openbd import fetch_openbd, fetch_openbd_bulk
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
-BOOKS_FILE = os.path.join(DATA_DIR, "books.json")
 CSV_FILE = os.path.join(DATA_DIR, "books_no_isbn_edit.csv")
+# Google Books の停止などで問い合わせを見送った書籍（次回の実行で先に処理する）
+DEFERRED_FILE = os.path.join(DATA_DIR, "enrichment_deferred.json")
 
 GOOGLE_BOOKS_API = "https://www.googleapis.com/books/v1/volumes"
-OPENBD_API = "https://api.openbd.jp/v1/get"
+NDL_OPENSEARCH_API = "https://ndlsearch.ndl.go.jp/api/opensearch"
+
+NDL_HOST = "ndlsearch.ndl.go.jp"
+GOOGLE_BOOKS_HOST = "www.googleapis.com"
+OPENBD_HOST = "api.openbd.jp"
+
+# ホストごとのレート制限 (リクエスト/秒, 連続で許すリクエスト数)
+# Google Books は 100リクエスト/100秒/ユーザーが上限。NDL・openBD は明示の上限がないため控えめにする
+HOST_RATE_LIMITS = {
+    NDL_HOST: (2.0, 2),
+    GOOGLE_BOOKS_HOST: (1.0, 1),
+    OPENBD_HOST: (2.0, 2),
+}
+DEFAULT_WORKERS = 4
+
+# Google Books が 429/403 をこの回数続けて返したら、一定時間（Retry-After があればその秒数）呼ばない
+GOOGLE_BREAKER_THRESHOLD = 3
+GOOGLE_BREAKER_COOLDOWN = 15 * 60
+google_books_breaker = http_client.CircuitBreaker(
+    "Google Books API", threshold=GOOGLE_BREAKER_THRESHOLD, cooldown=GOOGLE_BREAKER_COOLDOWN)
+
+
+class LookupDeferred(Exception):
+    """レート制限・クォータ切れで今回は問い合わせできなかった（次回優先して再検索する）"""
+
+# extract_google_books_details が参照するフィールドのみ
+GOOGLE_BOOKS_FIELDS = (
+    "totalItems,items/volumeInfo(imageLinks,authors,publisher,publishedDate,industryIdentifiers)"
+)
 
 AMAZON_ASSOCIATE_TAG = "miton31003"
 AMAZON_TRACKING_ID = "business-book-ranking02-22"
@@ -51,24 +87,17 @@ if GOOGLE_BOOKS_API_KEY is None:
         GOOGLE_BOOKS_API_KEY = ""
 
 
-def fetch_openbd(isbn):
-    """openBD API でISBNから書籍情報を取得"""
-    url = f"{OPENBD_API}?isbn={isbn}"
-    req = urllib.request.Request(url)
-    try:
-        with urllib.request.urlopen(req) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-            # openBDは配列を返す。存在しない場合は[null]
-            if data and data[0]:
-                return data[0]
-            return None
-    except Exception as e:
-        print(f"  [ERROR] openBD API: {e}")
-        return None
+def search_google_books(title, retry=3):
+    """Google Books API でタイトル検索（リトライ機能付き、結果は検索キャッシュに保存）
 
+    Raises:
+        LookupDeferred: 429/403 が続いてサーキットブレーカーが開いている、
+            またはリトライしても 429/403 だった場合
+    """
+    cached = lookup_cache.get("google_books", title)
+    if cached is not lookup_cache.MISS:
+        return cached
 
-def search_google_books(title, retry=3):
-    """Google Books API でタイトル検索（リトライ機能付き）"""
     params = {
         "q": f"intitle:{title}",
         "langRestrict": "ja",
@@ -80,28 +109,42 @@ def search_google_books(title, retry=3):
     if GOOGLE_BOOKS_API_KEY:
         params["key"] = GOOGLE_BOOKS_API_KEY
 
-    url = f"{GOOGLE_BOOKS_API}?{urllib.parse.urlencode(params)}"
+    # 使うフィールドだけ返させる（partial response）
+    params["fields"] = GOOGLE_BOOKS_FIELDS
 
     for attempt in range(retry):
         try:
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req) as resp:
-                return json.loads(resp.read().decode("utf-8"))
+            probe = google_books_breaker.check()
+        except http_client.CircuitOpen as e:
+            raise LookupDeferred(str(e))
+        try:
+            result = http_client.get_json(GOOGLE_BOOKS_API, params)
         except urllib.error.HTTPError as e:
-            if e.code == 429:  # レート制限
+            if e.code in (429, 403):  # レート制限・クォータ切れ
+                retry_after = http_client.parse_retry_after(e.headers)
+                if google_books_breaker.record_failure(retry_after):
+                    raise LookupDeferred(f"Google Books API {e.code} が続いたため停止")
                 if attempt < retry - 1:
-                    wait_time = 10 * (attempt + 1)  # 10秒、20秒、30秒と増やす
-                    time.sleep(wait_time)
+                    # Retry-After があれば従い、なければ10秒、20秒、30秒と増やす
+                    time.sleep(retry_after if retry_after is not None else 10 * (attempt + 1))
                     continue
-                else:
-                    print(f"  [ERROR] Google Books API {e.code}")
-                    return None
+                raise LookupDeferred(f"Google Books API {e.code}")
             else:
+                # レート制限とは関係ないので、半開の試行だった場合は結果を保留して次の書籍で試し直す
+                if probe:
+                    google_books_breaker.release_probe()
                 print(f"  [ERROR] Google Books API {e.code}")
                 return None
         except Exception as e:
+            if probe:
+                google_books_breaker.release_probe()
             print(f"  [ERROR] {e}")
             return None
+        google_books_breaker.record_success()
+        # 0件も否定キャッシュとして保存（エラー時は保存しない）
+        lookup_cache.put("google_books", title,
+                         result if result and result.get("totalItems", 0) > 0 else None)
+        return result
 
     return None
 
@@ -239,36 +282,28 @@ def search_ndl(title, retry=3):
 
     # タイトルを正規化して検索
     normalized_title = normalize_title_for_search(title)
-    params = urllib.parse.urlencode({"title": normalized_title, "cnt": 3})
-    url = f"https://ndlsearch.ndl.go.jp/api/opensearch?{params}"
+    cached = lookup_cache.get("ndl", normalized_title)
+    if cached is not lookup_cache.MISS:
+        return cached
+    params = {"title": normalized_title, "cnt": 3}
 
-    for attempt in range(retry):
-        try:
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = resp.read().decode("utf-8")
-                isbns = _re.findall(
-                    r'<dc:identifier xsi:type="dcndl:ISBN">([^<]+)</dc:identifier>', data
-                )
-                # ISBN-13を優先
-                for isbn in isbns:
-                    cleaned = isbn.replace("-", "")
-                    if len(cleaned) == 13:
-                        return cleaned
-                # ISBN-10でもOK
-                for isbn in isbns:
-                    cleaned = isbn.replace("-", "")
-                    if len(cleaned) == 10:
-                        return cleaned
-                return None
-        except Exception as e:
-            if attempt < retry - 1:
-                time.sleep(3 * (attempt + 1))
-                continue
-            print(f"  [ERROR] NDL API: {e}")
-            return None
+    # 接続エラー・5xxのリトライは共通クライアントに任せる
+    try:
+        data = http_client.get_text(NDL_OPENSEARCH_API, params, timeout=10, retries=retry - 1)
+    except Exception as e:
+        print(f"  [ERROR] NDL API: {e}")
+        return None
 
-    return None
+    isbns = _re.findall(
+        r'<dc:identifier xsi:type="dcndl:ISBN">([^<]+)</dc:identifier>', data
+    )
+    cleaned = [isbn.replace("-", "") for isbn in isbns]
+    # ISBN-13を優先、ISBN-10でもOK
+    found = (next((c for c in cleaned if len(c) == 13), None)
+             or next((c for c in cleaned if len(c) == 10), None))
+    # 見つからなかった場合も否定キャッシュとして保存
+    lookup_cache.put("ndl", normalized_title, found)
+    return found
 
 
 def load_csv_overrides():
@@ -294,9 +329,81 @@ def load_csv_overrides():
     return overrides
 
 
-def main():
-    with open(BOOKS_FILE, "r", encoding="utf-8") as f:
-        books = json.load(f)
+def load_deferred():
+    """前回の実行で問い合わせを見送った書籍を {id: 理由} で返す"""
+    if not os.path.exists(DEFERRED_FILE):
+        return {}
+    with open(DEFERRED_FILE, "r", encoding="utf-8") as f:
+        return {entry["id"]: entry.get("reason") for entry in json.load(f)}
+
+
+def save_deferred(books, deferred):
+    """今回問い合わせを見送った書籍を保存（無ければファイルを削除）"""
+    if not deferred:
+        if os.path.exists(DEFERRED_FILE):
+            os.remove(DEFERRED_FILE)
+        return
+    entries = [{"id": b["id"], "title": b["title"], "reason": deferred[b["id"]]}
+               for b in books if b["id"] in deferred]
+    with open(DEFERRED_FILE, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+
+
+def apply_details(book, details):
+    """取得した詳細を書籍に反映し、変更したフィールドを dict で返す"""
+    fields = {}
+    # openBDの正式タイトルで統一
+    if details.get("title"):
+        fields["title"] = details["title"]
+    if details.get("image_url"):
+        fields["image_url"] = details["image_url"]
+    if details.get("authors"):
+        fields["author"] = "、".join(details["authors"])
+    if details.get("publisher"):
+        fields["publisher"] = details["publisher"]
+    if details.get("publication_date"):
+        fields["publication_date"] = details["publication_date"]
+    if details.get("isbn"):
+        fields["isbn"] = details["isbn"]
+        # ISBN-13 → ASIN(ISBN-10)に変換して商品ページURLに
+        asin = isbn13_to_asin(details["isbn"])
+        if asin:
+            fields["asin"] = asin
+            fields["amazon_url"] = f"https://www.amazon.co.jp/dp/{asin}?tag={AMAZON_TRACKING_ID}"
+    book.update(fields)
+    return fields
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="openBD + Google Books API で書籍情報を取得")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"並列に問い合わせる書籍数（既定: {DEFAULT_WORKERS}）")
+    parser.add_argument("--ndl-rps", type=float, default=HOST_RATE_LIMITS[NDL_HOST][0],
+                        help=f"NDLサーチへのリクエスト上限/秒（既定: {HOST_RATE_LIMITS[NDL_HOST][0]:g}）")
+    parser.add_argument("--google-rps", type=float, default=HOST_RATE_LIMITS[GOOGLE_BOOKS_HOST][0],
+                        help="Google Books APIへのリクエスト上限/秒"
+                             f"（既定: {HOST_RATE_LIMITS[GOOGLE_BOOKS_HOST][0]:g}）")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="NDL・openBD・Google Books の検索キャッシュを使わない")
+    return parser
+
+
+def run(store, args):
+    """ISBN未取得の書籍の書誌情報を取得してストアに反映する（pipeline.py からも呼ばれる）
+
+    args は build_parser() で解析した引数。
+    """
+    if args.no_cache:
+        lookup_cache.enabled = False
+
+    rates = dict(HOST_RATE_LIMITS)
+    rates[NDL_HOST] = (args.ndl_rps, rates[NDL_HOST][1])
+    rates[GOOGLE_BOOKS_HOST] = (args.google_rps, rates[GOOGLE_BOOKS_HOST][1])
+    for host, (rate, burst) in rates.items():
+        http_client.set_rate_limit(host, rate, burst)
+
+    # 紹介動画は使わないので書籍の行だけを読む
+    books = store.load_books(with_videos=False)
 
     # CSVから検索タイトルと削除フラグを読み込む
     csv_overrides = load_csv_overrides()
@@ -306,140 +413,136 @@ def main():
     if delete_ids:
         before_count = len(books)
         books = [b for b in books if b["id"] not in delete_ids]
+        store.delete_books(delete_ids)
         print(f"CSVのdelete=1により {before_count - len(books)}件を削除")
-        # 削除後すぐに保存
-        with open(BOOKS_FILE, "w", encoding="utf-8") as f:
-            json.dump(books, f, ensure_ascii=False, indent=2)
 
     print(f"書籍数: {len(books)}")
     updated = 0
     errors = 0
 
-    skipped = 0
-    for i, book in enumerate(books):
-        # 既にISBN取得済みならスキップ
-        if book.get("isbn"):
-            skipped += 1
-            continue
-
-        # CSVのsearch_titleがあればそれを使う
-        book_id = book["id"]
-        override = csv_overrides.get(book_id, {})
-        search_title = override.get("search_title") or book["title"]
+    # 既にISBN取得済みの書籍はスキップ
+    targets = [(i, book) for i, book in enumerate(books) if not book.get("isbn")]
+    skipped = len(books) - len(targets)
 
-        print(f"  [{i+1}/{len(books)}] {book['title'][:40]}...", end=" ")
+    # 前回見送った書籍を先に処理する（今回も途中で止まった場合に取りこぼさないように）
+    previously_deferred = load_deferred()
+    if previously_deferred:
+        targets.sort(key=lambda t: t[1]["id"] not in previously_deferred)
+        carried = sum(1 for _, b in targets if b["id"] in previously_deferred)
+        print(f"前回見送った書籍: {carried}件を先に処理します")
+    deferred = {}  # book id -> 見送った理由
 
-        details = None
-        isbn = None
+    def search_title_of(book):
+        # CSVのsearch_titleがあればそれを使う
+        return csv_overrides.get(book["id"], {}).get("search_title") or book["title"]
 
-        # 0. CSVに手動入力されたISBNがあればそれを使う
+    def resolve_isbn(target):
+        """CSVに手動入力されたISBN、なければNDLサーチのISBNと表示用メモを返す"""
+        _, book = target
+        override = csv_overrides.get(book["id"], {})
         manual_isbn = override.get("isbn")
         if manual_isbn:
-            isbn = manual_isbn
-            print(f"(手動ISBN: {isbn})", end=" ")
-        else:
-            if override.get("search_title"):
-                print(f"(検索: {search_title[:20]})", end=" ")
-            # 1. NDLサーチでISBNを取得
-            isbn = search_ndl(search_title)
-
-        # 2. ISBNが取れたらopenBDで詳細取得
-        if isbn:
-            openbd_data = fetch_openbd(isbn)
-            openbd_details = extract_openbd_details(openbd_data)
+            return manual_isbn, f"(手動ISBN: {manual_isbn})"
+        search_title = search_title_of(book)
+        isbn = search_ndl(search_title)
+        note = f"(検索: {search_title[:20]}) " if override.get("search_title") else ""
+        return isbn, note + (f"ISBN:{isbn}" if isbn else "ISBNなし")
+
+    def google_fallback(target):
+        """Google Books APIで詳細を探す。(details, 表示用ラベル, 取得元) を返す"""
+        _, book = target
+        isbn = isbn_by_id.get(book["id"])
+        try:
+            google_result = search_google_books(search_title_of(book), retry=1)
+        except LookupDeferred as e:
+            deferred[book["id"]] = str(e)
+            return None, None, None
+        google_details = extract_google_books_details(google_result)
+        if not google_details:
+            return None, None, None
+        # Google BooksでISBNが取れたらopenBDも試す
+        g_isbn = google_details.get("isbn")
+        if g_isbn and not isbn:
+            openbd_details = extract_openbd_details(fetch_openbd(g_isbn))
             if openbd_details:
-                details = openbd_details
-                print(f"OK (NDL→openBD, ISBN:{isbn})", end="")
-
-        # 3. openBDで取れなかったらGoogle Books APIにフォールバック
-        # ※Google Books APIのクォータが切れている場合はスキップ
-        if not details and GOOGLE_BOOKS_API_KEY:
-            google_result = search_google_books(search_title, retry=1)
-            google_details = extract_google_books_details(google_result)
-            if google_details:
-                # Google BooksでISBNが取れたらopenBDも試す
-                g_isbn = google_details.get("isbn")
-                if g_isbn and not isbn:
-                    openbd_data = fetch_openbd(g_isbn)
-                    openbd_details = extract_openbd_details(openbd_data)
-                    if openbd_details:
-                        details = {
-                            "image_url": openbd_details.get("image_url") or google_details.get("image_url"),
-                            "authors": openbd_details.get("authors") or google_details.get("authors"),
-                            "publisher": openbd_details.get("publisher") or google_details.get("publisher"),
-                            "publication_date": openbd_details.get("publication_date") or google_details.get("publication_date"),
-                            "isbn": openbd_details.get("isbn") or g_isbn,
-                        }
-                        print(f"OK (Google→openBD)", end="")
-                if not details:
-                    details = google_details
-                    print("OK (Google Books)", end="")
-
+                return {
+                    "image_url": openbd_details.get("image_url") or google_details.get("image_url"),
+                    "authors": openbd_details.get("authors") or google_details.get("authors"),
+                    "publisher": openbd_details.get("publisher") or google_details.get("publisher"),
+                    "publication_date": openbd_details.get("publication_date") or google_details.get("publication_date"),
+                    "isbn": openbd_details.get("isbn") or g_isbn,
+                }, "OK (Google→openBD)", "google_openbd"
+        return google_details, "OK (Google Books)", "google_books"
+
+    # 各APIへの呼び出しはホスト別のレート制限で間隔が調整されるので、ワーカー数は並列度の上限
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers))
+
+    # 1. ISBNを決める（並列に検索し、表示は書籍順）
+    print(f"\n--- ISBN検索: {len(targets)}件 ---")
+    isbn_by_id = {}
+    for (i, book), (isbn, note) in zip(targets, executor.map(resolve_isbn, targets)):
+        isbn_by_id[book["id"]] = isbn
+        print(f"  [{i+1}/{len(books)}] {book['title'][:40]}... {note}")
+
+    # 2. 取れたISBNをopenBDでまとめて取得
+    isbns = [isbn for isbn in isbn_by_id.values() if isbn]
+    openbd_records = fetch_openbd_bulk(isbns)
+    print(f"\n--- openBD一括取得: {len(openbd_records)}/{len(set(isbns))}件 ---")
+
+    # 取得できた詳細はすぐストアの該当書籍だけに反映する
+    # （途中で止まっても反映済みの書籍は次回ISBN取得済みとしてスキップされる）
+    results = {}  # book id -> (details, 表示用ラベル)
+
+    def record(book, details, label, source):
+        results[book["id"]] = (details, label)
+        if details:
+            store.record_enrichment(book["id"], source, apply_details(book, details))
+
+    for _, book in targets:
+        isbn = isbn_by_id.get(book["id"])
+        openbd_details = extract_openbd_details(openbd_records.get(isbn)) if isbn else None
+        if openbd_details:
+            record(book, openbd_details, f"OK (NDL→openBD, ISBN:{isbn})", "openbd")
+
+    # 3. openBDで取れなかったらGoogle Books APIにフォールバック（並列）
+    # ※Google Books APIのクォータが切れている場合はスキップ
+    fallback = [t for t in targets if t[1]["id"] not in results]
+    if fallback and GOOGLE_BOOKS_API_KEY:
+        print(f"\n--- Google Books検索: {len(fallback)}件 ---")
+        for (_, book), (details, label, source) in zip(fallback, executor.map(google_fallback, fallback)):
+            record(book, details, label, source)
+    executor.shutdown()
+
+    # 4. 書籍順に結果を表示
+    print()
+    for i, book in targets:
+        details, label = results.get(book["id"], (None, None))
+        print(f"  [{i+1}/{len(books)}] {book['title'][:40]}...", end=" ")
         if details:
-            # openBDの正式タイトルで統一
-            if details.get("title"):
-                book["title"] = details["title"]
-            if details.get("image_url"):
-                book["image_url"] = details["image_url"]
-            if details.get("authors"):
-                book["author"] = "、".join(details["authors"])
-            if details.get("publisher"):
-                book["publisher"] = details["publisher"]
-            if details.get("publication_date"):
-                book["publication_date"] = details["publication_date"]
-            if details.get("isbn"):
-                book["isbn"] = details["isbn"]
-                # ISBN-13 → ASIN(ISBN-10)に変換して商品ページURLに
-                asin = isbn13_to_asin(details["isbn"])
-                if asin:
-                    book["asin"] = asin
-                    book["amazon_url"] = f"https://www.amazon.co.jp/dp/{asin}?tag={AMAZON_TRACKING_ID}"
             updated += 1
-            print()
+            print(label)
+        elif book["id"] in deferred:
+            print("DEFERRED")
         else:
             errors += 1
-            print(" NOT FOUND")
-
-        # NDL + openBD はレート制限が緩いので短めでOK
-        time.sleep(1)
-
-        # 100件ごとに中間保存
-        if updated > 0 and updated % 100 == 0:
-            with open(BOOKS_FILE, "w", encoding="utf-8") as f:
-                json.dump(books, f, ensure_ascii=False, indent=2)
-            print(f"  --- 中間保存 ({updated}件更新済み) ---")
-
-    # 最終保存
-    with open(BOOKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(books, f, ensure_ascii=False, indent=2)
-
-    # rankings*.json も再生成（image_url を含める）
-    def make_ranking_entry(b):
-        return {
-            "id": b["id"],
-            "title": b["title"],
-            "author": b.get("author"),
-            "count": b["count"],
-            "total_views": b["total_views"],
-            "total_likes": b["total_likes"],
-            "amazon_url": b["amazon_url"],
-            "image_url": b.get("image_url"),
-        }
-
-    by_count = sorted(books, key=lambda x: x["count"], reverse=True)
-    with open(os.path.join(DATA_DIR, "rankings.json"), "w", encoding="utf-8") as f:
-        json.dump([make_ranking_entry(b) for b in by_count], f, ensure_ascii=False, indent=2)
-
-    by_views = sorted(books, key=lambda x: x["total_views"], reverse=True)
-    with open(os.path.join(DATA_DIR, "rankings_views.json"), "w", encoding="utf-8") as f:
-        json.dump([make_ranking_entry(b) for b in by_views], f, ensure_ascii=False, indent=2)
-
-    by_likes = sorted(books, key=lambda x: x["total_likes"], reverse=True)
-    with open(os.path.join(DATA_DIR, "rankings_likes.json"), "w", encoding="utf-8") as f:
-        json.dump([make_ranking_entry(b) for b in by_likes], f, ensure_ascii=False, indent=2)
+            print("NOT FOUND")
 
     print(f"\n=== 完了 ===")
+    save_deferred(books, deferred)
     print(f"更新: {updated}件 / エラー: {errors}件 / スキップ: {skipped}件 / 合計: {len(books)}件")
+    if deferred:
+        print(f"見送り: {len(deferred)}件（{os.path.basename(DEFERRED_FILE)} に記録。次回の実行で先に処理します）")
+    lookup_cache.print_stats()
+    http_client.print_stats()
+
+
+def main():
+    args = build_parser().parse_args()
+    store = book_store.open_store()
+    run(store, args)
+    # books.json / rankings*.json をストアから書き出す（image_url を含める）
+    store.export()
+    store.close()
 
 
 if __name__ == "__main__":
@@ -8,27 +8,7 @@ import urllib.parse
 import urllib.error
 from html.parser import HTMLParser
 
-
-# YouTuber自身の著作を除外するための著者名・キーワードリスト
-YOUTUBER_AUTHORS = [
-    'アバタロー',
-    'サラタメ',
-    '本要約チャンネル',
-    '学識サロン',
-    'フェルミ',
-    '中田敦彦',
-    'オリエンタルラジオ',
-    '三宅',  # 三宅書店
-]
-
-# YouTuberが自著を宣伝する際のキーワード
-SELF_PROMOTION_KEYWORDS = [
-    '新刊',
-    '拙著',
-    '著書',
-    '僕の本',
-    '私の本',
-]
+import denylist
 
 
 class AmazonTitleParser(HTMLParser):
@@ -137,16 +117,15 @@ def is_youtuber_book(title, author=None, context=None):
     if not title:
         return False
 
-    # タイトルや著者にYouTuber名が含まれているか
-    for youtuber in YOUTUBER_AUTHORS:
-        if youtuber in title or (author and youtuber in author):
-            return True
+    # タイトルや著者にYouTuber名が含まれているか（語のリストは data/denylists.json）
+    if denylist.first_match(title, "youtuber_authors"):
+        return True
+    if author and denylist.first_match(author, "youtuber_authors"):
+        return True
 
     # 文脈に自己宣伝キーワードが含まれているか
-    if context:
-        for keyword in SELF_PROMOTION_KEYWORDS:
-            if keyword in context:
-                return True
+    if context and denylist.first_match(context, "self_promotion_keywords"):
+        return True
 
     return False
 
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""fetch_videos.py の途中経過をチャンネル単位で保存するチェックポイント
+
+data/checkpoints/ 以下に、実行モードを記録した run.json と、チャンネルごとに
+  <channel_id>.json  : 再生リストの取得位置などのカーソル（一時ファイル + rename で置き換え）
+  <channel_id>.jsonl : 列挙した動画ID（1ページ1行）と抽出済みの書籍情報（1動画1行）の追記ログ
+を置く。取得済みの内容は追記するだけなので、保存のたびに全件を書き直さない。
+カーソルはログの確定済みバイト数(log_size)を持ち、ログへの追記 → カーソルの置き換えの
+順に書くため、途中でプロセスが落ちても確定前の追記は読み込み時に捨てられる。
+
+--resume 付きで再実行すると、完了済みのチャンネルはAPIを呼ばずに復元し、
+途中のチャンネルは続きのページ・バッチから取得を再開する。
+"""
+
+import json
+import os
+import shutil
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+RUN_FILE = "run.json"
+
+
+def atomic_write_json(path, data):
+    """JSONを一時ファイルに書いてから rename で置き換える"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ChannelCheckpoint:
+    """1チャンネル分の取得状況"""
+
+    def __init__(self, path, channel_id, since):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".jsonl"
+        self.channel_id = channel_id
+        self.since = since
+        self.playlist_id = None
+        self.page_token = None       # 次に取得する再生リストのページ
+        self.listing_done = False    # 動画IDの列挙が完了したか
+        self.video_ids = []          # 列挙済みの動画ID（再生リスト順）
+        self.details = {}            # video_id -> 動画エントリ（ショート・削除済みは None）
+        self.done = False            # チャンネルの取得が完了したか
+        self.log_size = 0            # ログのうちカーソルで確定済みのバイト数
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        cp = cls(path, data["channel_id"], data.get("since"))
+        cp.playlist_id = data.get("playlist_id")
+        cp.page_token = data.get("page_token")
+        cp.listing_done = data.get("listing_done", False)
+        cp.done = data.get("done", False)
+        cp.log_size = data.get("log_size", 0)
+        if cp.log_size:
+            with open(cp.log_path, "rb") as f:
+                log = f.read(cp.log_size)
+            for line in log.splitlines():
+                record = json.loads(line)
+                if "ids" in record:
+                    cp.video_ids.extend(record["ids"])
+                else:
+                    cp.details[record["id"]] = record["entry"]
+        return cp
+
+    def save(self):
+        """カーソルを保存する（追記ログの内容はここで確定する）"""
+        atomic_write_json(self.path, {
+            "channel_id": self.channel_id,
+            "since": self.since,
+            "playlist_id": self.playlist_id,
+            "page_token": self.page_token,
+            "listing_done": self.listing_done,
+            "done": self.done,
+            "log_size": self.log_size,
+        })
+
+    def _append(self, records):
+        """ログの確定済み位置の後ろに records を書き足す（未確定の書きかけは上書きする）"""
+        data = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                       for r in records).encode("utf-8")
+        with open(self.log_path, "r+b" if os.path.exists(self.log_path) else "wb") as f:
+            f.seek(self.log_size)
+            f.truncate()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.log_size += len(data)
+
+    def add_video_ids(self, video_ids, page_token, listing_done):
+        """再生リストの1ページ分の動画IDと次の取得位置を保存"""
+        self._append([{"ids": video_ids}])
+        self.video_ids.extend(video_ids)
+        self.page_token = page_token
+        self.listing_done = listing_done
+        self.save()
+
+    def add_details(self, details):
+        """動画エントリ {video_id: エントリまたは None} を保存"""
+        if details:
+            self._append({"id": vid, "entry": entry} for vid, entry in details.items())
+            self.details.update(details)
+        self.save()
+
+    def videos(self):
+        """完了済みチャンネルの動画エントリを再生リスト順で返す（ショート等は除く）"""
+        return [self.details[vid] for vid in self.video_ids if self.details.get(vid)]
+
+    def delete(self):
+        for path in (self.path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class CheckpointStore:
+    """実行単位のチェックポイント管理"""
+
+    def __init__(self, directory=CHECKPOINT_DIR):
+        self.directory = directory
+        self.resuming = False
+
+    def start(self, mode, resume=False):
+        """実行開始時に呼ぶ。resume なら前回の run.json とモードを照合して再開する
+
+        Returns:
+            再開する場合 True。前回のチェックポイントが無い、またはモードが違う場合は
+            新しい実行として既存のチェックポイントを破棄し False を返す。
+        """
+        run_path = os.path.join(self.directory, RUN_FILE)
+        if resume and os.path.exists(run_path):
+            with open(run_path, "r", encoding="utf-8") as f:
+                run = json.load(f)
+            if run.get("mode") == mode:
+                self.resuming = True
+                return True
+            print(f"  [WARN] 前回のチェックポイントは {run.get('mode')} モードのため破棄します")
+        self.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_json(run_path, {"mode": mode})
+        return False
+
+    def channel(self, channel_id, since):
+        """チャンネルのチェックポイントを返す（再開時は保存済みのものを読み込む）"""
+        path = os.path.join(self.directory, f"{channel_id}.json")
+        if self.resuming and os.path.exists(path):
+            cp = ChannelCheckpoint.load(path)
+            # 差分取得の起点が変わっていたら前回の途中経過は使えない
+            if cp.since == since:
+                return cp
+        return ChannelCheckpoint(path, channel_id, since)
+
+    def clear(self):
+        """すべてのチェックポイントを削除"""
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
@@ -4,6 +4,11 @@
 使用方法:
   python fetch_videos.py          # 差分更新（前回以降の新しい動画のみ）
   python fetch_videos.py --full   # 全件取得（初回実行時や完全リセット時）
+  python fetch_videos.py --workers 4  # 4チャンネルを並列取得（出力は逐次実行と同一）
+  python fetch_videos.py --full --cache-max-age 7  # 7日以内に取得済みの動画はキャッシュを使う
+  python fetch_videos.py --reextract  # API呼び出しなしでキャッシュから再抽出
+  python fetch_videos.py --stats-budget 40  # 既知動画の統計更新に最大40回(2000件)使う
+  python fetch_videos.py --resume  # 中断した実行をチェックポイントから再開
 """
 
 import argparse
@@ -12,11 +17,21 @@ import json
 import os
 import re
 import sys
+import threading
 import time
+import urllib.error
 import urllib.parse
-import urllib.request
-from datetime import datetime
-
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import book_store
+import denylist
+import http_client
+from video_cache import DEFAULT_CACHE_FILE, VideoCache, utc_now_iso
+from fetch_checkpoint import CheckpointStore
+from youtube_quota import DEFAULT_DAILY_LIMIT, QuotaExhausted, QuotaTracker, is_quota_error
+from book_extractors import extract_book_info_list, resolve_extractors
 # Amazonリンクから書籍情報取得
 from fetch_amazon_info import extract_books_from_amazon_links
 
@@ -39,18 +54,82 @@ AMAZON_TRACKING_ID = "business-book-ranking02-22"
 
 YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
 
+# videos.list で実際に使うフィールドだけを返させる（partial response でペイロード削減）
+VIDEO_DETAIL_FIELDS = (
+    "items(id,snippet(title,publishedAt,description,channelId,channelTitle),"
+    "statistics(viewCount,likeCount),contentDetails/duration)"
+)
+
+# キャッシュ済み動画レコードを再取得するまでの日数の既定値
+DEFAULT_CACHE_MAX_AGE_DAYS = 30
+
+# 統計更新に使う videos.list 呼び出し回数の既定値（1回 = 50件 = 1ユニット）
+DEFAULT_STATS_BUDGET = 20
+# この日数以内に統計を取得した動画は更新対象にしない
+STATS_MIN_AGE_DAYS = 1
+
+# API全体のリクエストレート上限（1秒あたり）。並列実行時も全スレッドで共有する
+DEFAULT_MAX_RPS = 10
+
 
 # =============================================================================
 # YouTube Data API
 # =============================================================================
 
+class RateLimiter:
+    """全スレッド共通のリクエスト間隔制御（最小間隔方式）"""
+
+    def __init__(self, max_per_sec):
+        self.interval = 1.0 / max_per_sec if max_per_sec > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """次のリクエストが許可されるまで待機"""
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_time)
+            self._next_time = scheduled + self.interval
+        delay = scheduled - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+rate_limiter = RateLimiter(DEFAULT_MAX_RPS)
+
+# 動画生データのキャッシュ（main() で設定。Noneなら常にAPIから取得）
+video_cache = None
+cache_max_age_days = None
+# この実行（中断前を含む）でAPIから詳細を取得した動画ID（統計が最新なので統計更新の対象外）
+fresh_video_ids = set()
+
+# クォータ集計（main() で設定。Noneなら集計・予算管理しない）
+quota = None
+
+# 除外リスト（data/denylists.json）のルールごとの一致件数（リスト整理の目安）
+# 詳細取得のワーカースレッドからも数えるので、更新は _denylist_hits_lock の中で行う
+denylist_hits = Counter()
+_denylist_hits_lock = threading.Lock()
+
+
 def api_get(endpoint, params):
-    """YouTube Data API にGETリクエスト"""
+    """YouTube Data API にGETリクエスト
+
+    quota が設定されていれば消費ユニットを計上し、予算超過・クォータ超過時は
+    QuotaExhausted を送出する。http_client が 5xx・接続エラーでリトライした送信も
+    クォータを消費しうるので、送信1回ごとに計上する。
+    """
+    rate_limiter.wait()
     params["key"] = YOUTUBE_API_KEY
-    url = f"{YOUTUBE_API_BASE}/{endpoint}?" + urllib.parse.urlencode(params)
-    req = urllib.request.Request(url)
-    with urllib.request.urlopen(req) as resp:
-        return json.loads(resp.read().decode())
+    try:
+        return http_client.get_json(f"{YOUTUBE_API_BASE}/{endpoint}", params,
+                                    on_attempt=(lambda: quota.charge(endpoint)) if quota else None)
+    except urllib.error.HTTPError as e:
+        if is_quota_error(e):
+            if quota:
+                quota.mark_exhausted()
+            raise QuotaExhausted("YouTube APIのクォータ上限に達しました") from e
+        raise
 
 
 def get_uploads_playlist_id(channel_id):
@@ -58,6 +137,7 @@ def get_uploads_playlist_id(channel_id):
     data = api_get("channels", {
         "part": "contentDetails",
         "id": channel_id,
+        "fields": "items/contentDetails/relatedPlaylists/uploads",
     })
     items = data.get("items", [])
     if not items:
@@ -65,27 +145,31 @@ def get_uploads_playlist_id(channel_id):
     return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
 
 
-def get_all_video_ids(playlist_id, since=None):
+def get_all_video_ids(playlist_id, since=None, checkpoint=None):
     """再生リストから動画IDを取得（ページネーション対応）
 
     Args:
         playlist_id: YouTubeのプレイリストID
         since: この日時以降の動画のみ取得（ISO 8601形式）。Noneなら全件取得。
+        checkpoint: ChannelCheckpoint。指定時は1ページごとに取得位置を保存し、
+            保存済みの位置から再開する。
     """
-    video_ids = []
-    page_token = None
-    stop_fetching = False
+    video_ids = list(checkpoint.video_ids) if checkpoint else []
+    page_token = checkpoint.page_token if checkpoint else None
+    stop_fetching = bool(checkpoint and checkpoint.listing_done)
 
     while not stop_fetching:
         params = {
             "part": "snippet",
             "playlistId": playlist_id,
             "maxResults": 50,
+            "fields": "nextPageToken,items/snippet(publishedAt,resourceId/videoId)",
         }
         if page_token:
             params["pageToken"] = page_token
         data = api_get("playlistItems", params)
 
+        page_ids = []
         for item in data.get("items", []):
             published = item["snippet"].get("publishedAt", "")
             vid = item["snippet"]["resourceId"]["videoId"]
@@ -95,12 +179,14 @@ def get_all_video_ids(playlist_id, since=None):
                 stop_fetching = True
                 break
 
-            video_ids.append(vid)
+            page_ids.append(vid)
 
+        video_ids.extend(page_ids)
         page_token = data.get("nextPageToken")
+        if checkpoint:
+            checkpoint.add_video_ids(page_ids, page_token, stop_fetching or not page_token)
         if not page_token:
             break
-        time.sleep(0.1)
 
     return video_ids
 
@@ -116,65 +202,287 @@ def parse_iso8601_duration(duration_str):
     return hours * 3600 + minutes * 60 + seconds
 
 
-def get_video_details(video_ids):
+def _fetch_video_details_batch(batch):
+    """50件分の動画詳細をAPIから取得し、キャッシュ形式のレコードリストで返す
+    （ショート動画も含む。除外は呼び出し側で行う）"""
+    data = api_get("videos", {
+        "part": "snippet,statistics,contentDetails",
+        "id": ",".join(batch),
+        "fields": VIDEO_DETAIL_FIELDS,
+    })
+    fetched_at = utc_now_iso()
+    records = []
+    for item in data.get("items", []):
+        snippet = item["snippet"]
+        stats = item.get("statistics", {})
+        duration_str = item.get("contentDetails", {}).get("duration", "")
+        records.append({
+            "video_id": item["id"],
+            "channel_id": snippet.get("channelId", ""),
+            "channel_title": snippet.get("channelTitle", ""),
+            "title": snippet["title"],
+            "published": snippet["publishedAt"],
+            "description": snippet.get("description", ""),
+            "duration_sec": parse_iso8601_duration(duration_str),
+            "view_count": int(stats.get("viewCount", 0)),
+            "like_count": int(stats.get("likeCount", 0)),
+            "fetched_at": fetched_at,
+        })
+    return records
+
+
+def video_from_record(record):
+    """キャッシュ形式のレコードを書籍抽出用の動画dictに変換"""
+    return {
+        "video_id": record["video_id"],
+        "title": record["title"],
+        "published": record["published"],
+        "link": f"https://www.youtube.com/watch?v={record['video_id']}",
+        "summary": record["description"],
+        "channel_title": record["channel_title"],
+        "view_count": record["view_count"],
+        "like_count": record["like_count"],
+    }
+
+
+def get_video_details(video_ids, executor=None, label="", on_batch=None):
     """動画IDリストから詳細情報を取得（50件ずつバッチ処理）
-    60秒以下のショート動画は除外する"""
+    60秒以下のショート動画は除外する
+
+    video_cache が設定されていれば、キャッシュに無い動画と
+    cache_max_age_days より古いレコードだけをAPIから取得する。
+
+    Args:
+        video_ids: 動画IDのリスト
+        executor: バッチを並列取得する場合のExecutor。Noneなら逐次取得。
+        label: ログ出力の接頭辞（並列実行時のチャンネル識別用）
+        on_batch: APIから1バッチ取得するたびに呼ばれる関数（レコードのリストを受け取る）
+    """
+    records = {}
+    if video_cache:
+        records = video_cache.get_many(video_ids, max_age_days=cache_max_age_days)
+    missing = [vid for vid in video_ids if vid not in records]
+
+    batches = [missing[i:i+50] for i in range(0, len(missing), 50)]
+    # executor.map も入力順に結果を返すため、並列でも動画の並び順は変わらない
+    mapper = executor.map if executor else map
+    for batch_records in mapper(_fetch_video_details_batch, batches):
+        if video_cache:
+            video_cache.put_many(batch_records)
+        if on_batch:
+            on_batch(batch_records)
+        for record in batch_records:
+            records[record["video_id"]] = record
+            fresh_video_ids.add(record["video_id"])
+    if video_cache:
+        print(f"  {label}キャッシュ利用: {len(video_ids) - len(missing)}件 / API取得: {len(missing)}件")
+
     videos = []
     shorts_count = 0
-    for i in range(0, len(video_ids), 50):
-        batch = video_ids[i:i+50]
-        data = api_get("videos", {
-            "part": "snippet,statistics,contentDetails",
-            "id": ",".join(batch),
-        })
-        for item in data.get("items", []):
-            # ショート動画を除外（60秒以下）
-            duration_str = item.get("contentDetails", {}).get("duration", "")
-            duration_sec = parse_iso8601_duration(duration_str)
-            if duration_sec <= 60:
-                shorts_count += 1
-                continue
-            snippet = item["snippet"]
-            stats = item.get("statistics", {})
-            videos.append({
-                "video_id": item["id"],
-                "title": snippet["title"],
-                "published": snippet["publishedAt"],
-                "link": f"https://www.youtube.com/watch?v={item['id']}",
-                "summary": snippet.get("description", ""),
-                "channel_title": snippet.get("channelTitle", ""),
-                "view_count": int(stats.get("viewCount", 0)),
-                "like_count": int(stats.get("likeCount", 0)),
-            })
-        time.sleep(0.1)
+    for vid in video_ids:
+        record = records.get(vid)
+        if not record:
+            continue  # 削除・非公開の動画
+        # ショート動画を除外（60秒以下）
+        if record["duration_sec"] <= 60:
+            shorts_count += 1
+            continue
+        videos.append(video_from_record(record))
     if shorts_count > 0:
-        print(f"  ショート動画を除外: {shorts_count}件")
+        print(f"  {label}ショート動画を除外: {shorts_count}件")
     return videos
 
 
-def fetch_all_channel_videos(channel_id, since=None):
+def checkpoint_entry(video, extractors=None):
+    """動画dictをチェックポイント用に変換（概要欄は保存せず、抽出済みの書籍情報を持たせる）"""
+    entry = {k: video[k] for k in ("video_id", "title", "published", "link",
+                                   "view_count", "like_count")}
+    entry["books"] = extract_book_info_list(video.get("summary", ""), video.get("title", ""),
+                                            extractors)
+    return entry
+
+
+def fetch_all_channel_videos(channel_id, since=None, executor=None, label="", checkpoint=None,
+                             extractors=None):
     """チャンネルの動画を取得
 
     Args:
         channel_id: YouTubeチャンネルID
         since: この日時以降の動画のみ取得。Noneなら全件取得。
+        executor: 詳細取得バッチを並列実行する場合のExecutor
+        label: ログ出力の接頭辞（並列実行時のチャンネル識別用）
+        checkpoint: ChannelCheckpoint。指定時は途中経過を保存し、返す動画は
+            概要欄の代わりに抽出済みの書籍情報(books)を持つ。
+        extractors: チェックポイント保存時の書籍抽出に使うエクストラクタ（channel_extractors()）
     """
-    playlist_id = get_uploads_playlist_id(channel_id)
+    if checkpoint and checkpoint.done:
+        videos = checkpoint.videos()
+        # 中断前の同じ実行で取得した動画なので統計も新しい
+        fresh_video_ids.update(v["video_id"] for v in videos)
+        print(f"  {label}チェックポイントから復元: {len(videos)}件")
+        return videos
+
+    playlist_id = checkpoint.playlist_id if checkpoint else None
     if not playlist_id:
-        print(f"  [ERROR] アップロード再生リストが見つかりません")
+        playlist_id = get_uploads_playlist_id(channel_id)
+    if not playlist_id:
+        print(f"  {label}[ERROR] アップロード再生リストが見つかりません")
         return []
-    video_ids = get_all_video_ids(playlist_id, since=since)
+    if checkpoint:
+        checkpoint.playlist_id = playlist_id
+    video_ids = get_all_video_ids(playlist_id, since=since, checkpoint=checkpoint)
     if since:
-        print(f"  新規動画ID取得: {len(video_ids)}件 (since: {since[:10]})")
+        print(f"  {label}新規動画ID取得: {len(video_ids)}件 (since: {since[:10]})")
     else:
-        print(f"  動画ID取得: {len(video_ids)}件")
-    if not video_ids:
-        return []
-    videos = get_video_details(video_ids)
-    print(f"  動画詳細取得: {len(videos)}件")
+        print(f"  {label}動画ID取得: {len(video_ids)}件")
+
+    if not checkpoint:
+        if not video_ids:
+            return []
+        videos = get_video_details(video_ids, executor=executor, label=label)
+        print(f"  {label}動画詳細取得: {len(videos)}件")
+        return videos
+
+    def save_batch(records):
+        # APIで取得した分だけ都度保存（再開時にクォータを再消費しない）
+        checkpoint.add_details({
+            record["video_id"]: (checkpoint_entry(video_from_record(record), extractors)
+                                 if record["duration_sec"] > 60 else None)
+            for record in records})
+
+    pending = [vid for vid in video_ids if vid not in checkpoint.details]
+    if len(pending) < len(video_ids):
+        print(f"  {label}チェックポイントから再開: 取得済み{len(video_ids) - len(pending)}件")
+    fetched = {v["video_id"]: v for v in get_video_details(
+        pending, executor=executor, label=label, on_batch=save_batch)}
+    # バッチで保存されなかった動画（キャッシュ分・削除済み）を記録。削除済みは None
+    checkpoint.add_details({
+        vid: checkpoint_entry(fetched[vid], extractors) if vid in fetched else None
+        for vid in pending if vid not in checkpoint.details})
+    checkpoint.done = True
+    checkpoint.save()
+    videos = checkpoint.videos()
+    print(f"  {label}動画詳細取得: {len(videos)}件")
     return videos
 
 
+# =============================================================================
+# 統計の定期更新（既知動画の再生数・いいね数）
+# =============================================================================
+
+def _days_since(iso_str, now):
+    """ISO 8601文字列からの経過日数（解釈できなければ None）"""
+    try:
+        dt = datetime.strptime(iso_str[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+    return max((now - dt).total_seconds() / 86400, 0.0)
+
+
+def stats_timestamps(video_ids, store=None):
+    """統計を最後に取得した日時 {video_id: ISO文字列}（ストアの記録と動画キャッシュの新しい方）"""
+    last_fetched = store.stats_refreshed_at(video_ids) if store else {}
+    if video_cache:
+        for vid, ts in video_cache.stats_timestamps(video_ids).items():
+            if ts > last_fetched.get(vid, ""):
+                last_fetched[vid] = ts
+    return last_fetched
+
+
+def select_stats_refresh_targets(videos_by_id, max_videos, min_age_days=STATS_MIN_AGE_DAYS, store=None):
+    """統計を更新する動画IDを優先度順に選ぶ
+
+    優先度 = 1日あたりの再生数の目安 × 前回取得からの経過日数。
+    新しい動画・再生数の多い動画ほど、また長く更新していない動画ほど先に選ばれる。
+    min_age_days 以内に取得した動画と、この実行で詳細を取得した動画は対象外。
+    前回取得の日時はストアの記録（--no-cache でも残る）と動画キャッシュから取るので、
+    更新した動画は次の実行で後回しになり、実行ごとに順に別の動画が選ばれる。
+
+    Args:
+        videos_by_id: {video_id: 動画エントリ(published, view_count を参照)}
+        max_videos: 選ぶ最大件数
+        store: 統計を取得した日時を記録している BookStore
+    """
+    now = datetime.now(timezone.utc)
+    last_fetched = stats_timestamps(list(videos_by_id), store)
+    scored = []
+    for vid, video in videos_by_id.items():
+        if vid in fresh_video_ids:
+            continue
+        age = _days_since(video.get("published", ""), now)
+        age = 365.0 if age is None else age
+        staleness = _days_since(last_fetched[vid], now) if vid in last_fetched else None
+        if staleness is None:
+            staleness = age  # 取得日時が不明なら公開以来一度も更新していない扱い
+        if staleness < min_age_days:
+            continue
+        views_per_day = (video.get("view_count", 0) + 1) / (age + 1)
+        scored.append((-views_per_day * staleness, vid))
+    scored.sort()
+    return [vid for _, vid in scored[:max_videos]]
+
+
+def _fetch_stats_batch(batch):
+    """50件分の統計を取得し {video_id: (再生数, いいね数)} で返す"""
+    data = api_get("videos", {
+        "part": "statistics",
+        "id": ",".join(batch),
+        "fields": "items(id,statistics(viewCount,likeCount))",
+    })
+    return {
+        item["id"]: (int(item.get("statistics", {}).get("viewCount", 0)),
+                     int(item.get("statistics", {}).get("likeCount", 0)))
+        for item in data.get("items", [])
+    }
+
+
+def refresh_video_stats(all_books, budget, executor=None, store=None):
+    """既知動画の再生数・いいね数を再取得し、書籍の合計値を差分で更新
+
+    Args:
+        all_books: 正規化キー -> 書籍 の辞書（videos を持つ）
+        budget: 使ってよい videos.list 呼び出し回数（1回 = 50件 = 1ユニット）
+        executor: バッチを並列取得する場合のExecutor
+        store: 指定時は対象の選択に前回の取得日時を使い、取得した日時を記録する
+    """
+    if budget <= 0:
+        return
+    # video_id -> その動画を含む (書籍, 動画エントリ) のリスト
+    index = {}
+    for book in all_books.values():
+        for video in book["videos"]:
+            index.setdefault(video["video_id"], []).append((book, video))
+    if not index:
+        return
+
+    videos_by_id = {vid: refs[0][1] for vid, refs in index.items()}
+    targets = select_stats_refresh_targets(videos_by_id, budget * 50, store=store)
+    if not targets:
+        return
+    print(f"\n=== 統計更新: {len(targets)}件 / 既知動画 {len(index)}件 ===")
+
+    batches = [targets[i:i+50] for i in range(0, len(targets), 50)]
+    mapper = executor.map if executor else map
+    changed = 0
+    for batch, stats in zip(batches, mapper(_fetch_stats_batch, batches)):
+        if store:
+            # 削除された動画も記録し、毎回同じ動画に予算を使わないようにする
+            store.record_stats_refresh(batch)
+        for vid, (views, likes) in stats.items():
+            for book, video in index[vid]:
+                dv = views - video.get("view_count", 0)
+                dl = likes - video.get("like_count", 0)
+                if dv or dl:
+                    book["total_views"] += dv
+                    book["total_likes"] += dl
+                    video["view_count"] = views
+                    video["like_count"] = likes
+                    changed += 1
+        if video_cache:
+            video_cache.update_stats(stats)
+    print(f"  統計が変化した動画エントリ: {changed}件")
+
+
 def load_fetch_state():
     """前回の取得状態を読み込む"""
     if os.path.exists(FETCH_STATE_FILE):
@@ -193,358 +501,6 @@ def save_fetch_state(state):
 # 書籍抽出ロジック（チャンネル別パターン対応）
 # =============================================================================
 
-def extract_book_info_list(summary, video_title=None):
-    """概要欄・動画タイトルから書籍情報を抽出"""
-    results = []
-
-    # パターン0: 動画タイトルから抽出「【要約】タイトル【著者】」（フェルミ漫画大学等）
-    if video_title:
-        m = re.match(r'【(?:要約|漫画)】(.+?)【(.+?)】', video_title)
-        if m:
-            book_title = m.group(1).strip()
-            author = m.group(2).strip()
-            results.append({
-                "title": book_title,
-                "author": author,
-                "publisher": None,
-            })
-            return results
-
-    # TODO: Amazonリンクから書籍情報を取得（時間がかかるため一時的に無効化）
-    # amazon_urls = re.findall(r'https?://amzn\.to/[A-Za-z0-9]+', summary)
-    # if amazon_urls:
-    #     amazon_books = extract_books_from_amazon_links(amazon_urls, max_books=5, context=summary)
-    #     for book in amazon_books:
-    #         results.append({
-    #             "title": book["title"],
-    #             "author": None,
-    #             "publisher": None,
-    #             "amazon_url": book["amazon_url"],
-    #         })
-    #     if results:
-    #         return results
-
-    # パターン1: 本要約チャンネル / サラタメさん「タイトル：」「著者：」「出版社：」
-    title_match = re.search(r'タイトル[：:](.+)', summary)
-    if title_match:
-        info = {
-            "title": title_match.group(1).strip(),
-            "author": None,
-            "publisher": None,
-        }
-        author_match = re.search(r'著者[：:](.+)', summary)
-        if author_match:
-            info["author"] = author_match.group(1).strip()
-        publisher_match = re.search(r'出版社[：:](.+)', summary)
-        if publisher_match:
-            info["publisher"] = publisher_match.group(1).strip()
-        results.append(info)
-        return results
-
-    # パターン2: フェルミ漫画大学「参考：書名 著者名 さま」
-    # 「参考文献：」も対応
-    ref_match = re.search(r'参考(?:文献)?[：:](.+?)(?:\s+さま|\s*$)', summary, re.MULTILINE)
-    if ref_match:
-        title_text = ref_match.group(1).strip()
-        # 著者名だけの行を除外（「さま」で終わる人名のみ、書籍タイトルなし）
-        if not re.match(r'^[\w\s・　]+さま', title_text) and title_text:
-            results.append({
-                "title": title_text,
-                "author": None,
-                "publisher": None,
-            })
-            return results
-
-    # パターン3: 学識サロン「【amazonリンク】\n『書名』著者 / 出版社」
-    if "【amazonリンク】" in summary:
-        gakushiki_match = re.search(r'『(.+?)』(.+?)(?:\s*/\s*(.+))?$', summary, re.MULTILINE)
-        if gakushiki_match:
-            info = {
-                "title": gakushiki_match.group(1).strip(),
-                "author": None,
-                "publisher": None,
-            }
-            if gakushiki_match.group(2):
-                info["author"] = gakushiki_match.group(2).strip()
-            if gakushiki_match.group(3):
-                info["publisher"] = gakushiki_match.group(3).strip()
-            results.append(info)
-            return results
-
-    # パターン4: サムの本解説ch「【今回の参考書籍📚】」セクション
-    sam_section = re.search(
-        r'【今回の参考書籍.*?】\s*\n(.*?)(?=【|$)', summary, re.DOTALL
-    )
-    if sam_section:
-        section_text = sam_section.group(1).strip()
-        lines = section_text.split('\n')
-        title_line = None
-        author_line = None
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('http'):
-                continue
-            # 著者行を判定: 「〜(著)」「〜（著）」を含む行
-            if re.search(r'[（(]著[）)]', line):
-                author_line = line
-            elif not title_line:
-                # 最初の非著者行をタイトルとして取得
-                title_line = re.sub(r'\s*(Kindle版|単行本|文庫|新書|ハードカバー)\s*$', '', line).strip()
-                # 先頭の「・」を除去
-                title_line = re.sub(r'^[・･]', '', title_line).strip()
-        if title_line:
-            info = {"title": title_line, "author": None, "publisher": None}
-            if author_line:
-                author_match = re.match(r'(.+?)\s*[（(]著[）)]', author_line)
-                if author_match:
-                    info["author"] = author_match.group(1).strip()
-                pub_match = re.search(r'([^\s]+?)[（(]編集[）)]', author_line)
-                if pub_match:
-                    info["publisher"] = pub_match.group(1).strip()
-            results.append(info)
-            return results
-
-    # パターン5: PIVOT系「＜参考書籍＞」「▼参考書籍」「▼関連書籍」「▼本映像で紹介した書籍」セクション
-    pivot_section = re.search(
-        r'(?:[＜<]参考書籍[＞>]|▼参考書籍|▼関連書籍|▼本映像で紹介した書籍)\s*\n(.*?)(?=\n[＜<]|\n▼[^参関本]|\n[■●]|\n※|\n\n\n|$)', summary, re.DOTALL
-    )
-    if pivot_section:
-        section_text = pivot_section.group(1).strip()
-        lines = section_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('http') or line.startswith('※'):
-                continue
-
-            title = None
-            author = None
-
-            # パターンA: 『タイトル』を優先（内部に「」が含まれてもOK）
-            book_match = re.search(r'『(.+?)』', line)
-            if book_match:
-                title = book_match.group(1).strip()
-                before = line[:book_match.start()].strip()
-                if before:
-                    author = before
-                after = line[book_match.end():].strip()
-                if not author and after:
-                    a_match = re.match(r'(.+?)\s*[（(]著[）)]', after)
-                    if a_match:
-                        author = a_match.group(1).strip()
-
-            # パターンB: 「タイトル」＋後続テキストも含める
-            if not title:
-                book_match = re.search(r'「(.+?)」(.+?)(?=[（(]|https?://|\s*$)', line)
-                if book_match:
-                    # 「タイトル」の後ろもタイトルの一部として結合
-                    title = book_match.group(1).strip() + book_match.group(2).strip()
-                    # 末尾の括弧内（出版社等）を除去
-                    title = re.sub(r'[（(][^）)]+[）)]$', '', title).strip()
-
-            if not title:
-                continue
-
-            results.append({
-                "title": title,
-                "author": author,
-                "publisher": None,
-            })
-        # PIVOTの参考書籍セクションがある場合は結果に関わらずここで返す
-        # （パターン6のamzn.to汎用抽出に落ちないようにする）
-        return results
-
-    # パターン5.5: flier「▼紹介した作品」セクション
-    # 形式: ▼紹介した作品
-    #       著者『タイトル』（出版社）
-    #       https://amzn.to/xxx
-    # 複数の場合: ①著者『タイトル』（出版社）
-    flier_section = re.search(
-        r'▼紹介した作品\s*\n(.*?)(?=\n▼[^紹]|\n※上記リンク|$)', summary, re.DOTALL
-    )
-
-    # パターン5.6: TBS CROSS DIG「◆書籍紹介◆」セクション
-    # 形式: ◆書籍紹介◆
-    #       ▼『タイトル』
-    #       著者
-    #       出版社
-    #       https://amzn.to/xxx
-    tbs_section = re.search(
-        r'◆書籍紹介◆\s*\n(.*?)(?=\n◆|$)', summary, re.DOTALL
-    )
-    if tbs_section:
-        section_text = tbs_section.group(1).strip()
-        lines = section_text.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # ▼『タイトル』を探す
-            title_match = re.match(r'▼『(.+?)』', line)
-            if title_match:
-                title = title_match.group(1).strip()
-                author = None
-                publisher = None
-                # 次の行で著者、その次で出版社を取得
-                if i + 1 < len(lines) and not lines[i+1].strip().startswith('http'):
-                    author = lines[i+1].strip()
-                if i + 2 < len(lines) and not lines[i+2].strip().startswith('http'):
-                    publisher = lines[i+2].strip()
-                results.append({
-                    "title": title,
-                    "author": author,
-                    "publisher": publisher,
-                })
-            i += 1
-        if results:
-            return results
-    if flier_section:
-        section_text = flier_section.group(1).strip()
-        lines = section_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('http') or line.startswith('※'):
-                continue
-            # ①②等の番号を除去
-            line = re.sub(r'^[①②③④⑤⑥⑦⑧⑨⑩]\s*', '', line)
-            # 著者『タイトル』（出版社）パターン
-            match = re.match(r'(.+?)『(.+?)』(?:（(.+?)）)?', line)
-            if match:
-                author = match.group(1).strip() if match.group(1) else None
-                title = match.group(2).strip()
-                publisher = match.group(3).strip() if match.group(3) else None
-                results.append({
-                    "title": title,
-                    "author": author,
-                    "publisher": publisher,
-                })
-        if results:
-            return results
-
-    # パターン6: 七瀬アリーサ — amzn.toリンクから書籍タイトルを抽出
-    # 形式A: 「タイトル　https://amzn.to/xxx」(同一行)
-    # 形式B: 「タイトル」+ 次行「https://amzn.to/xxx」(別行)
-    amazon_lines = re.findall(r'https?://amzn\.to/[A-Za-z0-9]+', summary)
-    if amazon_lines:
-        lines = summary.split('\n')
-        ng_words = ['Amazon', 'URL', 'リンク', '七瀬', '商品紹介', '特典',
-                    'メッセージカード', 'Success Book', '動画', '概要欄',
-                    'おすすめ順ではない', 'アソシエイト', '購入ページ',
-                    '提供:', 'Mainichi Eikaiwa', '評判', 'おすすめ本', '出演本',
-                    '参考本', 'お勧め本', 'TOEIC', '勉強本', 'オーディブル',
-                    'Audible', 'Kindle', 'Udemy', '手帳', 'プランナー',
-                    'オンライン英会話', 'AQUES', 'チャンネル登録', 'LOWYAの',
-                    'Meta Quest', 'Kindle端末', '本棚デスク', 'はこちら',
-                    'タイマー', 'トレーナー', 'ボードゲーム', 'かっさ',
-                    'テラヘルツ', 'イヤホン', 'キーボード', 'マウス',
-                    'ディスプレイ', 'モニター', 'チェア', 'ライト付き',
-                    '金フレ', 'キクタン', 'でる1000問', '公式問題集',
-                    '精選問題集', '精選模試']
-
-        for i, line in enumerate(lines):
-            line_stripped = line.strip()
-            amazon_match = re.search(r'https?://amzn\.to/[A-Za-z0-9]+', line_stripped)
-            if not amazon_match:
-                continue
-
-            title_candidate = None
-            amazon_url = amazon_match.group(0)
-
-            # 形式A: amzn.toの前にテキストがある（同一行）
-            before_url = line_stripped[:amazon_match.start()].strip()
-            if before_url and not before_url.startswith('http'):
-                title_candidate = before_url
-            # 形式B: amzn.toだけの行 → 前の行がタイトル（著者・出版社行はスキップ）
-            elif line_stripped == amazon_url and i > 0:
-                for j in range(i-1, max(i-5, -1), -1):
-                    prev_line = lines[j].strip()
-                    if not prev_line or prev_line.startswith('http'):
-                        break
-                    # 著者・出版社などのメタデータ行はスキップ（空白入りも対応: 「著　者」「監　訳」）
-                    if re.match(r'^(著[\s　]*者|監[\s　]*訳|出版社|出版|発行|発売日|価格|定価)[\s\u200f\u200e]*[：:.\s　]', prev_line):
-                        continue
-                    # 括弧だけの補足行はスキップ（例: 「(日本語版)」「（完全版）」）
-                    if re.match(r'^[（(].+[）)]$', prev_line):
-                        continue
-                    # 著者行をスキップ（例: 「エミン・ユルマズ (著)」）
-                    if re.search(r'[（(]著[）)]', prev_line) and '『' not in prev_line and '「' not in prev_line:
-                        continue
-                    title_candidate = prev_line
-                    break
-
-            if not title_candidate:
-                continue
-
-            # NGワードチェック
-            if any(ng in title_candidate for ng in ng_words):
-                continue
-
-            # クリーンアップ
-            cleaned = re.sub(r'^[*\s・※❤️📕📗📘📙🔽▽↓]+', '', title_candidate).strip()
-            # 括弧付きの補足を除去: 「タイトル(Amazon)」→「タイトル」
-            cleaned = re.sub(r'[（(](?:Amazon|Amazonリンク|アマゾン)[）)]$', '', cleaned).strip()
-            # 『』「」で囲まれている場合は外す
-            if cleaned.startswith('『') and cleaned.endswith('』'):
-                cleaned = cleaned[1:-1]
-            if cleaned.startswith('「') and cleaned.endswith('」'):
-                cleaned = cleaned[1:-1]
-
-            if cleaned and len(cleaned) > 2:
-                results.append({
-                    "title": cleaned,
-                    "author": None,
-                    "publisher": None,
-                })
-
-        if results:
-            return results
-
-    # パターン5: アバタロー「書籍の購入」セクション
-    abataro_section = re.search(
-        r'(?:【書籍の購入】|▼書籍の購入)\s*\n?(.*?)(?=\n▼|\n\n\n|\Z)', summary, re.DOTALL
-    )
-    if abataro_section:
-        section_text = abataro_section.group(1)
-        lines = section_text.strip().split('\n')
-        seen_titles = set()
-        is_first = True
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            # 非書籍行をスキップ
-            if not line or line.startswith('http') or 'エッセンシャル版' in line or '簡易版' in line:
-                i += 1
-                continue
-            # セクションヘッダー・サービス宣伝・ハッシュタグ・絵文字付き動画タイトルをスキップ
-            if (line.startswith('【') or line.startswith('#') or
-                'Audible' in line or 'Kindle' in line or 'amzn.to' in line or
-                line.startswith('📗') or line.startswith('📕') or
-                '本を聴く' in line or '関連動画' in line or
-                '分解説' in line or 'チャンネル登録' in line or
-                'SNS' in line or 'Twitter' in line or 'Instagram' in line or
-                'OUTPUT読書術' in line):
-                i += 1
-                continue
-            line = re.sub(r'^・\s*', '', line)
-            book_match = re.match(r'(.+?)(?:[｜|](.+?))?(?:[（(](.+?)[）)])?$', line)
-            if book_match:
-                title = book_match.group(1).strip()
-                author = book_match.group(2).strip() if book_match.group(2) else None
-                publisher = book_match.group(3).strip() if book_match.group(3) else None
-                if title not in seen_titles:
-                    seen_titles.add(title)
-                    results.append({
-                        "title": title,
-                        "author": author,
-                        "publisher": publisher,
-                        "_is_first": is_first,
-                    })
-                is_first = False
-            i += 1
-        if results:
-            return results
-
-    return results
-
-
 def clean_book_title(title):
     """タイトルから著者名・出版社などの付加情報を除去"""
     if not title:
@@ -630,219 +586,13 @@ def is_valid_book_title(title):
     if any(title.startswith(emoji) for emoji in emoji_starts):
         return False
 
-    # NGワード（セクションヘッダーや宣伝）を除外
-    ng_words = [
-        # 'その他',
-        # 'おすすめ動画',
-        # 'チャンネル登録',
-        # '関連動画',
-        # '動画一覧',
-        # 'SNS',
-        # 'Twitter',
-        # 'Instagram',
-        # 'LINE',
-        # 'エッセンシャル版',
-        # '簡易版',
-        'Audible版',
-        'Kindle端末',
-        # '本を聴く',
-        # '分解説',
-        # '要約',
-        # '解説',
-        # 'まとめ',
-        # 'プレゼント',
-        # 'キャンペーン',
-        # '無料',
-        # 'プロフィール',
-        # 'お問い合わせ',
-        # 'メンバーシップ',
-        # 'サブチャンネル',
-        # 七瀬アリーサ関連の宣伝を除外
-        '七瀬制作',
-        '商品紹介',
-        'メッセージカード',
-        'Success Book',
-        'Your Success',
-        '購入ページ',
-        '特典',
-        # 'おすすめ順ではない',
-        '概要欄',
-        # 'デジタル版',
-        '冊子版',
-        # YouTuber自著の宣伝を除外
-        'OUTPUT読書術',
-        '週刊SPA',
-        '人生を変える 哲学者の言葉366',
-        '瞬間英作文',
-        "呪術廻戦",
-        "https://www.amazon.co.jp/dp/4594096158",
-        # 化粧品・美容用品を除外
-        'Etude House BB cream',
-        'Biooil',
-        'Biore Sunscreen',
-        "Visse's stick concealer",
-        'Blush, eyeshadow pallet',
-        "Visse's powder foundation",
-        'Eyeblow powder',
-        "Eyebrow's mascara",
-        'lip balm',
-        "Visse's powder blush",
-        'IVY lip stick PK-300',
-        'Hair Spray',
-        'Panasonic 32mm hair iron ionity',
-        'Find out more about Star Wars',
-        'Alba',
-        'BOH',
-        'cosnori',
-        "KINUAMI",
-        'STRONG',
-        'LUSH',
-        "＆WELL",
-        "Kiva",
-        "Haddrell",
-        'Mainichi Eikaiwa',
-        # その他商品を除外
-        'フィーバーヒューティー',
-        'コーヒー豆（成城石井の）',
-        'マキシムコーヒー　デカフェ',
-        'シリカ水レジーナ',
-        'ぺんてる',
-        'ヨガマット',
-        'シリカ',
-        'VOX',
-        'コーヒーメーカー',
-        'iPad 　Pro.',
-        '蛍光ペン',
-        'Mark +蛍光ペン',
-        '多機能ボールペン',
-        'iPadカバー',
-        '蓋が見えるご飯釜',
-        'ペーパーライクフィルム',
-        '季節の珈琲',
-        'ユルム茶',
-        'ヘアスプレー',
-        'のどぬーる',
-        'デニムのやつ',
-        '足マッサージ',
-        'ホワイトボードシート',
-        'インド映画RR',
-        'バレットジャーナル',
-        # 食品・日用品を除外
-        'とんこつ',
-        '玄米ラーメン',
-        'こんにゃくラーメン',
-        '大豆麺',
-        '大自然ラーメン',
-        '無香料',
-        'イオン消臭プラス',
-        'ゆず油',
-        'UVイデアプロテクショントーンアップ',
-        'オーガニック・フェアトレード・カフェインレス・インスタントコーヒー',
-        'アイマスク',
-        'スマイルザメディカルA・DX',
-        'ぶどう山椒',
-        'プーアル茶',
-        'アンドグッドナイト薬用入浴剤',
-        'デオドラントソープ',
-        'UVプロテクト',
-        '焼肉のたれ',
-        'ウィルキンソン',
-        'ほうじ茶',
-        'オルナ オーガニック シャンプー',
-        'パキスタン産',
-        '純りんご酢',
-        '純リンゴ酢',
-        'クイックルワイパー',
-        'ビオスリー',
-        'ミヤリサン',
-        'はとむぎ',
-        'よもぎ',
-        'エキストラバージン・オリーブオイル',
-        'ザプログラスフェッドプロテイン',
-        'オーガニックフェアトレードインスタントコーヒー',
-        'ひきわり納豆',
-        'グァバ茶',
-        '低分子コラーゲン',
-        'ゼラチン',
-        'Lamicall',
-        'Tapo',
-        '象印の炎舞炊き',
-        'グレゴリー',
-        'AirPods',
-        'ゲーミング',
-        'pcメガネ',
-        'エルゴトロン',
-        'フェイク観葉植物',
-        'つばめのノート',
-        'ツバメノート',
-        '週刊',
-        '春が見つからない',
-        '鍋(ティ●ールより安いし可愛い）',
-        'チョーヤの梅酒',
-        'ドライヤースタンド',
-        'おすすめの「シューズラック」',
-        'おすすめの「水切り袋」',
-        '歯ブラシホルダー',
-        'ティーバック',
-        'カフェインレスコーヒー',
-        'カフェインレス紅茶',
-        'レンジで出来ちゃう',
-        'アイリスオーヤマ',
-        'あしゆび開き',
-        '国産有機栽培ミニヒカリ',
-        '無農薬ヒノヒカリ',
-        '特別栽培米',
-        'デザイニングアイブロウ',
-        '換気扇フィルター',
-        '永岡食品',
-        '空気清浄機',
-        'バレットジャーナル',
-        'スマホスライドベルト',
-        'ミント色の方',
-        '雪塩',
-        '海人の藻塩',
-        '特別栽培米',
-        '三重県産',
-        '青森農産',
-        'リンス',
-        'GABAN',
-        '鯖缶',
-        '缶詰',
-        'にんじんしりしり',
-        "オーディオブックが無料で聞けます",
-        "ヘッドセット",
-        "マヌカハニー",
-        "ごぼう茶",
-        "ヒマラヤピンクソルト",
-        "グラスフェッドギー",
-        "バージンココナッツオイル",
-        "♨",
-        "マイセリア",
-        "デッドオブウィンター",
-        "シャントリボディ",
-        "フットマッサージャー",
-        "1日でぜんぶ学べる 成功者の教えベストセラー100冊",
-        "魔性れの方も好き",
-        "コーヒー豆",
-        "DIME",
-        "プラズマ解離水",
-        "グレーもあるみたい",
-        "ロディアの方",
-        "多聴多読マガジン",
-        "でているようですね",
-        "あまり売ってない",
-        "The Rules of Everything Rules",
-        "脳科学者　中野信子　総まとめ",
-        "目標を立てても、なかなか行動に移せない",
-        # カードゲーム等の商品を除外
-        "XENO",
-        "通常版：",
-        "豪華版：",
-    ]
-
-    for ng in ng_words:
-        if ng in title:
-            return False
+    # NGワード（セクションヘッダーや宣伝）・YouTuber名（自著宣伝の可能性）を除外
+    # 語のリストは data/denylists.json
+    rule = denylist.first_match(title, "title_ng_words", "title_youtuber_names")
+    if rule:
+        with _denylist_hits_lock:
+            denylist_hits[rule] += 1
+        return False
 
     # 「本」だけのタイトルを除外
     if title in ['本', '書籍', '図書', 'book', 'books']:
@@ -892,12 +642,6 @@ def is_valid_book_title(title):
     if all(not c.isalnum() for c in title):
         return False
 
-    # YouTuber名が入っているものを除外（自著宣伝の可能性）
-    youtuber_names = ['アバタロー', 'サラタメ', '本要約チャンネル', '学識サロン', 'フェルミ', '三宅', '七瀬', 'アリーサ']
-    for name in youtuber_names:
-        if name in title:
-            return False
-
     return True
 
 
@@ -913,19 +657,46 @@ def normalize_title_key(title):
     return t
 
 
+# 前方一致で統合する短いキーの最小文字数
+MERGE_MIN_KEY_LEN = 5
+
+
+def build_merge_map(keys):
+    """短いキーが長いキーの先頭に含まれる場合の統合先を求める
+
+    統合先は、そのキーで始まる長いキーのうち最短のもの（同じ長さなら keys の順で先のもの）。
+    辞書順に並べると、あるキーで始まるキーはその直後に連続して並ぶので、
+    祖先（前方一致するキー）のスタックを1回走査するだけで全キーの統合先が決まる。
+
+    Returns:
+        {短いキー: 統合先のキー}。長さ順（同じ長さなら keys の順）に並ぶ。
+    """
+    order = {key: i for i, key in enumerate(keys)}
+    best = {}   # key -> そのキーで始まる長いキーの (長さ, 順序, キー) の最小値
+    stack = []  # 辞書順走査中の、互いに前方一致するキーの列
+
+    def close(key):
+        # key の部分木の最小値（key 自身を含む）を親へ伝える
+        candidate = (len(key), order[key], key)
+        if key in best:
+            candidate = min(candidate, best[key])
+        if stack and (stack[-1] not in best or candidate < best[stack[-1]]):
+            best[stack[-1]] = candidate
+
+    for key in sorted(keys):
+        while stack and not key.startswith(stack[-1]):
+            close(stack.pop())
+        stack.append(key)
+    while stack:
+        close(stack.pop())
+
+    return {key: best[key][2] for key in sorted(keys, key=len)
+            if len(key) >= MERGE_MIN_KEY_LEN and key in best}
+
+
 def merge_similar_books(all_books):
     """短いキーが長いキーの先頭に含まれる場合、同一書籍として統合"""
-    keys = sorted(all_books.keys(), key=len)
-    merge_map = {}  # short_key -> long_key (統合先)
-    for i, short_key in enumerate(keys):
-        if short_key in merge_map or len(short_key) < 5:
-            continue
-        for long_key in keys[i+1:]:
-            if long_key in merge_map:
-                continue
-            if long_key.startswith(short_key):
-                merge_map[short_key] = long_key
-                break  # 最短の統合先に統合
+    merge_map = build_merge_map(list(all_books))  # short_key -> long_key (統合先)
 
     for src_key, dst_key in merge_map.items():
         src = all_books.pop(src_key, None)
@@ -966,130 +737,135 @@ def generate_book_id(title):
 # メイン処理
 # =============================================================================
 
-def load_channels():
-    with open(CHANNELS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)["channels"]
+def plan_channel_order(channels, fetch_state, all_books):
+    """クォータ予算内で価値の高いチャンネルから取得できるよう、取得順を決める
 
+    価値 = 既存データでの書籍紹介数（そのチャンネルの書籍の出やすさ）× 前回取得からの経過日数。
+    未取得のチャンネル（fetch_state に無い）は最優先。並びが同じなら channels.json の順。
+    """
+    mentions = {}
+    for book in all_books.values():
+        for video in book.get("videos", []):
+            mentions[video.get("channel")] = mentions.get(video.get("channel"), 0) + 1
+    now = datetime.now(timezone.utc)
 
-def main():
-    parser = argparse.ArgumentParser(description="YouTube動画から書籍情報を抽出")
-    parser.add_argument("--full", action="store_true", help="全件取得（差分更新ではなく）")
-    args = parser.parse_args()
+    def value(item):
+        position, ch = item
+        since = fetch_state.get(ch["channel_id"])
+        if not since:
+            return (0, 0.0, position)
+        days = _days_since(since, now) or 0.0
+        return (1, -(mentions.get(ch["name"], 0) + 1) * (days + 1), position)
 
-    if not YOUTUBE_API_KEY:
-        print("ERROR: YOUTUBE_API_KEY が設定されていません。.env または環境変数で設定してください。")
-        sys.exit(1)
-
-    os.makedirs(DATA_DIR, exist_ok=True)
-    channels = load_channels()
+    return [ch for _, ch in sorted(enumerate(channels), key=value)]
 
-    # 差分更新の状態を読み込み
-    fetch_state = load_fetch_state() if not args.full else {}
-    new_fetch_state = {}
 
-    # 既存の書籍データを読み込み（差分更新用）
-    books_file = os.path.join(DATA_DIR, "books.json")
-    if not args.full and os.path.exists(books_file):
-        with open(books_file, "r", encoding="utf-8") as f:
-            existing_books = json.load(f)
-        # 正規化キーでマップ化
-        all_books = {}
-        for b in existing_books:
-            norm_key = normalize_title_key(b["title"])
-            b["_title_variants"] = [b["title"]]
-            all_books[norm_key] = b
-        print(f"既存データ読み込み: {len(all_books)}件")
-    else:
-        all_books = {}
+def print_denylist_hits(top=10):
+    """除外リストで書籍候補を除外した件数を、一致の多いルール順に表示"""
+    if not denylist_hits:
+        return
+    print(f"\n--- 除外リスト一致: {sum(denylist_hits.values())}件 ---")
+    for rule, n in denylist_hits.most_common(top):
+        print(f"  {rule.list_name}/{rule.category}: {rule.word} ({n}件)")
 
-    if args.full:
-        print("=== 全件取得モード ===")
-    else:
-        print("=== 差分更新モード ===")
 
+def load_channels():
+    with open(CHANNELS_FILE, "r", encoding="utf-8") as f:
+        channels = json.load(f)["channels"]
+    # エクストラクタ指定の誤りは取得を始める前に検出する
     for ch in channels:
-        channel_name = ch["name"]
-        channel_id = ch["channel_id"]
-        print(f"\n=== {channel_name} (ID: {channel_id}) ===")
+        try:
+            channel_extractors(ch)
+        except ValueError as e:
+            print(f"ERROR: channels.json の {ch['name']}: {e}")
+            sys.exit(1)
+    return channels
 
-        # 差分更新: 前回の最新動画日時以降のみ取得
-        since = fetch_state.get(channel_id) if not args.full else None
-        videos = fetch_all_channel_videos(channel_id, since=since)
 
-        # このチャンネルの最新動画日時を記録
-        if videos:
-            latest = max(v["published"] for v in videos)
-            new_fetch_state[channel_id] = latest
-        elif channel_id in fetch_state:
-            new_fetch_state[channel_id] = fetch_state[channel_id]
+def channel_extractors(ch):
+    """チャンネル定義の "extractors" から書籍抽出に使うエクストラクタを返す（未指定なら既定の全種）"""
+    return resolve_extractors(ch.get("extractors"))
 
-        for video in videos:
+
+def add_videos_to_books(all_books, videos, channel_name, extractors=None):
+    """動画リストから書籍を抽出し、正規化キー単位で all_books に集計
+
+    extractors: 概要欄から抽出する場合に使うエクストラクタ（Noneなら既定の全種）
+    """
+    for video in videos:
+        if "books" in video:
+            # チェックポイントから復元した動画は抽出済み
+            book_info_list = [dict(info) for info in video["books"]]
+        else:
             summary = video.get("summary", "")
             video_title = video.get("title", "")
-            book_info_list = extract_book_info_list(summary, video_title)
+            book_info_list = extract_book_info_list(summary, video_title, extractors)
+
+        if not book_info_list:
+            continue
+
+        for book_info in book_info_list:
+            book_title = book_info.get("title")
+            if not book_title:
+                continue
+
+            # タイトルクリーンアップ（著者名・出版社を分離）
+            book_title = clean_book_title(book_title)
+            book_info["title"] = book_title
 
-            if not book_info_list:
+            # タイトルの妥当性チェック
+            if not is_valid_book_title(book_title):
                 continue
 
-            for book_info in book_info_list:
-                book_title = book_info.get("title")
-                if not book_title:
-                    continue
-
-                # タイトルクリーンアップ（著者名・出版社を分離）
-                book_title = clean_book_title(book_title)
-                book_info["title"] = book_title
-
-                # タイトルの妥当性チェック
-                if not is_valid_book_title(book_title):
-                    continue
-
-                # 自著宣伝スキップ
-                if book_info.get("_is_first") and len(book_info_list) > 1:
-                    continue
-
-                # Amazonリンクから取得した場合は既にamazon_urlが設定されている
-                amazon_url = book_info.get("amazon_url") or generate_amazon_search_url(book_title)
-
-                # 表記揺れ統一: 正規化キーで同一書籍をグループ化
-                norm_key = normalize_title_key(book_title)
-
-                if norm_key not in all_books:
-                    all_books[norm_key] = {
-                        "id": generate_book_id(norm_key),
-                        "title": book_title,
-                        "_title_variants": [book_title],
-                        "author": book_info.get("author"),
-                        "publisher": book_info.get("publisher"),
-                        "amazon_url": amazon_url,
-                        "count": 0,
-                        "total_views": 0,
-                        "total_likes": 0,
-                        "videos": [],
-                    }
-                else:
-                    # 新しいバリエーションを記録
-                    if book_title not in all_books[norm_key]["_title_variants"]:
-                        all_books[norm_key]["_title_variants"].append(book_title)
-                    # 著者・出版社が未設定なら補完
-                    if not all_books[norm_key]["author"] and book_info.get("author"):
-                        all_books[norm_key]["author"] = book_info["author"]
-                    if not all_books[norm_key]["publisher"] and book_info.get("publisher"):
-                        all_books[norm_key]["publisher"] = book_info["publisher"]
-
-                all_books[norm_key]["count"] += 1
-                all_books[norm_key]["total_views"] += video.get("view_count", 0)
-                all_books[norm_key]["total_likes"] += video.get("like_count", 0)
-                all_books[norm_key]["videos"].append({
-                    "video_id": video["video_id"],
-                    "video_title": video["title"],
-                    "channel": channel_name,
-                    "link": video["link"],
-                    "published": video["published"],
-                    "view_count": video.get("view_count", 0),
-                    "like_count": video.get("like_count", 0),
-                })
+            # 自著宣伝スキップ
+            if book_info.get("_is_first") and len(book_info_list) > 1:
+                continue
 
+            # Amazonリンクから取得した場合は既にamazon_urlが設定されている
+            amazon_url = book_info.get("amazon_url") or generate_amazon_search_url(book_title)
+
+            # 表記揺れ統一: 正規化キーで同一書籍をグループ化
+            norm_key = normalize_title_key(book_title)
+
+            if norm_key not in all_books:
+                all_books[norm_key] = {
+                    "id": generate_book_id(norm_key),
+                    "title": book_title,
+                    "_title_variants": [book_title],
+                    "author": book_info.get("author"),
+                    "publisher": book_info.get("publisher"),
+                    "amazon_url": amazon_url,
+                    "count": 0,
+                    "total_views": 0,
+                    "total_likes": 0,
+                    "videos": [],
+                }
+            else:
+                # 新しいバリエーションを記録
+                if book_title not in all_books[norm_key]["_title_variants"]:
+                    all_books[norm_key]["_title_variants"].append(book_title)
+                # 著者・出版社が未設定なら補完
+                if not all_books[norm_key]["author"] and book_info.get("author"):
+                    all_books[norm_key]["author"] = book_info["author"]
+                if not all_books[norm_key]["publisher"] and book_info.get("publisher"):
+                    all_books[norm_key]["publisher"] = book_info["publisher"]
+
+            all_books[norm_key]["count"] += 1
+            all_books[norm_key]["total_views"] += video.get("view_count", 0)
+            all_books[norm_key]["total_likes"] += video.get("like_count", 0)
+            all_books[norm_key]["videos"].append({
+                "video_id": video["video_id"],
+                "video_title": video["title"],
+                "channel": channel_name,
+                "link": video["link"],
+                "published": video["published"],
+                "view_count": video.get("view_count", 0),
+                "like_count": video.get("like_count", 0),
+            })
+
+
+def save_books_and_rankings(all_books, store):
+    """表記揺れ統一・既存データとのマージを行ってストアに保存（JSONの書き出しは呼び出し側で行う）"""
     # --- 表記揺れ統一 ---
     # 1. 短いキーが長いキーに含まれる場合を統合
     merge_similar_books(all_books)
@@ -1107,10 +883,8 @@ def main():
     print(f"書籍数: {len(books_list)}")
 
     # --- 既存データとのマージ（ISBN等を保持） ---
-    books_file = os.path.join(DATA_DIR, "books.json")
-    if os.path.exists(books_file):
-        with open(books_file, "r", encoding="utf-8") as f:
-            existing_books = json.load(f)
+    existing_books = store.load_books(with_videos=False)
+    if existing_books:
         # idでマップ化
         existing_map = {b["id"]: b for b in existing_books}
         # タイトル正規化キーでもマップ化（IDが変わった場合に対応）
@@ -1131,41 +905,13 @@ def main():
                     book["amazon_url"] = existing["amazon_url"]
                     book["asin"] = existing["asin"]
 
-    # --- JSON生成 ---
-
-    # books.json（紹介回数順）
+    # --- 保存 ---
+    # books.json は紹介回数順（ストアの並び順）。rankings*.json は export() が各キーで並べ替える
     books_by_count = sorted(books_list, key=lambda x: x["count"], reverse=True)
-    with open(books_file, "w", encoding="utf-8") as f:
-        json.dump(books_by_count, f, ensure_ascii=False, indent=2)
-
-    # ランキング用の軽量データを生成する関数
-    def make_ranking_entry(book):
-        return {
-            "id": book["id"],
-            "title": book["title"],
-            "author": book.get("author"),
-            "count": book["count"],
-            "total_views": book["total_views"],
-            "total_likes": book["total_likes"],
-            "amazon_url": book["amazon_url"],
-        }
-
-    # rankings.json（紹介回数順）
-    rankings_count = [make_ranking_entry(b) for b in books_by_count]
-    with open(os.path.join(DATA_DIR, "rankings.json"), "w", encoding="utf-8") as f:
-        json.dump(rankings_count, f, ensure_ascii=False, indent=2)
+    store.replace_books(books_by_count)
 
-    # rankings_views.json（再生回数合計順）
     books_by_views = sorted(books_list, key=lambda x: x["total_views"], reverse=True)
-    rankings_views = [make_ranking_entry(b) for b in books_by_views]
-    with open(os.path.join(DATA_DIR, "rankings_views.json"), "w", encoding="utf-8") as f:
-        json.dump(rankings_views, f, ensure_ascii=False, indent=2)
-
-    # rankings_likes.json（いいね合計順）
     books_by_likes = sorted(books_list, key=lambda x: x["total_likes"], reverse=True)
-    rankings_likes = [make_ranking_entry(b) for b in books_by_likes]
-    with open(os.path.join(DATA_DIR, "rankings_likes.json"), "w", encoding="utf-8") as f:
-        json.dump(rankings_likes, f, ensure_ascii=False, indent=2)
 
     print(f"\n--- TOP20（紹介回数順）---")
     for i, book in enumerate(books_by_count[:20], 1):
@@ -1179,9 +925,276 @@ def main():
     for i, book in enumerate(books_by_likes[:10], 1):
         print(f"  {i}. 『{book['title']}』 (いいね{book['total_likes']:,} / 紹介{book['count']}回)")
 
+
+def carry_over_books(all_books, books, video_ids):
+    """ストアの書籍 books の紹介動画のうち video_ids に含まれるものを all_books に引き継ぐ
+
+    概要欄がキャッシュに無く再抽出できない動画の分。書籍は既存のID・タイトルのまま集計に加える。
+    """
+    for book in books:
+        videos = [v for v in book["videos"] if v["video_id"] in video_ids]
+        if not videos:
+            continue
+        norm_key = normalize_title_key(book["title"])
+        entry = all_books.get(norm_key)
+        if entry is None:
+            entry = all_books[norm_key] = {
+                "id": book["id"],
+                "title": book["title"],
+                "_title_variants": [book["title"]],
+                "author": book.get("author"),
+                "publisher": book.get("publisher"),
+                "amazon_url": book["amazon_url"],
+                "count": 0,
+                "total_views": 0,
+                "total_likes": 0,
+                "videos": [],
+            }
+        else:
+            if book["title"] not in entry["_title_variants"]:
+                entry["_title_variants"].append(book["title"])
+            if not entry["author"] and book.get("author"):
+                entry["author"] = book["author"]
+            if not entry["publisher"] and book.get("publisher"):
+                entry["publisher"] = book["publisher"]
+        for video in videos:
+            entry["count"] += 1
+            entry["total_views"] += video.get("view_count", 0)
+            entry["total_likes"] += video.get("like_count", 0)
+            entry["videos"].append(dict(video))
+
+
+def reextract_from_cache(channels, store):
+    """キャッシュ済みの概要欄だけから書籍データを再生成（API呼び出しなし）
+
+    抽出パターンを変更したときに、--full で再取得せず過去動画へ適用するためのモード。
+    キャッシュを導入する前に取得した動画など、ストアにあってキャッシュに無い動画は
+    再抽出できないので、その動画を紹介している既存の書籍をそのまま引き継ぐ。
+    fetch_state.json は変更しない。
+    """
+    if not os.path.exists(DEFAULT_CACHE_FILE):
+        print(f"ERROR: 動画キャッシュ {DEFAULT_CACHE_FILE} がありません。先に通常取得を実行してください。")
+        sys.exit(1)
+    cache = VideoCache(DEFAULT_CACHE_FILE)
+    print(f"=== 再抽出モード（キャッシュ {cache.count()}件から） ===")
+
+    stored_books = store.load_books()
+    stored_ids = {}  # チャンネル名 -> ストアにある動画ID
+    for book in stored_books:
+        for video in book["videos"]:
+            stored_ids.setdefault(video.get("channel"), set()).add(video["video_id"])
+
+    all_books = {}
+    cached_ids = set()
+    for ch in channels:
+        # 再生リストと同じく新しい順に並べ、ショート動画を除外
+        records = cache.channel_records(ch["channel_id"])
+        channel_ids = {r["video_id"] for r in records}
+        cached_ids |= channel_ids
+        videos = [video_from_record(r) for r in records if r["duration_sec"] > 60]
+        uncached = stored_ids.get(ch["name"], set()) - channel_ids
+        print(f"  {ch['name']}: {len(videos)}件" + (f"（キャッシュに無い{len(uncached)}件は既存の書籍を引き継ぐ）"
+                                                   if uncached else ""))
+        add_videos_to_books(all_books, videos, ch["name"], channel_extractors(ch))
+    cache.close()
+
+    # channels.json から外したチャンネルの動画も、キャッシュに無ければ引き継ぐ
+    uncached = set().union(*stored_ids.values()) - cached_ids if stored_ids else set()
+    if uncached:
+        print(f"  キャッシュに無い動画: {len(uncached)}件（既存の書籍を引き継ぎます）")
+        carry_over_books(all_books, stored_books, uncached)
+
+    save_books_and_rankings(all_books, store)
+    print_denylist_hits()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="YouTube動画から書籍情報を抽出")
+    parser.add_argument("--full", action="store_true", help="全件取得（差分更新ではなく）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="並列に取得するチャンネル数（既定: 1 = 逐次実行）")
+    parser.add_argument("--max-rps", type=float, default=DEFAULT_MAX_RPS,
+                        help=f"APIリクエストの全体レート上限/秒（既定: {DEFAULT_MAX_RPS}）")
+    parser.add_argument("--cache-max-age", type=float, default=DEFAULT_CACHE_MAX_AGE_DAYS,
+                        help="動画キャッシュの有効日数。これより古いレコードはAPIから再取得"
+                             f"（既定: {DEFAULT_CACHE_MAX_AGE_DAYS}）")
+    parser.add_argument("--no-cache", action="store_true", help="動画キャッシュを使わない")
+    parser.add_argument("--stats-budget", type=int, default=DEFAULT_STATS_BUDGET,
+                        help="既知動画の統計更新に使うAPI呼び出し回数（50件/回、0で無効。"
+                             f"既定: {DEFAULT_STATS_BUDGET}）")
+    parser.add_argument("--quota-budget", type=int, default=None,
+                        help="この実行で使うYouTube APIユニットの上限（既定: 本日の残り全部）")
+    parser.add_argument("--daily-quota", type=int, default=DEFAULT_DAILY_LIMIT,
+                        help=f"1日あたりのクォータ上限（既定: {DEFAULT_DAILY_LIMIT}）")
+    parser.add_argument("--resume", action="store_true",
+                        help="前回中断した実行をチェックポイントから再開（同じモードの場合のみ）")
+    parser.add_argument("--reextract", action="store_true",
+                        help="APIを呼ばず、動画キャッシュの概要欄から書籍を再抽出")
+    return parser
+
+
+def run(store, args):
+    """動画を取得して書籍を抽出し、ストアを置き換える（pipeline.py からも呼ばれる）
+
+    args は build_parser() で解析した引数。全件取得が完了しなかった場合は終了コード2で終了する。
+    """
+    if args.reextract:
+        reextract_from_cache(load_channels(), store)
+        return
+
+    if not YOUTUBE_API_KEY:
+        print("ERROR: YOUTUBE_API_KEY が設定されていません。.env または環境変数で設定してください。")
+        sys.exit(1)
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    channels = load_channels()
+
+    # 差分更新の状態を読み込み
+    fetch_state = load_fetch_state() if not args.full else {}
+    new_fetch_state = {}
+
+    # 既存の書籍データを読み込み（差分更新用）
+    if not args.full and store.count():
+        existing_books = store.load_books()
+        # 正規化キーでマップ化
+        all_books = {}
+        for b in existing_books:
+            norm_key = normalize_title_key(b["title"])
+            b["_title_variants"] = [b["title"]]
+            all_books[norm_key] = b
+        print(f"既存データ読み込み: {len(all_books)}件")
+    else:
+        all_books = {}
+
+    if args.full:
+        print("=== 全件取得モード ===")
+    else:
+        print("=== 差分更新モード ===")
+
+    global rate_limiter, video_cache, cache_max_age_days, quota
+    rate_limiter = RateLimiter(args.max_rps)
+    quota = QuotaTracker(run_budget=args.quota_budget, daily_limit=args.daily_quota)
+    print(f"クォータ予算: {quota.budget}ユニット (本日使用済み {quota.used_before} / {quota.daily_limit})")
+    if not args.no_cache:
+        video_cache = VideoCache(DEFAULT_CACHE_FILE)
+        cache_max_age_days = args.cache_max_age
+        print(f"動画キャッシュ: {video_cache.count()}件 (有効期間 {args.cache_max_age:g}日)")
+    workers = max(1, args.workers)
+    if workers > 1:
+        print(f"並列取得: {workers}ワーカー / 最大{args.max_rps:g}リクエスト/秒")
+
+    checkpoints = CheckpointStore()
+    if checkpoints.start("full" if args.full else "incremental", resume=args.resume):
+        print("チェックポイントから再開します")
+    channel_checkpoints = {}
+
+    def fetch_channel(ch):
+        """(動画リスト, 完了したか) を返す。クォータ切れなら未完了として打ち切る"""
+        if quota.exhausted:
+            return [], False
+        print(f"\n=== {ch['name']} (ID: {ch['channel_id']}) ===")
+        # 差分更新: 前回の最新動画日時以降のみ取得
+        since = fetch_state.get(ch["channel_id"]) if not args.full else None
+        label = f"[{ch['name']}] " if workers > 1 else ""
+        checkpoint = checkpoints.channel(ch["channel_id"], since)
+        channel_checkpoints[ch["channel_id"]] = checkpoint
+        try:
+            return fetch_all_channel_videos(ch["channel_id"], since=since, executor=batch_executor,
+                                            label=label, checkpoint=checkpoint,
+                                            extractors=channel_extractors(ch)), True
+        except QuotaExhausted:
+            print(f"  {label}[STOP] クォータ予算切れのため中断（次回このチャンネルから再取得）")
+            return [], False
+
+    # 価値の高いチャンネルから取得し、予算切れでも重要なものを取りこぼさないようにする
+    ordered_channels = plan_channel_order(channels, fetch_state, all_books)
+    print("取得順: " + " → ".join(ch["name"] for ch in ordered_channels))
+
+    # チャンネル単位とバッチ単位でExecutorを分ける（入れ子の待ち合わせによるデッドロック回避）
+    channel_executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    batch_executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    fetched = dict(zip(
+        (ch["channel_id"] for ch in ordered_channels),
+        channel_executor.map(fetch_channel, ordered_channels)
+        if channel_executor else map(fetch_channel, ordered_channels),
+    ))
+
+    # 集計はチャンネル定義順に行うため、取得順や並列度に関わらず結果は同一になる
+    incomplete = []
+    for ch in channels:
+        channel_name = ch["name"]
+        channel_id = ch["channel_id"]
+        videos, completed = fetched[channel_id]
+        if not completed:
+            # 途中までの結果は使わず、取得状態も進めない（次回同じ位置から再取得）
+            incomplete.append(channel_name)
+            if channel_id in fetch_state:
+                new_fetch_state[channel_id] = fetch_state[channel_id]
+            continue
+
+        # このチャンネルの最新動画日時を記録
+        if videos:
+            latest = max(v["published"] for v in videos)
+            new_fetch_state[channel_id] = latest
+        elif channel_id in fetch_state:
+            new_fetch_state[channel_id] = fetch_state[channel_id]
+
+        add_videos_to_books(all_books, videos, channel_name, channel_extractors(ch))
+
+    # 差分取得では既知動画の統計が古いままなので、新着取得の残り予算で優先度の高いものから更新
+    stats_budget = 0 if quota.exhausted else min(args.stats_budget, quota.remaining)
+    try:
+        refresh_video_stats(all_books, stats_budget, executor=batch_executor, store=store)
+    except QuotaExhausted:
+        print("  [STOP] クォータ予算切れのため統計更新を中断（取得済み分は反映）")
+
+    if channel_executor:
+        channel_executor.shutdown()
+        batch_executor.shutdown()
+
+    quota.summary()
+    quota.save()
+
+    if incomplete:
+        print(f"\n未完了のチャンネル: {', '.join(incomplete)}")
+        if args.full:
+            # 全件取得は既存データを置き換えるため、欠けた状態では保存しない
+            # （取得済みの動画はキャッシュに残るので、再実行時のクォータ消費は小さい）
+            print("全件取得が完了しなかったため、books.json / rankings*.json は更新しません。")
+            print("続きは --full --resume で再開できます。")
+            if video_cache:
+                video_cache.close()
+            sys.exit(2)
+
+    save_books_and_rankings(all_books, store)
+    # この実行で詳細を取得した動画の統計は最新
+    store.record_stats_refresh(sorted(fresh_video_ids))
+
     # --- 取得状態を保存 ---
     save_fetch_state(new_fetch_state)
 
+    # 出力に反映済みのチャンネルのチェックポイントは不要（未完了分だけ残して --resume で再開）
+    if incomplete:
+        for checkpoint in channel_checkpoints.values():
+            if checkpoint.done:
+                checkpoint.delete()
+        print("未完了のチャンネルは --resume で続きから取得できます。")
+    else:
+        checkpoints.clear()
+
+    if video_cache:
+        print(f"\n動画キャッシュ: ヒット{video_cache.hits}件 / ミス{video_cache.misses}件")
+        video_cache.close()
+    print_denylist_hits()
+    http_client.print_stats()
+
+
+def main():
+    args = build_parser().parse_args()
+    store = book_store.open_store()
+    run(store, args)
+    store.export()
+    store.close()
     print(f"\nデータを {DATA_DIR} に保存しました。")
 
 
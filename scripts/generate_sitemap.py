@@ -2,15 +2,20 @@
 """
 Generate sitemap.xml for the business book ranking site
 """
-import json
 from datetime import datetime
 from pathlib import Path
 
-def generate_sitemap():
-    # Load books data
-    data_dir = Path(__file__).parent.parent / "data"
-    with open(data_dir / "books.json", "r", encoding="utf-8") as f:
-        books = json.load(f)
+import book_store
+from artifact_writer import ArtifactWriter
+
+SITEMAP_FILE = Path(__file__).parent.parent / "frontend" / "public" / "sitemap.xml"
+
+def generate_sitemap(book_ids=None):
+    # Load book IDs from the store (the pipeline passes them in)
+    if book_ids is None:
+        store = book_store.open_store()
+        book_ids = store.book_ids()
+        store.close()
     
     # Base URL - update this to your actual domain
     base_url = "https://business.douga-summary.jp"
@@ -37,8 +42,7 @@ def generate_sitemap():
         sitemap.append("  </url>")
     
     # Add book detail pages
-    for book in books:
-        book_id = book.get("id")
+    for book_id in book_ids:
         if book_id:
             sitemap.append("  <url>")
             sitemap.append(f"    <loc>{base_url}/book/{book_id}</loc>")
@@ -51,12 +55,12 @@ def generate_sitemap():
     sitemap.append("</urlset>")
     
     # Write sitemap
-    output_path = Path(__file__).parent.parent / "frontend" / "public" / "sitemap.xml"
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(sitemap))
-    
-    print(f"✓ Sitemap generated: {output_path}")
-    print(f"  Total URLs: {len(static_pages) + len(books)}")
+    output_path = SITEMAP_FILE
+    if ArtifactWriter().write_text("\n".join(sitemap), str(output_path)):
+        print(f"✓ Sitemap generated: {output_path}")
+    else:
+        print(f"✓ Sitemap unchanged: {output_path}")
+    print(f"  Total URLs: {len(static_pages) + len(book_ids)}")
 
 if __name__ == "__main__":
     generate_sitemap()
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""各スクリプト共通のHTTPクライアント
+
+- ホストごとに keep-alive 接続をプールして再利用（TCP/TLSハンドシェイクを削減）
+- gzip/deflate 圧縮レスポンスに対応（Accept-Encoding を常に送信）
+- タイムアウト・リトライ（接続エラー/5xx）を全スクリプトで統一
+- ホストごとのリクエスト数・転送量を集計
+- ホストごとのレート制限（トークンバケット、set_rate_limit で設定）
+- 429/403 が続いたAPIを一定時間呼ばないためのサーキットブレーカー（CircuitBreaker）
+
+使用例:
+    import http_client
+    data = http_client.get_json("https://api.openbd.jp/v1/get", {"isbn": isbn})
+    http_client.set_rate_limit("ndlsearch.ndl.go.jp", 1.0)  # 1リクエスト/秒
+    http_client.print_stats()
+
+HTTPエラーは urllib と同じ urllib.error.HTTPError を送出するので、
+既存の `except urllib.error.HTTPError as e: e.code` はそのまま使える。
+"""
+
+import email.message
+import email.utils
+import gzip
+import http.client
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 1.0  # 秒（試行ごとに倍増）
+MAX_REDIRECTS = 5
+MAX_IDLE_PER_HOST = 8
+
+USER_AGENT = "business-book-ranking/1.0 (+https://business.douga-summary.jp)"
+
+# 再利用中の接続がサーバー側で切られていた場合に出る例外（新しい接続で即再送する）
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+# リトライ対象の一時的な通信エラー
+_TRANSIENT_ERRORS = (
+    http.client.HTTPException,
+    OSError,  # socket.timeout / ConnectionError を含む
+)
+_RETRY_STATUS = {500, 502, 503, 504}
+_REDIRECT_STATUS = {301, 302, 303, 307, 308}
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制限（スレッドセーフ）
+
+    平均 rate 回/秒、最大 burst 回まで連続して通す。
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """トークンを1つ取得する（なければ補充されるまで待つ）。待った秒数を返す"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitOpen(Exception):
+    """サーキットブレーカーが開いているため呼び出しを見送った"""
+
+
+class CircuitBreaker:
+    """失敗が続いたAPIの呼び出しを一定時間止めるサーキットブレーカー（スレッドセーフ）
+
+    threshold 回連続で失敗すると開き、cooldown 秒（Retry-After があればその秒数）の間
+    check() は CircuitOpen を送出する。期間が過ぎると1件だけ試行を通し（半開）、
+    成功すれば閉じ、失敗すれば再び開く。試行がどちらとも判断できない結果（レート制限と
+    関係のないエラーなど）に終わったときは release_probe() で次の試行を通せるようにする。
+    """
+
+    def __init__(self, name, threshold=3, cooldown=900):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.trips = 0
+        self._open_until = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        """開いていれば CircuitOpen を送出する。半開の試行として通したときは True を返す"""
+        with self._lock:
+            if self._open_until is None:
+                return False
+            if time.monotonic() >= self._open_until and not self._probing:
+                self._probing = True  # 半開: この1件の結果で閉じるか再び開くかを決める
+                return True
+            remaining = max(self._open_until - time.monotonic(), 0)
+        raise CircuitOpen(f"{self.name} は停止中（あと{remaining:.0f}秒）")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._open_until = None
+            self._probing = False
+
+    def release_probe(self):
+        """半開の試行を、閉じも開き直しもせずに終える（次の check() で再び試行を通す）"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self, retry_after=None):
+        """失敗を記録する。開いた場合は True を返す
+
+        Args:
+            retry_after: レスポンスの Retry-After（秒）。あれば停止期間に使う
+        """
+        with self._lock:
+            self.failures += 1
+            if not self._probing and self.failures < self.threshold:
+                return False
+            wait = retry_after if retry_after is not None else self.cooldown
+            self._open_until = time.monotonic() + wait
+            self._probing = False
+            self.trips += 1
+        print(f"  [WARN] {self.name}: 失敗が{self.failures}回続いたため{wait:.0f}秒停止します")
+        return True
+
+
+def parse_retry_after(headers):
+    """Retry-After ヘッダー（秒数またはHTTP日付）を秒数で返す（無ければ None）"""
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0)
+
+
+class HttpClient:
+    """ホスト単位の keep-alive 接続プールを持つスレッドセーフなHTTPクライアント"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._idle = {}      # (scheme, host, port) -> [HTTPConnection, ...]
+        self._stats = {}     # host -> {"requests", "wire_bytes", "bytes", "errors", "connections", "wait"}
+        self._limiters = {}  # host -> TokenBucket
+
+    # ------------------------------------------------------------------
+    # 接続プール
+    # ------------------------------------------------------------------
+
+    def _acquire(self, key):
+        """アイドル接続を取り出す。なければ新規作成。(conn, reused) を返す"""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+            self._count(key[1], "connections")
+        scheme, host, port = key
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return conn_cls(host, port, timeout=self.timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """プール中の全接続を閉じる"""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for conn in conns:
+                conn.close()
+
+    # ------------------------------------------------------------------
+    # レート制限
+    # ------------------------------------------------------------------
+
+    def set_rate_limit(self, host, rate, burst=1):
+        """host へのリクエストを平均 rate 回/秒（最大 burst 回連続）に制限する。rate=None で解除"""
+        with self._lock:
+            if rate is None:
+                self._limiters.pop(host, None)
+            else:
+                self._limiters[host] = TokenBucket(rate, burst)
+
+    def _throttle(self, host):
+        limiter = self._limiters.get(host)
+        if limiter:
+            waited = limiter.acquire()
+            if waited:
+                with self._lock:
+                    self._count(host, "wait", waited)
+
+    # ------------------------------------------------------------------
+    # 統計
+    # ------------------------------------------------------------------
+
+    def _count(self, host, field, amount=1):
+        # 呼び出し側で self._lock を保持していること
+        entry = self._stats.setdefault(host, {
+            "requests": 0, "wire_bytes": 0, "bytes": 0, "errors": 0, "connections": 0,
+            "wait": 0.0,
+        })
+        entry[field] += amount
+
+    def stats(self):
+        """ホストごとの集計（リクエスト数・転送バイト数・展開後バイト数など）のコピーを返す"""
+        with self._lock:
+            return {host: dict(entry) for host, entry in self._stats.items()}
+
+    # ------------------------------------------------------------------
+    # リクエスト
+    # ------------------------------------------------------------------
+
+    def _send_once(self, key, path, headers, timeout):
+        """1回のリクエストを送信し (status, headers, 生ボディ) を返す"""
+        for _ in range(2):
+            conn, reused = self._acquire(key)
+            conn.timeout = timeout
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    # keep-alive切れ: 新しい接続で送り直す（リトライ回数には数えない）
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+            return resp.status, resp.headers, body
+        raise http.client.RemoteDisconnected("connection closed by peer")
+
+    def request(self, url, params=None, headers=None, timeout=None, retries=None, on_attempt=None):
+        """GETリクエストを送信し、展開済みのレスポンスボディ(bytes)を返す
+
+        Args:
+            url: リクエストURL
+            params: クエリパラメータ（dict）。URLに付与される。
+            headers: 追加ヘッダー
+            timeout: タイムアウト秒（Noneなら既定値）
+            retries: 接続エラー/5xx 時のリトライ回数（Noneなら既定値）
+            on_attempt: 送信のたびに（リトライ・リダイレクト先も含めて）呼ばれる関数。
+                送信1回ごとに課金されるAPIの計上用で、例外を送出すると送信せずに中断する。
+
+        Raises:
+            urllib.error.HTTPError: 4xx、またはリトライ後も 5xx の場合
+            OSError / http.client.HTTPException: リトライ後も通信できない場合
+        """
+        if params:
+            sep = "&" if "?" in url else "?"
+            url = f"{url}{sep}{urllib.parse.urlencode(params)}"
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+
+        req_headers = {
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": USER_AGENT,
+            "Connection": "keep-alive",
+        }
+        if headers:
+            req_headers.update(headers)
+
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            key = (parts.scheme, parts.hostname, parts.port)
+            path = parts.path or "/"
+            if parts.query:
+                path += "?" + parts.query
+            req_headers["Host"] = parts.netloc
+
+            for attempt in range(retries + 1):
+                if on_attempt:
+                    on_attempt()
+                self._throttle(parts.hostname)
+                try:
+                    status, resp_headers, raw = self._send_once(key, path, req_headers, timeout)
+                except _TRANSIENT_ERRORS:
+                    with self._lock:
+                        self._count(parts.hostname, "requests")
+                        self._count(parts.hostname, "errors")
+                    if attempt < retries:
+                        time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                        continue
+                    raise
+                body = _decode_body(raw, resp_headers.get("Content-Encoding"))
+                with self._lock:
+                    self._count(parts.hostname, "requests")
+                    self._count(parts.hostname, "wire_bytes", len(raw))
+                    self._count(parts.hostname, "bytes", len(body))
+                    if status >= 400:
+                        self._count(parts.hostname, "errors")
+                if status in _RETRY_STATUS and attempt < retries:
+                    time.sleep(RETRY_BACKOFF * (2 ** attempt))
+                    continue
+                break
+
+            if status in _REDIRECT_STATUS and resp_headers.get("Location"):
+                url = urllib.parse.urljoin(url, resp_headers["Location"])
+                continue
+            if status >= 400:
+                raise _http_error(url, status, resp_headers, body)
+            return body
+
+        raise urllib.error.HTTPError(url, status, "too many redirects", resp_headers, None)
+
+    def get_text(self, url, params=None, encoding="utf-8", **kwargs):
+        """GETしてテキストで返す"""
+        return self.request(url, params, **kwargs).decode(encoding)
+
+    def get_json(self, url, params=None, **kwargs):
+        """GETしてJSONとして解釈した結果を返す"""
+        return json.loads(self.request(url, params, **kwargs).decode("utf-8"))
+
+
+def _decode_body(raw, content_encoding):
+    """Content-Encoding に応じてレスポンスボディを展開"""
+    encoding = (content_encoding or "").lower()
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(raw)
+        except zlib.error:
+            # 生deflate（zlibヘッダーなし）を返すサーバー向け
+            return zlib.decompress(raw, -zlib.MAX_WBITS)
+    return raw
+
+
+def _http_error(url, status, resp_headers, body):
+    """urllib 互換の HTTPError を生成（e.code / e.headers / e.read() が使える）"""
+    hdrs = email.message.Message()
+    for name, value in resp_headers.items():
+        hdrs[name] = value
+    reason = http.client.responses.get(status, "")
+    return urllib.error.HTTPError(url, status, reason, hdrs, io.BytesIO(body))
+
+
+# =============================================================================
+# 共有インスタンス
+# =============================================================================
+
+_default_client = HttpClient()
+
+
+def request(url, params=None, **kwargs):
+    """共有クライアントでGETし、展開済みボディ(bytes)を返す"""
+    return _default_client.request(url, params, **kwargs)
+
+
+def get_text(url, params=None, **kwargs):
+    """共有クライアントでGETし、テキストで返す"""
+    return _default_client.get_text(url, params, **kwargs)
+
+
+def get_json(url, params=None, **kwargs):
+    """共有クライアントでGETし、JSONで返す"""
+    return _default_client.get_json(url, params, **kwargs)
+
+
+def set_rate_limit(host, rate, burst=1):
+    """共有クライアントで host へのリクエストを平均 rate 回/秒に制限する"""
+    _default_client.set_rate_limit(host, rate, burst)
+
+
+def stats():
+    """共有クライアントのホスト別集計を返す"""
+    return _default_client.stats()
+
+
+def print_stats():
+    """ホスト別のリクエスト数・転送量を表示"""
+    host_stats = stats()
+    if not host_stats:
+        return
+    print("\n--- HTTP統計（ホスト別）---")
+    for host, s in sorted(host_stats.items()):
+        saved = 1 - s["wire_bytes"] / s["bytes"] if s["bytes"] else 0
+        print(f"  {host}: {s['requests']}リクエスト / 接続{s['connections']} / "
+              f"転送{s['wire_bytes']:,}B (展開後{s['bytes']:,}B, 圧縮率{saved:.0%}) / "
+              f"エラー{s['errors']}" + (f" / 待機{s['wait']:.1f}秒" if s["wait"] else ""))
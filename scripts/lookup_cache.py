@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""書誌情報API（NDL・openBD・Google Books）の検索結果を保存する永続キャッシュ（SQLite）
+
+(ソース, 正規化した検索語) をキーに結果をJSONで保存し、ソースごとの有効期限まで再利用する。
+「見つからなかった」結果も否定キャッシュとして短めの期限で保存するので、
+前回 NOT FOUND だった書籍に毎回同じ問い合わせを繰り返さない。
+通信エラーや429などの一時的な失敗は保存しない（呼び出し側で put しない）。
+
+使用例:
+    import lookup_cache
+    cached = lookup_cache.get("ndl", title)
+    if cached is lookup_cache.MISS:
+        isbn = ...  # APIに問い合わせる
+        lookup_cache.put("ndl", title, isbn)  # None なら否定キャッシュ
+    lookup_cache.print_stats()
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DEFAULT_CACHE_FILE = os.path.join(DATA_DIR, "lookup_cache.sqlite3")
+
+# ソースごとの有効日数 (見つかった結果, 見つからなかった結果)
+TTL_DAYS = {
+    "ndl": (180, 14),
+    "google_books": (90, 7),
+    "openbd": (30, 7),
+}
+DEFAULT_TTL_DAYS = (30, 7)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    source      TEXT NOT NULL,
+    query       TEXT NOT NULL,
+    value       TEXT,
+    found       INTEGER NOT NULL,
+    fetched_at  TEXT NOT NULL,
+    expires_at  TEXT NOT NULL,
+    PRIMARY KEY (source, query)
+);
+"""
+
+# キャッシュに無い（または期限切れ）ことを表す値。None は否定キャッシュのヒット
+MISS = object()
+
+
+def _iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalize_query(query):
+    """空白の揺れと英字の大小を無視したキーにする"""
+    return " ".join(str(query).split()).lower()
+
+
+class LookupCache:
+    """検索結果のSQLiteストア（スレッド間で共有可能）"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.stats = {}  # source -> {"hits", "negative_hits", "misses"}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _count(self, source, field):
+        # 呼び出し側で self._lock を保持していること
+        entry = self.stats.setdefault(source, {"hits": 0, "negative_hits": 0, "misses": 0})
+        entry[field] += 1
+
+    def get(self, source, query):
+        """キャッシュ済みの結果を返す（無い・期限切れなら MISS、否定キャッシュなら None）"""
+        now = _iso(datetime.now(timezone.utc))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, found FROM lookups WHERE source = ? AND query = ? AND expires_at > ?",
+                (source, normalize_query(query), now),
+            ).fetchone()
+            if row is None:
+                self._count(source, "misses")
+                return MISS
+            if not row[1]:
+                self._count(source, "negative_hits")
+                return None
+            self._count(source, "hits")
+        return json.loads(row[0])
+
+    def put(self, source, query, value):
+        """結果を保存（value が None なら否定キャッシュとして短い期限で保存）"""
+        found_ttl, missing_ttl = TTL_DAYS.get(source, DEFAULT_TTL_DAYS)
+        now = datetime.now(timezone.utc)
+        expires = now + timedelta(days=found_ttl if value is not None else missing_ttl)
+        row = (source, normalize_query(query),
+               json.dumps(value, ensure_ascii=False) if value is not None else None,
+               int(value is not None), _iso(now), _iso(expires))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lookups "
+                "(source, query, value, found, fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                row,
+            )
+
+    def purge_expired(self):
+        """期限切れのエントリを削除し、削除件数を返す"""
+        now = _iso(datetime.now(timezone.utc))
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM lookups WHERE expires_at <= ?", (now,)).rowcount
+
+
+# =============================================================================
+# 共有インスタンス（最初に使われたときに開く）
+# =============================================================================
+
+_default_cache = None
+_default_lock = threading.Lock()
+enabled = True  # False にすると get は常に MISS を返し、put も行わない
+
+
+def _cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LookupCache(DEFAULT_CACHE_FILE)
+            _default_cache.purge_expired()
+        return _default_cache
+
+
+def get(source, query):
+    """共有キャッシュから結果を返す（無い・期限切れなら MISS）"""
+    if not enabled:
+        return MISS
+    return _cache().get(source, query)
+
+
+def put(source, query, value):
+    """共有キャッシュに結果を保存（None は否定キャッシュ）"""
+    if enabled:
+        _cache().put(source, query, value)
+
+
+def print_stats():
+    """ソース別のキャッシュヒット率を表示"""
+    if _default_cache is None or not _default_cache.stats:
+        return
+    print("\n--- 検索キャッシュ（ソース別）---")
+    for source, s in sorted(_default_cache.stats.items()):
+        total = s["hits"] + s["negative_hits"] + s["misses"]
+        rate = (s["hits"] + s["negative_hits"]) / total if total else 0
+        print(f"  {source}: ヒット率{rate:.0%} (ヒット{s['hits']} / 否定ヒット{s['negative_hits']} / "
+              f"ミス{s['misses']})")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""openBD API クライアント（複数ISBNの一括取得）
+
+openBD の get エンドポイントはカンマ区切りで複数のISBNを受け付け、
+指定した順に書籍データ（見つからないISBNは null）の配列を返す。
+fetch_openbd_bulk は全ISBNをまとめて数回のリクエストで取得する。
+取得結果は検索キャッシュ（lookup_cache）に保存し、有効期限内のISBNは問い合わせない。
+
+使用例:
+    import openbd
+    records = openbd.fetch_openbd_bulk(["9784478025819", "9784863940246"])
+    data = records.get("9784478025819")  # 見つからなければ None
+"""
+
+import http_client
+import lookup_cache
+
+OPENBD_API = "https://api.openbd.jp/v1/get"
+
+# 1リクエストで問い合わせるISBN数（APIの上限は1000件。GETのURL長を抑えるため小さめにする）
+OPENBD_BATCH_SIZE = 200
+# 一括取得はレスポンスが大きいのでタイムアウトを長めにする
+OPENBD_BULK_TIMEOUT = 30
+
+
+def fetch_openbd_bulk(isbns, batch_size=OPENBD_BATCH_SIZE):
+    """ISBNのリストをまとめて問い合わせ、{ISBN: openBDデータ} を返す
+
+    見つからなかったISBN・エラーになったバッチのISBNは結果に含まれない。
+    """
+    records = {}
+    pending = []
+    for isbn in dict.fromkeys(isbn for isbn in isbns if isbn):
+        cached = lookup_cache.get("openbd", isbn)
+        if cached is lookup_cache.MISS:
+            pending.append(isbn)
+        elif cached is not None:
+            records[isbn] = cached
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        # ISBNは数字とXだけなのでカンマをエスケープせずにそのまま渡す
+        url = f"{OPENBD_API}?isbn={','.join(batch)}"
+        try:
+            data = http_client.get_json(url, timeout=OPENBD_BULK_TIMEOUT)
+        except Exception as e:
+            print(f"  [ERROR] openBD API ({len(batch)}件): {e}")
+            continue
+        # openBDは指定順の配列を返す。存在しないISBNは null（否定キャッシュとして保存）
+        for isbn, item in zip(batch, data or []):
+            lookup_cache.put("openbd", isbn, item or None)
+            if item:
+                records[isbn] = item
+    return records
+
+
+def fetch_openbd(isbn):
+    """openBD API でISBNから書籍情報を取得（見つからなければ None）"""
+    return fetch_openbd_bulk([isbn]).get(isbn)
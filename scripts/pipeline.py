@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""書籍データ更新の各ステージを1プロセスで順に実行するランナー
+
+ストアを1回だけ開き、選んだステージを依存順（DATA_STAGES の順）に実行して、
+最後に JSON（export）と sitemap.xml・検索インデックスを1回だけ書き出す。
+
+各ステージは「読む入力」のハッシュ（ステージのコード + ストア上の該当データ）を
+data/pipeline_state.json に記録し、前回から変わっていなければ実行しない。
+ハッシュは実行後の状態で記録するので、同じ入力での再実行（何も変わらない実行）を省ける。
+YouTube から新着を取る fetch_videos は入力を事前に知れないため、選べば毎回実行する。
+
+使用例:
+    python scripts/pipeline.py                                   # 全ステージ
+    python scripts/pipeline.py --stages fetch_videos             # 動画取得 → 書き出し
+    python scripts/pipeline.py --stages fetch_amazon merge_by_isbn add_asin unify_titles
+    python scripts/pipeline.py --videos-args="--workers 4" --amazon-args="--workers 8"
+    python scripts/pipeline.py --force                           # ハッシュを無視して全部実行
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import add_asin_from_isbn
+import book_store
+import build_search_index
+import fetch_amazon
+import fetch_videos
+import generate_sitemap
+import merge_by_isbn
+import ranking_windows
+import unify_titles_by_isbn
+from fetch_checkpoint import atomic_write_json
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+STATE_FILE = os.path.join(DATA_DIR, "pipeline_state.json")
+
+# name: ステージ名
+# sources: 入力ハッシュに含めるコード（変更したらステージを再実行する）
+# inputs: ストアからステージが読むデータを返す関数（None を返したら毎回実行）
+# run: ステージの実行 (store, args) -> None
+# outputs: 書き出すファイル（無くなっていたら入力が同じでも実行する）
+Stage = namedtuple("Stage", ["name", "sources", "inputs", "run", "outputs"])
+
+
+def _file_digest(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _amazon_inputs(store):
+    # 見送った書籍があるときは入力が同じでも再実行する（レート制限が解けていれば取れる）
+    if os.path.exists(fetch_amazon.DEFERRED_FILE):
+        return None
+    return {
+        "books": [(b["id"], b["title"]) for b in store.books_without_isbn()],
+        "csv": _file_digest(fetch_amazon.CSV_FILE),
+    }
+
+
+DATA_STAGES = (
+    Stage("fetch_videos", [fetch_videos.__file__],
+          lambda store: None,
+          lambda store, args: fetch_videos.run(
+              store, fetch_videos.build_parser().parse_args(shlex.split(args.videos_args))),
+          []),
+    Stage("fetch_amazon", [fetch_amazon.__file__],
+          _amazon_inputs,
+          lambda store, args: fetch_amazon.run(
+              store, fetch_amazon.build_parser().parse_args(shlex.split(args.amazon_args))),
+          []),
+    Stage("merge_by_isbn", [merge_by_isbn.__file__],
+          lambda store: [(b["id"], b["isbn"]) for b in store.books_with_isbn()],
+          lambda store, args: merge_by_isbn.run(store),
+          []),
+    Stage("add_asin", [add_asin_from_isbn.__file__],
+          lambda store: [(b["id"], b["isbn"], b.get("asin"), b["amazon_url"])
+                         for b in store.books_with_isbn()],
+          lambda store, args: add_asin_from_isbn.run(store),
+          []),
+    Stage("unify_titles", [unify_titles_by_isbn.__file__],
+          lambda store: [(b["id"], b["isbn"], b["title"], b.get("openbd_title"))
+                         for b in store.books_with_isbn()],
+          lambda store, args: unify_titles_by_isbn.run(store),
+          []),
+)
+
+# 選んだステージに関わらず最後に実行する書き出し
+ARTIFACT_STAGES = (
+    # 期間別ランキング（直近N日）は日付が変わると変わるので、実行日（UTC）も入力に含める
+    Stage("export", [book_store.__file__, ranking_windows.__file__],
+          lambda store: [datetime.now(timezone.utc).date().isoformat(), store.load_catalog()],
+          lambda store, args: store.export(),
+          book_store.exported_paths()),
+    Stage("sitemap", [generate_sitemap.__file__],
+          lambda store: store.book_ids(),
+          lambda store, args: generate_sitemap.generate_sitemap(store.book_ids()),
+          [str(generate_sitemap.SITEMAP_FILE)]),
+    # normalize_title_key は fetch_videos にあるので、そのコードもハッシュに含める
+    Stage("search_index", [build_search_index.__file__, fetch_videos.__file__],
+          build_search_index.search_inputs,
+          lambda store, args: build_search_index.generate_search_index(store),
+          [os.path.join(build_search_index.SEARCH_DIR, build_search_index.docs_file(0))]),
+)
+
+STAGE_NAMES = [stage.name for stage in DATA_STAGES]
+
+
+def input_hash(stage, store):
+    """ステージのコードと入力データのハッシュ（入力を事前に知れないステージは None）"""
+    inputs = stage.inputs(store)
+    if inputs is None:
+        return None
+    h = hashlib.sha256()
+    for path in stage.sources:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    h.update(json.dumps(inputs, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_stage(stage, store, args, state):
+    """入力が前回と同じならスキップし、実行したら実行後の入力ハッシュを記録する"""
+    if not args.force:
+        digest = input_hash(stage, store)
+        if (digest is not None and state.get(stage.name) == digest
+                and all(os.path.exists(path) for path in stage.outputs)):
+            print(f"\n### {stage.name}: 入力に変更がないためスキップ ###")
+            return False
+    print(f"\n### {stage.name} ###")
+    start = time.perf_counter()
+    stage.run(store, args)
+    state[stage.name] = input_hash(stage, store)
+    atomic_write_json(STATE_FILE, state)
+    print(f"### {stage.name}: {time.perf_counter() - start:.1f}秒 ###")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="書籍データ更新のステージをまとめて実行")
+    parser.add_argument("--stages", nargs="+", choices=STAGE_NAMES, default=STAGE_NAMES,
+                        help="実行するステージ（既定: 全部。指定順に関わらず依存順に実行）")
+    parser.add_argument("--force", action="store_true",
+                        help="入力ハッシュを無視して選んだステージと書き出しをすべて実行")
+    parser.add_argument("--videos-args", default="",
+                        help="fetch_videos ステージに渡す引数（例: \"--full --workers 4\"）")
+    parser.add_argument("--amazon-args", default="",
+                        help="fetch_amazon ステージに渡す引数（例: \"--workers 8\"）")
+    args = parser.parse_args()
+
+    selected = [stage for stage in DATA_STAGES if stage.name in args.stages]
+    state = load_state()
+    store = book_store.open_store()
+    ran = []
+    for stage in list(selected) + list(ARTIFACT_STAGES):
+        if run_stage(stage, store, args, state):
+            ran.append(stage.name)
+    store.close()
+
+    skipped = [s.name for s in list(selected) + list(ARTIFACT_STAGES) if s.name not in ran]
+    print(f"\n=== パイプライン完了 ===")
+    print(f"実行: {', '.join(ran) or 'なし'}")
+    if skipped:
+        print(f"スキップ: {', '.join(skipped)}")
+
+
+if __name__ == "__main__":
+    main()
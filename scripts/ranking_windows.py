@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""期間別ランキング（直近7日・30日・365日と暦年ごと）の集計
+
+書籍ごとに紹介動画を公開日順に並べた時系列と、再生回数・いいね数の累積和を持つ（BookSeries）。
+期間の集計は公開日の配列を二分探索して累積和の差を取るだけなので、期間をいくつ増やしても
+書籍の動画リストを期間ごとに走査し直さない。
+
+時系列はストアの book_series テーブルに保存し（book_store.BookStore.update_series）、export のたびに
+前回から増えた動画だけを末尾に足す（BookSeries.extend。過去の日付の動画が混ざったときだけ並べ直す）。
+紹介動画が外れた書籍と、前回の保存より後に統計を取得し直した動画（video_stats）を含む書籍は、
+その動画より後ろの累積和がすべて変わるので、その書籍の時系列だけを作り直す。
+直近N日と暦年の区切りは公開日時（UTC）の日付で、as_of も UTC の今日。
+直近N日は as_of を含む N 日間。as_of より後の公開日の動画は、今年を含めてどの期間にも入れない。
+
+export() が ranking_windows.json に書き出す形:
+    {"as_of": "2026-10-16",
+     "windows": {"7d": {"rows": [[i, 紹介回数, 再生回数, いいね数, ポイント, チャンネル数], ...],
+                        "orders": {"point": [...], "count": [...], ...}},
+                 "30d": ..., "365d": ..., "2025": ..., ...}}
+i は ranking_table.json の "entries" の添字、orders は rows の添字をキーの降順に並べたもの。
+期間内に紹介動画がない書籍は rows に含めない。
+"""
+
+from bisect import bisect_left
+from datetime import date, datetime, timezone
+
+# 直近N日の期間（キーは "7d" のように日数 + "d"）
+WINDOW_DAYS = (7, 30, 365)
+# 暦年の期間に含める最初の年
+FIRST_YEAR = 2015
+# 期間ごとの並べ替えキーと rows の列
+WINDOW_KEYS = (("point", 4), ("count", 1), ("total_views", 2), ("total_likes", 3))
+
+
+def _day(published):
+    """公開日時（ISO 8601）の日付部分を日の通し番号にする"""
+    return date.fromisoformat(published[:10]).toordinal()
+
+
+class BookSeries:
+    """1冊分の紹介動画の時系列（公開日順）と累積和"""
+
+    __slots__ = ("days", "channels", "views", "likes", "channel_days")
+
+    def __init__(self, videos=()):
+        self.days = []       # 公開日（昇順）
+        self.channels = []   # days と同じ順の動画のチャンネル
+        self.views = [0]     # 再生回数の累積和（views[i] は先頭 i 本の合計）
+        self.likes = [0]     # いいね数の累積和
+        self.channel_days = {}  # チャンネル -> そのチャンネルの動画の公開日（昇順）
+        self.extend(videos)
+
+    def extend(self, videos):
+        """動画を追加する。すべて既存の最新の日以降なら末尾に足すだけで、そうでなければ並べ直す"""
+        rows = sorted(((_day(v["published"]), v.get("view_count") or 0, v.get("like_count") or 0,
+                        v.get("channel")) for v in videos if v.get("published")),
+                      key=lambda row: row[0])
+        if not rows:
+            return
+        if self.days and rows[0][0] < self.days[-1]:
+            existing = [(day, self.views[i + 1] - self.views[i], self.likes[i + 1] - self.likes[i], channel)
+                        for i, (day, channel) in enumerate(zip(self.days, self.channels))]
+            rows = sorted(existing + rows, key=lambda row: row[0])
+            self.days, self.channels, self.views, self.likes, self.channel_days = [], [], [0], [0], {}
+        for day, views, likes, channel in rows:
+            self.days.append(day)
+            self.channels.append(channel)
+            self.views.append(self.views[-1] + views)
+            self.likes.append(self.likes[-1] + likes)
+            if channel:
+                self.channel_days.setdefault(channel, []).append(day)
+
+    def to_state(self):
+        """ストアに保存する形（channel_days は days と channels から作り直せるので含めない）"""
+        return {"days": self.days, "channels": self.channels, "views": self.views, "likes": self.likes}
+
+    @classmethod
+    def from_state(cls, state):
+        """to_state() の結果から復元する"""
+        series = cls()
+        series.days = state["days"]
+        series.channels = state["channels"]
+        series.views = state["views"]
+        series.likes = state["likes"]
+        for day, channel in zip(series.days, series.channels):
+            if channel:
+                series.channel_days.setdefault(channel, []).append(day)
+        return series
+
+    def totals(self, start, end=None):
+        """公開日が [start, end) の (紹介回数, 再生回数, いいね数, ポイント, チャンネル数)
+
+        ポイントは全期間と同じく、チャンネルごとに1本目5pt + 同チャンネル2本目以降1pt。
+        """
+        lo = bisect_left(self.days, start)
+        hi = len(self.days) if end is None else bisect_left(self.days, end)
+        if lo >= hi:
+            return 0, 0, 0, 0, 0
+        # ポイントは book_store.book_point と同じく、チャンネルのある動画だけで数える
+        channels = 0
+        point = 0
+        for days in self.channel_days.values():
+            i = bisect_left(days, start)
+            j = len(days) if end is None else bisect_left(days, end)
+            if i < j:
+                channels += 1
+                point += 4 + (j - i)
+        return (hi - lo, self.views[hi] - self.views[lo], self.likes[hi] - self.likes[lo],
+                point, channels)
+
+
+def windows(as_of, series):
+    """(キー, 開始日, 終了日) のリスト（終了日は含まない）。直近N日は as_of を含むN日間、暦年はデータにある年"""
+    today = as_of.toordinal()
+    result = [(f"{n}d", today - n + 1, today + 1) for n in WINDOW_DAYS]
+    # 動画のある年（書籍ごとに最初と最後の年の間を二分探索で確かめ、動画を1本ずつ見ない）
+    years = set()
+    for s in series:
+        if not s.days:
+            continue
+        for year in range(date.fromordinal(s.days[0]).year, date.fromordinal(s.days[-1]).year + 1):
+            if year not in years:
+                i = bisect_left(s.days, date(year, 1, 1).toordinal())
+                if s.days[i] < date(year + 1, 1, 1).toordinal():
+                    years.add(year)
+    for year in sorted((y for y in years if FIRST_YEAR <= y <= as_of.year), reverse=True):
+        result.append((str(year), date(year, 1, 1).toordinal(), min(date(year + 1, 1, 1).toordinal(), today + 1)))
+    return result
+
+
+def build_windows(books, as_of=None, series=None):
+    """books（"videos" を埋め込んだ書籍のリスト。ranking_table.json の entries と同じ順）から
+    ranking_windows.json の内容を返す（as_of を省略すると UTC の今日）
+
+    series: books と同じ順の BookSeries（BookStore.update_series の結果）。省略すると books から作る。
+    """
+    as_of = as_of or datetime.now(timezone.utc).date()
+    if series is None:
+        series = [BookSeries(book["videos"]) for book in books]
+    result = {}
+    for key, start, end in windows(as_of, series):
+        rows = []
+        for i, s in enumerate(series):
+            totals = s.totals(start, end)
+            if totals[0]:
+                rows.append([i, *totals])
+        # 同点は rows の順（= ranking_table.json の entries の順）
+        orders = {name: sorted(range(len(rows)), key=lambda r, c=column: rows[r][c], reverse=True)
+                  for name, column in WINDOW_KEYS}
+        result[key] = {"rows": rows, "orders": orders}
+    return {"as_of": as_of.isoformat(), "windows": result}
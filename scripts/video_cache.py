@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""YouTube動画の生データをローカルに保存するキャッシュ（SQLite）
+
+video_id をキーに、概要欄・タイトル・長さ・統計・取得日時を保持する。
+fetch_videos.py の get_video_details はここに無い動画、または
+指定日数より古いレコードだけをAPIから取得する。
+再生数・いいね数だけを更新した日時は stats_updated_at に記録する。
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DEFAULT_CACHE_FILE = os.path.join(DATA_DIR, "video_cache.sqlite3")
+
+# レコードの列（この順でSELECTする）
+COLUMNS = (
+    "video_id",
+    "channel_id",
+    "channel_title",
+    "title",
+    "published",
+    "description",
+    "duration_sec",
+    "view_count",
+    "like_count",
+    "fetched_at",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id      TEXT PRIMARY KEY,
+    channel_id    TEXT,
+    channel_title TEXT,
+    title         TEXT NOT NULL,
+    published     TEXT NOT NULL,
+    description   TEXT NOT NULL,
+    duration_sec  INTEGER NOT NULL,
+    view_count    INTEGER NOT NULL,
+    like_count    INTEGER NOT NULL,
+    fetched_at    TEXT NOT NULL,
+    stats_updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_videos_channel ON videos (channel_id, published);
+"""
+
+# SQLiteのプレースホルダ上限に余裕を持たせたIN句の分割サイズ
+_IN_CHUNK = 500
+
+
+def utc_now_iso():
+    """現在時刻をAPIと同じ ISO 8601 (UTC, 秒精度) 文字列で返す"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class VideoCache:
+    """動画レコードのSQLiteストア（スレッド間で共有可能）"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self.hits = 0
+        self.misses = 0
+
+    def _migrate(self):
+        """旧スキーマのキャッシュに不足列を追加"""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(videos)")}
+        if "stats_updated_at" not in existing:
+            self._conn.execute("ALTER TABLE videos ADD COLUMN stats_updated_at TEXT")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, video_ids, max_age_days=None):
+        """キャッシュ済みレコードを {video_id: dict} で返す
+
+        Args:
+            video_ids: 取得する動画IDのリスト
+            max_age_days: これより古い fetched_at のレコードは返さない（Noneなら無期限）
+        """
+        cutoff = None
+        if max_age_days is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ")
+        found = {}
+        cols = ", ".join(COLUMNS)
+        with self._lock:
+            for i in range(0, len(video_ids), _IN_CHUNK):
+                chunk = video_ids[i:i + _IN_CHUNK]
+                sql = f"SELECT {cols} FROM videos WHERE video_id IN ({','.join('?' * len(chunk))})"
+                args = list(chunk)
+                if cutoff:
+                    sql += " AND fetched_at >= ?"
+                    args.append(cutoff)
+                for row in self._conn.execute(sql, args):
+                    found[row["video_id"]] = dict(row)
+            self.hits += len(found)
+            self.misses += len(video_ids) - len(found)
+        return found
+
+    def put_many(self, records):
+        """レコードを追加・上書き保存（fetched_at が無ければ現在時刻）"""
+        if not records:
+            return
+        now = utc_now_iso()
+        rows = [tuple(r.get(c) if c != "fetched_at" else (r.get(c) or now) for c in COLUMNS)
+                for r in records]
+        placeholders = ", ".join("?" * len(COLUMNS))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO videos ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def stats_timestamps(self, video_ids):
+        """統計を最後に取得した日時を {video_id: ISO文字列} で返す（キャッシュに無い動画は含まない）"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(video_ids), _IN_CHUNK):
+                chunk = video_ids[i:i + _IN_CHUNK]
+                sql = ("SELECT video_id, MAX(fetched_at, COALESCE(stats_updated_at, '')) "
+                       f"FROM videos WHERE video_id IN ({','.join('?' * len(chunk))})")
+                for vid, ts in self._conn.execute(sql, chunk):
+                    found[vid] = ts
+        return found
+
+    def update_stats(self, stats):
+        """再生数・いいね数だけを更新
+
+        Args:
+            stats: {video_id: (view_count, like_count)}
+        """
+        if not stats:
+            return
+        now = utc_now_iso()
+        rows = [(views, likes, now, vid) for vid, (views, likes) in stats.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE videos SET view_count = ?, like_count = ?, stats_updated_at = ? "
+                "WHERE video_id = ?",
+                rows,
+            )
+
+    def channel_records(self, channel_id):
+        """チャンネルの全レコードを公開日の新しい順（再生リストと同じ順）で返す"""
+        cols = ", ".join(COLUMNS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {cols} FROM videos WHERE channel_id = ? "
+                "ORDER BY published DESC, video_id DESC",
+                (channel_id,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""YouTube Data API のクォータ（ユニット）集計と予算管理
+
+- エンドポイントごとの消費ユニットを数え、日別に data/quota_usage.json へ保存
+- 1回の実行で使える予算（--quota-budget と当日残量の小さい方）を超える前に
+  QuotaExhausted を送出し、呼び出し側で途中停止できるようにする
+- APIが quotaExceeded を返した場合も同じ例外に変換する
+
+クォータの日付はAPIのリセット時刻に合わせて太平洋時間で区切る。
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+QUOTA_USAGE_FILE = os.path.join(DATA_DIR, "quota_usage.json")
+
+# YouTube Data API v3 の既定の1日あたり上限
+DEFAULT_DAILY_LIMIT = 10000
+
+# エンドポイントごとの消費ユニット（記載のないものは1）
+# https://developers.google.com/youtube/v3/determine_quota_cost
+ENDPOINT_COSTS = {
+    "search": 100,
+}
+
+# 保持する日別履歴の日数
+HISTORY_DAYS = 30
+
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+
+class QuotaExhausted(Exception):
+    """実行予算または1日のクォータを使い切った"""
+
+
+def quota_day(now=None):
+    """クォータ集計日（太平洋時間の日付）を YYYY-MM-DD で返す"""
+    now = now or datetime.now(_QUOTA_TZ)
+    return now.astimezone(_QUOTA_TZ).strftime("%Y-%m-%d")
+
+
+def endpoint_cost(endpoint):
+    return ENDPOINT_COSTS.get(endpoint, 1)
+
+
+class QuotaTracker:
+    """実行中のユニット消費を数え、予算超過を防ぐ（スレッドセーフ）"""
+
+    def __init__(self, run_budget=None, daily_limit=DEFAULT_DAILY_LIMIT, path=QUOTA_USAGE_FILE):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.day = quota_day()
+        self._lock = threading.Lock()
+        self._history = self._load()
+        self.used_before = sum(self._history.get(self.day, {}).values())
+        daily_remaining = max(daily_limit - self.used_before, 0)
+        self.budget = daily_remaining if run_budget is None else min(run_budget, daily_remaining)
+        self.used = {}  # この実行での endpoint -> ユニット
+        self.exhausted = False
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    @property
+    def used_total(self):
+        with self._lock:
+            return sum(self.used.values())
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return max(self.budget - sum(self.used.values()), 0)
+
+    def charge(self, endpoint):
+        """リクエスト前に呼び、ユニットを計上する。予算を超える場合は QuotaExhausted"""
+        cost = endpoint_cost(endpoint)
+        with self._lock:
+            if self.exhausted or sum(self.used.values()) + cost > self.budget:
+                self.exhausted = True
+                raise QuotaExhausted(f"クォータ予算 {self.budget} ユニットを使い切りました")
+            self.used[endpoint] = self.used.get(endpoint, 0) + cost
+
+    def mark_exhausted(self):
+        """APIが quotaExceeded を返した（以降の呼び出しはすべて停止）"""
+        with self._lock:
+            self.exhausted = True
+
+    def save(self):
+        """当日の消費を日別履歴に加算して保存（古い履歴は削除）"""
+        with self._lock:
+            today = self._history.setdefault(self.day, {})
+            for endpoint, units in self.used.items():
+                today[endpoint] = today.get(endpoint, 0) + units
+            self.used_before += sum(self.used.values())
+            self.budget = max(self.budget - sum(self.used.values()), 0)
+            self.used = {}
+            cutoff = (datetime.strptime(self.day, "%Y-%m-%d")
+                      - timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d")
+            self._history = {d: v for d, v in sorted(self._history.items()) if d >= cutoff}
+            history = self._history
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(history, f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        """この実行のエンドポイント別消費を表示"""
+        with self._lock:
+            used = dict(self.used)
+        total = sum(used.values())
+        detail = ", ".join(f"{e}: {u}" for e, u in sorted(used.items())) or "なし"
+        print(f"\n--- クォータ消費 ({self.day} PT) ---")
+        print(f"  この実行: {total}ユニット ({detail})")
+        print(f"  本日合計: {self.used_before + total} / {self.daily_limit}ユニット")
+        if self.exhausted:
+            print("  ※ 予算に達したため途中で停止しました。次回の実行で続きから取得します。")
+
+
+def is_quota_error(http_error):
+    """HTTPError がクォータ超過（quotaExceeded / dailyLimitExceeded）かどうか"""
+    if http_error.code != 403:
+        return False
+    try:
+        body = json.loads(http_error.read().decode("utf-8"))
+    except (ValueError, OSError):
+        return False
+    reasons = {e.get("reason") for e in body.get("error", {}).get("errors", [])}
+    return bool(reasons & {"quotaExceeded", "dailyLimitExceeded"})
@@ -0,0 +1,154 @@
+"""scripts/ のモジュールは互いにファイル名で import し合うので、scripts/ を import パスに加える"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeYouTube:
+    """fetch_videos.api_get の代わりに fixtures/videos.json の動画を返す YouTube Data API
+
+    再生リストは page_size 件ずつ返す。calls に応答した (endpoint, params) を記録する。
+    fail_on(endpoint, n) を呼ぶと、その endpoint の n 回目の呼び出しで exception を送出する
+    （n=None で解除）。送出した呼び出しは calls に含めない。
+    """
+
+    def __init__(self, fixture="videos.json", page_size=2):
+        data = load_fixture(fixture)
+        self.channels = data["channels"]
+        self.videos = data["videos"]
+        self.page_size = page_size
+        self.calls = []
+        self._attempts = {}
+        self._failures = {}
+
+    def fail_on(self, endpoint, n, exception=None):
+        if n is None:
+            self._failures.pop(endpoint, None)
+        else:
+            self._failures[endpoint] = (n, exception)
+
+    def __call__(self, endpoint, params):
+        self._attempts[endpoint] = self._attempts.get(endpoint, 0) + 1
+        if endpoint in self._failures:
+            n, exception = self._failures[endpoint]
+            if self._attempts[endpoint] == n:
+                raise exception
+        self.calls.append((endpoint, dict(params)))
+        return getattr(self, f"_{endpoint}")(params)
+
+    def _channels(self, params):
+        if params["id"] not in self.videos:
+            return {"items": []}
+        return {"items": [{"contentDetails": {"relatedPlaylists": {"uploads": "UU" + params["id"]}}}]}
+
+    def _playlistItems(self, params):
+        videos = self.videos[params["playlistId"][2:]]
+        start = int(params.get("pageToken") or 0)
+        page = videos[start:start + self.page_size]
+        data = {"items": [{"snippet": {"publishedAt": v["published"], "resourceId": {"videoId": v["id"]}}}
+                          for v in page]}
+        if start + self.page_size < len(videos):
+            data["nextPageToken"] = str(start + self.page_size)
+        return data
+
+    def _videos(self, params):
+        by_id = {v["id"]: (cid, v) for cid, videos in self.videos.items() for v in videos}
+        items = []
+        for vid in params["id"].split(","):
+            if vid not in by_id:
+                continue  # 削除・非公開
+            cid, v = by_id[vid]
+            item = {"id": vid, "statistics": {"viewCount": str(v["views"]), "likeCount": str(v["likes"])}}
+            if params["part"] != "statistics":
+                item["snippet"] = {"title": v["title"], "publishedAt": v["published"], "description": v["description"],
+                                   "channelId": cid, "channelTitle": cid}
+                item["contentDetails"] = {"duration": v["duration"]}
+            items.append(item)
+        return {"items": items}
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    """fetch_videos の API 呼び出しを FakeYouTube に差し替える"""
+    import fetch_videos
+
+    fake = FakeYouTube()
+    monkeypatch.setattr(fetch_videos, "api_get", fake)
+    return fake
+
+
+class FetchEnv:
+    """fetch_videos.run を tmp_path の下だけで動かす環境（ストア・チェックポイント・クォータ履歴）"""
+
+    def __init__(self, tmp_path, youtube):
+        import book_store
+
+        self.youtube = youtube
+        self.data_dir = tmp_path / "data"
+        self.frontend_dir = tmp_path / "frontend"
+        self.checkpoint_dir = tmp_path / "checkpoints"
+        self.data_dir.mkdir()
+        with open(self.data_dir / "channels.json", "w", encoding="utf-8") as f:
+            json.dump({"channels": youtube.channels}, f, ensure_ascii=False)
+        self.store = book_store.BookStore(str(tmp_path / "books.sqlite3"))
+
+    def run(self, *argv):
+        """引数 argv で fetch_videos.run を実行する（レート制限なし）"""
+        import fetch_videos
+
+        fetch_videos.run(self.store, fetch_videos.build_parser().parse_args(["--max-rps", "0", *argv]))
+
+    def export(self):
+        return self.store.export(dirs=(str(self.data_dir), str(self.frontend_dir)))
+
+    def read(self, name):
+        with open(self.data_dir / name, "r", encoding="utf-8") as f:
+            return f.read()
+
+
+@pytest.fixture
+def fetch_env(tmp_path, monkeypatch, youtube):
+    import fetch_checkpoint
+    import fetch_videos
+    import youtube_quota
+
+    env = FetchEnv(tmp_path, youtube)
+    monkeypatch.setattr(fetch_videos, "YOUTUBE_API_KEY", "test-key")
+    monkeypatch.setattr(fetch_videos, "DATA_DIR", str(env.data_dir))
+    monkeypatch.setattr(fetch_videos, "CHANNELS_FILE", str(env.data_dir / "channels.json"))
+    monkeypatch.setattr(fetch_videos, "FETCH_STATE_FILE", str(env.data_dir / "fetch_state.json"))
+    monkeypatch.setattr(fetch_videos, "CheckpointStore",
+                        lambda: fetch_checkpoint.CheckpointStore(str(env.checkpoint_dir)))
+    monkeypatch.setattr(fetch_videos, "QuotaTracker",
+                        lambda **kwargs: youtube_quota.QuotaTracker(path=str(tmp_path / "quota.json"), **kwargs))
+    # run() が差し替えるモジュールの状態はテストの後で元に戻す
+    for name in ("rate_limiter", "quota", "cache_max_age_days"):
+        monkeypatch.setattr(fetch_videos, name, getattr(fetch_videos, name))
+    monkeypatch.setattr(fetch_videos, "video_cache", None)
+    monkeypatch.setattr(fetch_videos, "fresh_video_ids", set())
+    yield env
+    env.store.close()
+
+
+@pytest.fixture
+def lookup(tmp_path, monkeypatch):
+    """共有の検索キャッシュ（lookup_cache）を tmp_path の下の空のキャッシュに差し替える"""
+    import lookup_cache
+
+    cache = lookup_cache.LookupCache(str(tmp_path / "lookup_cache.sqlite3"))
+    monkeypatch.setattr(lookup_cache, "_default_cache", cache)
+    monkeypatch.setattr(lookup_cache, "enabled", True)
+    yield cache
+    cache.close()
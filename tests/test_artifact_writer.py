@@ -0,0 +1,53 @@
+"""生成物の書き出し（artifact_writer.ArtifactWriter）"""
+
+import os
+
+from artifact_writer import ArtifactWriter, hashed_name
+
+
+def test_write_json_skips_unchanged_files(tmp_path):
+    paths = [str(tmp_path / "a" / "x.json"), str(tmp_path / "b" / "x.json")]
+    writer = ArtifactWriter()
+    assert writer.write_json({"n": 1}, *paths, compact=True) is True
+    assert writer.written == paths
+    mtimes = [os.stat(p).st_mtime_ns for p in paths]
+
+    writer = ArtifactWriter()
+    assert writer.write_json({"n": 1}, *paths, compact=True) is False
+    assert writer.unchanged == paths
+    assert [os.stat(p).st_mtime_ns for p in paths] == mtimes
+
+    writer = ArtifactWriter()
+    assert writer.write_json({"n": 2}, *paths, compact=True) is True
+    with open(paths[1], encoding="utf-8") as f:
+        assert f.read() == '{"n":2}'
+
+
+def test_remove_is_recorded(tmp_path):
+    path = tmp_path / "old.json"
+    path.write_text("{}", encoding="utf-8")
+    writer = ArtifactWriter()
+    writer.remove(str(path))
+    assert not path.exists()
+    assert writer.removed == [str(path)]
+
+
+def test_hashed_name_changes_only_with_content():
+    assert hashed_name("catalog.json", b"{}") == hashed_name("catalog.json", b"{}")
+    assert hashed_name("catalog.json", b"{}") != hashed_name("catalog.json", b"[]")
+    assert hashed_name("catalog.json", b"{}").startswith("catalog.")
+    assert hashed_name("catalog.json", b"{}").endswith(".json")
+
+
+def test_write_hashed_reuses_existing_file(tmp_path):
+    writer = ArtifactWriter()
+    first = writer.write_hashed('{"n":1}', str(tmp_path), "x.json")
+    assert first == {"file": hashed_name("x.json", b'{"n":1}'), "size": 7}
+    assert writer.written == [str(tmp_path / first["file"])]
+
+    writer = ArtifactWriter()
+    assert writer.write_hashed('{"n":1}', str(tmp_path), "x.json") == first
+    assert writer.unchanged == [str(tmp_path / first["file"])]
+    second = writer.write_hashed('{"n":2}', str(tmp_path), "x.json")
+    assert second["file"] != first["file"]
+    assert sorted(os.listdir(tmp_path)) == sorted([first["file"], second["file"]])
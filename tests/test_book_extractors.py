@@ -0,0 +1,82 @@
+"""書籍抽出（book_extractors）: エクストラクタのレジストリ化の前と同じ結果になることを固定する
+
+期待値は、レジストリ化する前の fetch_videos.extract_book_info_list で同じ概要欄を抽出した結果。
+"""
+
+import pytest
+
+from book_extractors import DEFAULT_EXTRACTOR_ORDER, EXTRACTORS, extract_book_info_list, resolve_extractors
+
+
+def book(title, author=None, publisher=None):
+    return {"title": title, "author": author, "publisher": publisher}
+
+
+# (エクストラクタ名, 概要欄, 動画タイトル, 期待する抽出結果)
+CASES = [
+    ("title_bracket", "", "【要約】嫌われる勇気【岸見一郎・古賀史健】",
+     [book("嫌われる勇気", "岸見一郎・古賀史健")]),
+    ("labeled_fields",
+     "今回の本はこちら\nタイトル：FACTFULNESS\n著者：ハンス・ロスリング\n出版社：日経BP\n\n#本要約", "x",
+     [book("FACTFULNESS", "ハンス・ロスリング", "日経BP")]),
+    ("sankou", "今日の動画\n参考：影響力の武器 ロバート・B・チャルディーニ さま\nチャンネル登録お願いします", "【漫画】x",
+     [book("影響力の武器 ロバート・B・チャルディーニ")]),
+    ("gakushiki", "【amazonリンク】\n『サピエンス全史』ユヴァル・ノア・ハラリ / 河出書房新社\n", "x",
+     [book("サピエンス全史", "ユヴァル・ノア・ハラリ", "河出書房新社")]),
+    ("sam_section",
+     "【今回の参考書籍📚】\n・人を動かす 文庫\nD・カーネギー（著）, 創元社（編集）\nhttps://amzn.to/abc\n"
+     "【目次】\n00:00 はじめに", "x",
+     [book("人を動かす", "D・カーネギー", "創元社")]),
+    ("pivot_section",
+     "＜参考書籍＞\n山口周『ニュータイプの時代』\n『両利きの経営』（著）入山章栄\n"
+     "「イシューからはじめよ」知的生産のシンプルな本質（英治出版）\n※リンクはアフィリエイトです\n\n▼出演者", "x",
+     [book("ニュータイプの時代", "山口周"), book("両利きの経営"),
+      book("イシューからはじめよ知的生産のシンプルな本質")]),
+    ("tbs_section",
+     "◆書籍紹介◆\n▼『世界は経営でできている』\n岩尾俊兵\n講談社現代新書\nhttps://amzn.to/xyz\n◆出演者◆\nだれか", "x",
+     [book("世界は経営でできている", "岩尾俊兵", "講談社現代新書")]),
+    ("flier_section",
+     "▼紹介した作品\n①ジェームズ・クリアー『ジェームズ・クリアー式 複利で伸びる1つの習慣』（パンローリング）\n"
+     "②『DIE WITH ZERO』\n※上記リンクから購入", "x",
+     [book("ジェームズ・クリアー式 複利で伸びる1つの習慣", "ジェームズ・クリアー", "パンローリング")]),
+    ("amazon_links",
+     "本日紹介した本\n\n📕『夜と霧』 https://amzn.to/3AbCdEf\n\nエッセンシャル思考\n著者：グレッグ・マキューン\n"
+     "https://amzn.to/9ZyXwV\n", "x",
+     [book("夜と霧"), book("エッセンシャル思考")]),
+    ("abataro",
+     "▼書籍の購入\n・道は開ける｜D・カーネギー（創元社）\n・自省録｜マルクス・アウレリウス\n"
+     "・道は開ける｜D・カーネギー（創元社）\nhttps://example.com\n\n\n▼チャンネル", "x",
+     [dict(book("道は開ける", "D・カーネギー", "創元社"), _is_first=True),
+      dict(book("自省録", "マルクス・アウレリウス"), _is_first=False)]),
+]
+
+
+@pytest.mark.parametrize("name, summary, video_title, expected", CASES, ids=[c[0] for c in CASES])
+def test_default_chain_matches_previous_results(name, summary, video_title, expected):
+    assert extract_book_info_list(summary, video_title) == expected
+
+
+@pytest.mark.parametrize("name, summary, video_title, expected", CASES, ids=[c[0] for c in CASES])
+def test_channel_extractor_alone_gives_same_result(name, summary, video_title, expected):
+    # channels.json の "extractors" でそのエクストラクタだけを指定したチャンネル（fetch_videos.channel_extractors）でも同じ結果
+    assert extract_book_info_list(summary, video_title, resolve_extractors([name])) == expected
+
+
+def test_no_book_section_returns_empty_list():
+    assert extract_book_info_list("チャンネル登録よろしくお願いします！\n#雑談", "雑談回") == []
+
+
+def test_section_without_books_stops_the_chain():
+    # 参考書籍のセクションがあれば、中身が空でも amzn.to の汎用抽出に進まない
+    summary = "▼参考書籍\n※準備中\n\n▼出演者\nだれか https://amzn.to/abcdef"
+    assert extract_book_info_list(summary, "x") == []
+    assert extract_book_info_list(summary, "x", resolve_extractors(["amazon_links"])) == [book("だれか")]
+
+
+def test_default_order_covers_every_extractor():
+    assert set(DEFAULT_EXTRACTOR_ORDER) == set(EXTRACTORS)
+
+
+def test_resolve_extractors_rejects_unknown_names():
+    with pytest.raises(ValueError, match="no_such_extractor"):
+        resolve_extractors(["title_bracket", "no_such_extractor"])
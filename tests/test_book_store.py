@@ -0,0 +1,227 @@
+"""book_store: 書籍の置き換え、books.json → ストア → export の往復と書き出すファイルの内容"""
+
+import json
+import os
+
+import pytest
+
+import book_store
+from conftest import FIXTURES_DIR, load_fixture
+
+GOLDEN_BOOKS = os.path.join(FIXTURES_DIR, "golden", "books.json")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = book_store.BookStore(str(tmp_path / "books.sqlite3"))
+    yield store
+    store.close()
+
+
+def enrichment_ids(store):
+    return sorted(row[0] for row in store._conn.execute("SELECT book_id FROM enrichment"))
+
+
+def test_replace_books_drops_enrichment_of_removed_books(store):
+    with open(GOLDEN_BOOKS, "r", encoding="utf-8") as f:
+        books = json.load(f)
+    store.replace_books(books)
+    kept, removed = books[0], books[1]
+    store.record_enrichment(kept["id"], "openbd", {"isbn": "9784478025819"})
+    store.record_enrichment(removed["id"], "google_books", {"publisher": "日経BP"})
+
+    store.replace_books([b for b in books if b["id"] != removed["id"]])
+    assert enrichment_ids(store) == [kept["id"]]
+    assert removed["id"] not in store.book_ids()
+
+
+def export_files(directory):
+    """書き出し先の全ファイルの {相対パス: 内容}"""
+    files = {}
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "r", encoding="utf-8") as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+
+def round_trip(tmp_path, name, books_file):
+    """books_file から新しいストアを作って export し、書き出し先の (data, frontend) を返す"""
+    dirs = (tmp_path / name / "data", tmp_path / name / "frontend")
+    store = book_store.open_store(str(tmp_path / f"{name}.sqlite3"), bootstrap_file=books_file)
+    store.export(dirs=tuple(str(d) for d in dirs))
+    store.close()
+    return dirs
+
+
+def test_books_json_round_trips_through_the_store(tmp_path):
+    first = round_trip(tmp_path, "first", GOLDEN_BOOKS)
+    with open(GOLDEN_BOOKS, "r", encoding="utf-8") as f:
+        assert (first[0] / "books.json").read_text(encoding="utf-8") == f.read()
+
+    # 書き出した books.json から作り直しても、ランキングを含むすべてのファイルが同じになる
+    second = round_trip(tmp_path, "second", str(first[0] / "books.json"))
+    for before, after in zip(first, second):
+        assert export_files(after) == export_files(before)
+    # rankings*.json は以前の出力と並び順・以前からあるフィールドが同じ（image_url・出版社は後から追加）
+    for name in ("rankings.json", "rankings_views.json", "rankings_likes.json"):
+        expected = load_fixture(f"golden/{name}")
+        entries = json.loads((second[0] / name).read_text(encoding="utf-8"))
+        assert [{key: entry[key] for key in previous} for entry, previous in zip(entries, expected)] == expected
+        assert len(entries) == len(expected)
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """golden の books.json を取り込んだストアから export した (data, frontend) と書籍のリスト"""
+    data_dir, frontend_dir = round_trip(tmp_path, "exported", GOLDEN_BOOKS)
+    with open(GOLDEN_BOOKS, "r", encoding="utf-8") as f:
+        return data_dir, frontend_dir, json.load(f)
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_catalog_holds_each_video_once(exported):
+    data_dir, frontend_dir, books = exported
+    catalog = read_json(data_dir / "catalog.json")
+    video_ids = {v["video_id"] for b in books for v in b["videos"]}
+    shared = [vid for vid in video_ids if sum(vid in [v["video_id"] for v in b["videos"]] for b in books) > 1]
+    assert shared  # 複数の書籍で紹介された動画がある
+    assert set(catalog["videos"]) == video_ids
+    assert all("videos" not in b for b in catalog["books"])
+    assert [b["video_ids"] for b in catalog["books"]] == [[v["video_id"] for v in b["videos"]] for b in books]
+    # books.json の形に戻すと元の書籍になる
+    assert book_store.load_catalog_file(str(data_dir / "catalog.json")) == books
+    assert (frontend_dir / "catalog.json").read_bytes() == (data_dir / "catalog.json").read_bytes()
+
+
+def test_ranking_orders_sort_descending_and_keep_ties_in_book_order():
+    books = [{"count": 1, "total_views": 5}, {"count": 3, "total_views": 5},
+             {"count": 1, "total_views": 9}, {"count": 2, "total_views": 0}]
+    assert book_store.ranking_orders(books, ["count", "total_views"]) == {
+        "count": [1, 3, 0, 2],
+        "total_views": [2, 0, 1, 3],
+    }
+
+
+def test_ranking_table_reproduces_each_ranking(exported):
+    data_dir, frontend_dir, books = exported
+    table = read_json(frontend_dir / "ranking_table.json")
+    assert [e["id"] for e in table["entries"]] == [b["id"] for b in books]
+    assert set(table["orders"]) == set(book_store.RANKING_KEYS)
+    for name, key in book_store.RANKING_FILES:
+        order = table["orders"][key]
+        assert sorted(order) == list(range(len(books)))
+        assert [table["entries"][i] for i in order] == read_json(data_dir / name)
+
+
+def file_version(path):
+    """書き直されると変わる値（一時ファイル + rename で置き換えると inode が変わる）"""
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns
+
+
+def test_shards_hold_each_book_and_follow_changes(exported, tmp_path):
+    data_dir, frontend_dir, books = exported
+    for shard_dir in (data_dir / "books", frontend_dir / "books"):
+        assert sorted(os.listdir(shard_dir)) == sorted([f"{b['id']}.json" for b in books] + ["index.json"])
+        for book in books:
+            assert read_json(shard_dir / f"{book['id']}.json") == book
+        index = read_json(shard_dir / "index.json")
+        assert [(e["id"], e["title"], e["count"]) for e in index] == [(b["id"], b["title"], b["count"]) for b in books]
+
+    # 1冊を消して1冊の紹介回数を変えると、その2冊のファイルだけが変わる
+    store = book_store.BookStore(str(tmp_path / "exported.sqlite3"))
+    removed, changed = books[0], books[1]
+    store.delete_books([removed["id"]])
+    store.update_book(changed["id"], {"count": changed["count"] + 10})
+    before = {b["id"]: file_version(data_dir / "books" / f"{b['id']}.json") for b in books[2:]}
+    old_index = {e["id"]: e["hash"] for e in read_json(data_dir / "books" / "index.json")}
+    store.export(dirs=(str(data_dir), str(frontend_dir)))
+    store.close()
+
+    assert not (data_dir / "books" / f"{removed['id']}.json").exists()
+    assert not (frontend_dir / "books" / f"{removed['id']}.json").exists()
+    assert read_json(frontend_dir / "books" / f"{changed['id']}.json")["count"] == changed["count"] + 10
+    new_index = {e["id"]: e["hash"] for e in read_json(data_dir / "books" / "index.json")}
+    assert new_index[changed["id"]] != old_index[changed["id"]]
+    assert {bid: h for bid, h in new_index.items() if bid != changed["id"]} == \
+        {bid: h for bid, h in old_index.items() if bid not in (removed["id"], changed["id"])}
+    assert {bid: file_version(data_dir / "books" / f"{bid}.json") for bid in before} == before
+
+
+def test_ranking_pages_split_each_sort(tmp_path, monkeypatch):
+    monkeypatch.setattr(book_store, "RANKING_PAGE_SIZE", 4)
+    data_dir, frontend_dir = round_trip(tmp_path, "pages", GOLDEN_BOOKS)
+    books = read_json(data_dir / "books.json")
+    entries = [book_store.make_page_entry(b) for b in books]
+    pages = -(-len(books) // 4)
+    assert pages > 1
+
+    for sort, key in book_store.RANKING_PAGE_SORTS:
+        for rankings_dir in (data_dir / "rankings", frontend_dir / "rankings"):
+            assert sorted(os.listdir(rankings_dir / sort)) == [f"page-{n:04d}.json" for n in range(1, pages + 1)]
+            listed = [e for n in range(1, pages + 1) for e in read_json(rankings_dir / sort / f"page-{n:04d}.json")]
+            assert listed == sorted(entries, key=lambda e: e[key], reverse=True)
+
+    manifest = read_json(frontend_dir / "rankings" / "manifest.json")
+    channels = [v["channel"] for b in books for v in b["videos"]]
+    assert manifest["page_size"] == 4 and manifest["pages"] == pages
+    assert manifest["books"] == len(books) and manifest["videos"] == len(channels)
+    assert manifest["sorts"] == ["point", "count", "views", "likes"]
+    assert manifest["years"] == sorted({int(v["published"][:4]) for b in books for v in b["videos"]}, reverse=True)
+    assert {c["name"]: c["count"] for c in manifest["channels"]} == {c: channels.count(c) for c in set(channels)}
+
+
+def test_ranking_pages_no_longer_needed_are_removed(tmp_path, monkeypatch):
+    monkeypatch.setattr(book_store, "RANKING_PAGE_SIZE", 4)
+    data_dir, frontend_dir = round_trip(tmp_path, "pages", GOLDEN_BOOKS)
+    store = book_store.BookStore(str(tmp_path / "pages.sqlite3"))
+    store.delete_books(store.book_ids()[4:])
+    store.export(dirs=(str(data_dir), str(frontend_dir)))
+    store.close()
+    for sort, _ in book_store.RANKING_PAGE_SORTS:
+        assert os.listdir(frontend_dir / "rankings" / sort) == ["page-0001.json"]
+    assert read_json(frontend_dir / "rankings" / "manifest.json")["pages"] == 1
+
+
+def manifest_files(frontend_dir):
+    """manifest.json の {元の名前: hashed/ のファイル}。参照先がすべて存在し、内容が元のファイルと同じこと"""
+    manifest = read_json(frontend_dir / "manifest.json")["files"]
+    assert set(manifest) == set(book_store.HASHED_FILES)
+    for name, entry in manifest.items():
+        path = frontend_dir / entry["file"]
+        assert path.exists(), entry["file"]
+        assert path.read_bytes() == (frontend_dir / name).read_bytes()
+        assert entry["size"] == path.stat().st_size
+    return {name: entry["file"] for name, entry in manifest.items()}
+
+
+def test_hashed_names_change_only_when_content_changes(exported, tmp_path):
+    data_dir, frontend_dir, books = exported
+    assert not (data_dir / "manifest.json").exists()  # ブラウザ向けの書き出し先だけ
+    first = manifest_files(frontend_dir)
+
+    def export(update=None):
+        store = book_store.BookStore(str(tmp_path / "exported.sqlite3"))
+        if update:
+            store.update_book(*update)
+        store.export(dirs=(str(data_dir), str(frontend_dir)))
+        store.close()
+        return manifest_files(frontend_dir)
+
+    assert export() == first
+    second = export((books[0]["id"], {"title": "改題した書籍"}))
+    assert second["catalog.json"] != first["catalog.json"]
+    assert second["ranking_table.json"] != first["ranking_table.json"]
+    # 前回の manifest が参照していたファイルは1世代だけ残す
+    assert sorted(os.listdir(frontend_dir / "hashed")) == sorted(
+        {os.path.basename(f) for f in (*first.values(), *second.values())})
+
+    third = export((books[0]["id"], {"title": "もう一度改題した書籍"}))
+    assert sorted(os.listdir(frontend_dir / "hashed")) == sorted(
+        {os.path.basename(f) for f in (*second.values(), *third.values())})
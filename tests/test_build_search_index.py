@@ -0,0 +1,109 @@
+"""build_search_index: サンプルの書籍で作ったインデックスの検索結果と、検索で読む文書表のチャンク"""
+
+import json
+
+import pytest
+
+from build_search_index import (DOCS_CHUNK_SIZE, build_index, docs_file, matches_search, search, search_key,
+                                search_text, write_index)
+
+# search_inputs() と同じ形（ポイント順）: (id, title, author, publisher, count, views, likes, point)
+DOCS = [
+    ("a", "嫌われる勇気", "岸見一郎・古賀史健", "ダイヤモンド社", 5, 500, 50, 25),
+    ("b", "気嫌いな勇気の本", "山田太郎", None, 4, 400, 40, 20),
+    ("c", "FACTFULNESS", "ハンス・ロスリング", "日経BP", 3, 300, 30, 15),
+    ("d", "経営戦略", "営学 花子", None, 2, 200, 20, 10),
+    ("e", "ＤＩＥ　ＷＩＴＨ　ＺＥＲＯ", None, "ダイヤモンド社", 1, 100, 10, 5),
+]
+
+
+# 2件ずつのチャンクにして、候補を含むチャンクだけを読むことを確かめる
+CHUNK_SIZE = 2
+
+
+class RecordingChunks(list):
+    """読んだチャンクの番号を記録する文書表のチャンク"""
+
+    def __init__(self, chunks):
+        super().__init__(chunks)
+        self.read = set()
+
+    def __getitem__(self, chunk):
+        self.read.add(chunk)
+        return super().__getitem__(chunk)
+
+
+@pytest.fixture(scope="module")
+def chunked():
+    return build_index(DOCS, chunk_size=CHUNK_SIZE)
+
+
+@pytest.fixture(scope="module")
+def index():
+    return build_index(DOCS)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("勇気", ["a", "b"]),
+    ("気", ["a", "b"]),                 # 1文字（"嫌われる勇気" では末尾の1文字）
+    ("ダイヤモンド", ["a", "e"]),        # 出版社
+    ("ﾀﾞｲﾔﾓﾝﾄﾞ", ["a", "e"]),            # 半角カナも NFKC でそろえる
+    ("factful", ["c"]),
+    ("ＦＡＣＴ", ["c"]),
+    ("die with", ["e"]),
+    ("岸見 一郎", ["a"]),
+    ("勇気嫌", []),                      # バイグラム（勇気・気嫌）はあるが隣り合っていない
+    ("経営学", []),                      # 経営はタイトル、営学は著者（フィールドをまたがない）
+    ("「」", []),
+    ("存在しない", []),
+])
+def test_search_returns_expected_books_in_point_order(index, query, expected):
+    assert search(*index, query) == expected
+
+
+def test_doc_table_keeps_point_order_and_search_text(index):
+    (doc_table,), _ = index
+    assert [row[:5] for row in doc_table] == [[d[0], *d[4:]] for d in DOCS]
+    assert doc_table[4][5] == "diewithzero\n\nダイヤモンド社"
+
+
+def test_doc_table_is_split_into_fixed_size_chunks(chunked):
+    doc_chunks, _ = chunked
+    assert [[row[0] for row in rows] for rows in doc_chunks] == [["a", "b"], ["c", "d"], ["e"]]
+
+
+@pytest.mark.parametrize("query, expected, chunks", [
+    ("factful", ["c"], {1}),
+    ("ダイヤモンド", ["a", "e"], {0, 2}),
+    ("経営学", [], {1}),                 # 候補（d）のチャンクだけを読んで確かめる
+    ("存在しない", [], set()),
+])
+def test_search_reads_only_the_chunks_of_candidates(chunked, query, expected, chunks):
+    doc_chunks, shards = chunked
+    recording = RecordingChunks(doc_chunks)
+    assert search(recording, shards, query, chunk_size=CHUNK_SIZE) == expected
+    assert recording.read == chunks
+
+
+def test_write_index_replaces_old_chunks_and_doc_table(chunked, tmp_path):
+    (tmp_path / "docs.json").write_text("[]")
+    (tmp_path / docs_file(7)).write_text("[]")
+    doc_chunks, shards = chunked
+    write_index(doc_chunks, shards, str(tmp_path))
+    names = {p.name for p in tmp_path.iterdir()}
+    assert names == set(shards) | {docs_file(0), docs_file(1), docs_file(2)}
+    assert json.loads((tmp_path / docs_file(2)).read_text(encoding="utf-8"))[0][0] == "e"
+
+
+@pytest.mark.parametrize("fixture", ["index", "chunked"])
+def test_index_matches_a_full_scan(fixture, request):
+    """すべての部分文字列のクエリで、全書籍を走査したときと同じ書籍が返る"""
+    doc_chunks, shards = request.getfixturevalue(fixture)
+    chunk_size = CHUNK_SIZE if fixture == "chunked" else DOCS_CHUNK_SIZE
+    texts = [search_text(title, author, publisher) for _, title, author, publisher, *_ in DOCS]
+    queries = {text[i:j] for text in texts for i in range(len(text)) for j in range(i + 1, i + 5)}
+    queries |= {"勇気嫌", "経営学", "bpハ"}
+    for query in queries:
+        key = search_key(query)
+        expected = [d[0] for d, text in zip(DOCS, texts) if matches_search(key, text)]
+        assert search(doc_chunks, shards, query, chunk_size=chunk_size) == expected, query
@@ -0,0 +1,36 @@
+"""除外リストのマッチャー（denylist.DenylistMatcher）"""
+
+import pytest
+
+from denylist import DenylistMatcher, Rule
+
+LISTS = {
+    "ng": {"宣伝": ["Kindle", "Kindle端末"], "空": [""]},
+    "names": {"YouTuber名": ["アバタロー", "タロー"]},
+}
+
+
+def test_first_match_limited_to_lists():
+    matcher = DenylistMatcher(LISTS)
+    assert matcher.first_match("Kindle版で読む", "ng") == Rule("ng", "宣伝", "Kindle")
+    assert matcher.first_match("Kindle版で読む", "names") is None
+    # 同じ位置で終わる語は長い方が先
+    assert matcher.first_match("アバタローの本", "names") == Rule("names", "YouTuber名", "アバタロー")
+
+
+def test_iter_matches_reports_overlapping_words():
+    matcher = DenylistMatcher(LISTS)
+    words = sorted(rule.word for rule in matcher.iter_matches("Kindle端末とアバタロー"))
+    assert words == ["Kindle", "Kindle端末", "アバタロー", "タロー"]
+
+
+def test_empty_words_and_text_never_match():
+    matcher = DenylistMatcher(LISTS)
+    assert matcher.rule_count == 4
+    assert matcher.first_match("") is None
+    assert list(matcher.iter_matches(None)) == []
+
+
+def test_unknown_list_name():
+    with pytest.raises(KeyError):
+        DenylistMatcher(LISTS).first_match("text", "missing")
@@ -0,0 +1,74 @@
+"""fetch_amazon.run: 途中で止まっても、反映済みの書籍は次の実行で問い合わせ直さない"""
+
+import json
+import os
+
+import pytest
+
+import book_store
+import fetch_amazon
+from conftest import FIXTURES_DIR
+
+# NDLサーチでISBNが見つかり、openBDに登録されている書籍
+OPENBD = {"FACTFULNESS": "9784863940246", "嫌われる勇気 自己啓発の源流「アドラー」の教え": "9784478025819"}
+
+
+class FakeLookups:
+    """NDLサーチ・openBD・Google Books の代わり。問い合わせた書名を記録し、Google Books の fail_at 回目で止まる"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.ndl = []
+        self.google = []
+
+    def search_ndl(self, title, retry=3):
+        self.ndl.append(title)
+        return OPENBD.get(title)
+
+    def fetch_openbd_bulk(self, isbns):
+        return {isbn: {"summary": {"isbn": isbn, "title": title, "publisher": "出版社"}}
+                for title, isbn in OPENBD.items() if isbn in isbns}
+
+    def search_google_books(self, title, retry=3):
+        self.google.append(title)
+        if len(self.google) == self.fail_at:
+            raise RuntimeError("interrupted")
+        isbn = f"97840000{len(self.google):05d}"
+        return {"totalItems": 1, "items": [{"volumeInfo": {
+            "publisher": "出版社", "industryIdentifiers": [{"type": "ISBN_13", "identifier": isbn}]}}]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, lookup):
+    monkeypatch.setattr(fetch_amazon, "GOOGLE_BOOKS_API_KEY", "test-key")
+    monkeypatch.setattr(fetch_amazon, "CSV_FILE", str(tmp_path / "books_no_isbn_edit.csv"))
+    monkeypatch.setattr(fetch_amazon, "DEFERRED_FILE", str(tmp_path / "enrichment_deferred.json"))
+    monkeypatch.setattr(fetch_amazon, "fetch_openbd", lambda isbn: None)
+    store = book_store.BookStore(str(tmp_path / "books.sqlite3"))
+    with open(os.path.join(FIXTURES_DIR, "golden", "books.json"), "r", encoding="utf-8") as f:
+        store.replace_books(json.load(f))
+    yield store
+    store.close()
+
+
+def run(store, monkeypatch, lookups):
+    for name in ("search_ndl", "fetch_openbd_bulk", "search_google_books"):
+        monkeypatch.setattr(fetch_amazon, name, getattr(lookups, name))
+    fetch_amazon.run(store, fetch_amazon.build_parser().parse_args(["--workers", "1"]))
+
+
+def test_books_enriched_before_an_interruption_are_not_looked_up_again(store, monkeypatch):
+    first = FakeLookups(fail_at=3)
+    with pytest.raises(RuntimeError):
+        run(store, monkeypatch, first)
+    # openBD の2件と、止まる前に Google Books で見つかった2件は反映済み
+    enriched = {b["title"] for b in store.books_with_isbn()}
+    assert enriched == set(OPENBD) | set(first.google[:2])
+    assert {r[0] for r in store._conn.execute("SELECT source FROM enrichment")} == {"openbd", "google_books"}
+
+    second = FakeLookups()
+    run(store, monkeypatch, second)
+    remaining = {b["title"] for b in store.load_books(with_videos=False)} - enriched
+    assert set(second.ndl) == remaining
+    assert set(second.google) == remaining
+    assert not store.books_without_isbn()
@@ -0,0 +1,89 @@
+"""fetch_checkpoint: チャンネル単位のチェックポイント（カーソル + 追記ログ）と --resume による再開"""
+
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from fetch_checkpoint import ChannelCheckpoint
+from youtube_quota import QuotaExhausted
+
+
+def entry(vid):
+    return {"video_id": vid, "title": vid, "books": []}
+
+
+def test_cursor_stays_small_and_log_is_appended(tmp_path):
+    cp = ChannelCheckpoint(str(tmp_path / "UCx.json"), "UCx", None)
+    cp.add_video_ids(["a", "b"], "2", False)
+    cp.add_video_ids(["c"], None, True)
+    cp.add_details({"a": entry("a"), "b": None})
+    size = os.path.getsize(cp.log_path)
+    cp.add_details({"c": entry("c")})
+    with open(cp.log_path, "rb") as f:
+        lines = f.read().splitlines()
+    # 既存の行は書き直さず、新しい動画の1行だけが増える
+    assert len(lines) == 5 and os.path.getsize(cp.log_path) > size
+    with open(cp.path, "r", encoding="utf-8") as f:
+        cursor = json.load(f)
+    assert "details" not in cursor and "video_ids" not in cursor
+    assert cursor["log_size"] == os.path.getsize(cp.log_path)
+
+    loaded = ChannelCheckpoint.load(cp.path)
+    assert loaded.video_ids == ["a", "b", "c"]
+    assert loaded.details == {"a": entry("a"), "b": None, "c": entry("c")}
+    assert (loaded.page_token, loaded.listing_done) == (None, True)
+    assert [v["video_id"] for v in loaded.videos()] == ["a", "c"]
+
+
+def test_unconfirmed_log_tail_is_discarded(tmp_path):
+    cp = ChannelCheckpoint(str(tmp_path / "UCx.json"), "UCx", None)
+    cp.add_video_ids(["a", "b"], None, True)
+    cp.add_details({"a": entry("a")})
+    # ログへの追記後、カーソルを書く前に落ちた状態（書きかけの行を含む）
+    with open(cp.log_path, "ab") as f:
+        f.write(b'{"id":"b","entry":null}\n{"id":"c","ent')
+
+    loaded = ChannelCheckpoint.load(cp.path)
+    assert loaded.details == {"a": entry("a")}
+    loaded.add_details({"b": None})
+    assert ChannelCheckpoint.load(cp.path).details == {"a": entry("a"), "b": None}
+
+    loaded.delete()
+    assert not os.path.exists(cp.path) and not os.path.exists(cp.log_path)
+
+
+def detail_requests(youtube):
+    """動画詳細（統計のみの取得を除く）を要求した動画IDの回数"""
+    return Counter(vid for endpoint, params in youtube.calls
+                   if endpoint == "videos" and params["part"] != "statistics"
+                   for vid in params["id"].split(","))
+
+
+@pytest.mark.parametrize("endpoint,n", [("playlistItems", 3), ("videos", 2)])
+def test_resume_after_interruption_neither_duplicates_nor_loses_videos(fetch_env, youtube, endpoint, n):
+    youtube.fail_on(endpoint, n, QuotaExhausted("quota"))
+    with pytest.raises(SystemExit):
+        fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    assert not os.path.exists(fetch_env.data_dir / "books.json")
+    interrupted = len(youtube.calls)
+
+    youtube.fail_on(endpoint, None)
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0", "--resume")
+    fetch_env.export()
+
+    # 再生リストの同じページ・同じ動画の詳細を二度取得しない
+    pages = Counter((params["playlistId"], params.get("pageToken"))
+                    for endpoint, params in youtube.calls if endpoint == "playlistItems")
+    assert max(pages.values()) == 1
+    assert max(detail_requests(youtube).values()) == 1
+    all_ids = {v["id"] for videos in youtube.videos.values() for v in videos}
+    assert set(detail_requests(youtube)) == all_ids
+    assert len(youtube.calls) > interrupted
+
+    # 中断なしの全件取得と同じ結果になる
+    with open(os.path.join(FIXTURES_DIR, "golden", "books.json"), "r", encoding="utf-8") as f:
+        assert fetch_env.read("books.json") == f.read()
+    assert not os.path.exists(fetch_env.checkpoint_dir)
@@ -0,0 +1,194 @@
+"""fetch_videos: 書籍の統合（build_merge_map）・チャンネル別のエクストラクタ指定・キャッシュからの再抽出・
+既知動画の統計更新・除外リストの一致件数
+"""
+
+import json
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import fetch_videos
+from fetch_videos import MERGE_MIN_KEY_LEN, build_merge_map, is_valid_book_title
+
+
+def merge_map_by_scan(keys):
+    """以前の merge_similar_books の全キー走査（O(n²)）による統合先"""
+    keys = sorted(keys, key=len)
+    merge_map = {}
+    for i, short_key in enumerate(keys):
+        if short_key in merge_map or len(short_key) < MERGE_MIN_KEY_LEN:
+            continue
+        for long_key in keys[i + 1:]:
+            if long_key in merge_map:
+                continue
+            if long_key.startswith(short_key):
+                merge_map[short_key] = long_key
+                break
+    return merge_map
+
+
+def test_merges_into_shortest_longer_key():
+    keys = ["嫌われる勇気自己啓発の源流", "嫌われる勇気", "嫌われる勇気完全版", "幸せになる勇気", "勇気"]
+    assert build_merge_map(keys) == {"嫌われる勇気": "嫌われる勇気完全版"}
+
+
+def test_ties_follow_key_order():
+    assert build_merge_map(["abcdex", "abcde", "abcdey"]) == {"abcde": "abcdex"}
+    assert build_merge_map(["abcdey", "abcde", "abcdex"]) == {"abcde": "abcdey"}
+
+
+def test_matches_full_scan():
+    rng = random.Random(0)
+    keys = list({"".join(rng.choice("ab") for _ in range(rng.randint(3, 9))) for _ in range(300)})
+    expected = merge_map_by_scan(keys)
+    result = build_merge_map(keys)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def cache_records(youtube, channel_ids):
+    """FakeYouTube の動画を動画キャッシュのレコードにする"""
+    import fetch_videos
+
+    return [{"video_id": v["id"], "channel_id": cid, "channel_title": cid, "title": v["title"],
+             "published": v["published"], "description": v["description"],
+             "duration_sec": fetch_videos.parse_iso8601_duration(v["duration"]),
+             "view_count": v["views"], "like_count": v["likes"], "fetched_at": None}
+            for cid in channel_ids for v in youtube.videos[cid]]
+
+
+def book_videos(store):
+    return {b["title"]: sorted(v["video_id"] for v in b["videos"]) for b in store.load_books()}
+
+
+def test_reextract_keeps_books_of_videos_missing_from_the_cache(fetch_env, monkeypatch, tmp_path):
+    import fetch_videos
+    from video_cache import VideoCache
+
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    before = book_videos(fetch_env.store)
+
+    # キャッシュを導入する前に取得した動画（PIVOT・アバタロー・七瀬）はキャッシュに無い
+    cache_file = str(tmp_path / "video_cache.sqlite3")
+    cache = VideoCache(cache_file)
+    cache.put_many(cache_records(fetch_env.youtube, ["UCsummary", "UCfermi"]))
+    cache.close()
+    monkeypatch.setattr(fetch_videos, "DEFAULT_CACHE_FILE", cache_file)
+
+    fetch_videos.reextract_from_cache(fetch_env.youtube.channels, fetch_env.store)
+    assert book_videos(fetch_env.store) == before
+
+
+def test_reextract_applies_changed_extraction_to_cached_videos(fetch_env, monkeypatch, tmp_path):
+    import fetch_videos
+    from video_cache import VideoCache
+
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    records = cache_records(fetch_env.youtube, ["UCsummary"])
+    for record in records:
+        if record["video_id"] == "sum1":
+            record["description"] = "タイトル：影響力の武器\n著者：ロバート・B・チャルディーニ"
+    cache_file = str(tmp_path / "video_cache.sqlite3")
+    cache = VideoCache(cache_file)
+    cache.put_many(records)
+    cache.close()
+    monkeypatch.setattr(fetch_videos, "DEFAULT_CACHE_FILE", cache_file)
+
+    fetch_videos.reextract_from_cache(fetch_env.youtube.channels, fetch_env.store)
+    after = book_videos(fetch_env.store)
+    assert after["影響力の武器"] == ["sum1"]
+    # sum1 はもう紹介していない。七瀬の動画（キャッシュに無い）は引き継がれる
+    assert after["エッセンシャル思考 最少の時間で成果を最大にする"] == ["nan1"]
+
+
+def write_channels(env, extractors_by_id):
+    """channels.json を書き直し、チャンネルごとに "extractors" を指定する"""
+    channels = [dict(ch, extractors=extractors_by_id[ch["channel_id"]])
+                if ch["channel_id"] in extractors_by_id else ch for ch in env.youtube.channels]
+    with open(env.data_dir / "channels.json", "w", encoding="utf-8") as f:
+        json.dump({"channels": channels}, f, ensure_ascii=False)
+
+
+def test_channel_extractors_default_to_every_extractor():
+    from book_extractors import resolve_extractors
+
+    assert fetch_videos.channel_extractors({"name": "x"}) == resolve_extractors()
+
+
+def test_add_videos_uses_only_the_channel_extractors():
+    video = {"video_id": "v1", "title": "【要約】嫌われる勇気【岸見一郎】", "summary": "タイトル：人を動かす",
+             "link": "https://youtu.be/v1", "published": "2024-01-01T00:00:00Z"}
+    by_default, by_channel = {}, {}
+    fetch_videos.add_videos_to_books(by_default, [video], "ch")
+    fetch_videos.add_videos_to_books(by_channel, [video], "ch",
+                                     fetch_videos.channel_extractors({"extractors": ["labeled_fields"]}))
+    assert [b["title"] for b in by_default.values()] == ["嫌われる勇気"]
+    assert [b["title"] for b in by_channel.values()] == ["人を動かす"]
+
+
+def test_run_extracts_with_the_channel_extractors(fetch_env):
+    # sum2 の概要欄は「参考：」の書式。本要約チャンネルは labeled_fields だけを試すので拾わない
+    sum2 = next(v for v in fetch_env.youtube.videos["UCsummary"] if v["id"] == "sum2")
+    sum2["description"] = "参考：人を動かす D・カーネギー さま"
+    write_channels(fetch_env, {"UCsummary": ["labeled_fields"]})
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    videos = known_videos(fetch_env.store)
+    assert "sum2" not in videos
+    assert {"sum1", "sum3", "sum5", "fer2"} <= set(videos)
+
+
+def test_load_channels_rejects_unknown_extractors(fetch_env, capsys):
+    write_channels(fetch_env, {"UCpivot": ["pivot_section", "no_such_extractor"]})
+    with pytest.raises(SystemExit):
+        fetch_videos.load_channels()
+    assert "PIVOT" in capsys.readouterr().out
+
+
+def known_videos(store):
+    return {v["video_id"]: v for b in store.load_books() for v in b["videos"]}
+
+
+def test_stats_refresh_rotates_without_the_cache(fetch_env):
+    import fetch_videos
+
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    store = fetch_env.store
+    videos = known_videos(store)
+    # 詳細を取得した動画は、統計も取得済みとしてストアに記録される
+    assert set(store.stats_refreshed_at(list(videos))) == set(videos)
+
+    fetch_videos.fresh_video_ids.clear()  # 次の実行
+    store.record_stats_refresh(list(videos), "2025-07-01T00:00:00Z")
+    first = fetch_videos.select_stats_refresh_targets(videos, 3, store=store)
+    store.record_stats_refresh(first)
+    second = fetch_videos.select_stats_refresh_targets(videos, 3, store=store)
+    assert len(first) == len(second) == 3
+    assert not set(first) & set(second)
+
+
+def test_refresh_video_stats_updates_totals_and_records_the_refresh(fetch_env):
+    import fetch_videos
+
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0")
+    store = fetch_env.store
+    fetch_videos.fresh_video_ids.clear()
+    store.record_stats_refresh(list(known_videos(store)), "2025-07-01T00:00:00Z")
+    fetch_env.youtube.videos["UCpivot"][0]["views"] += 1000  # piv2
+
+    all_books = {b["title"]: b for b in store.load_books()}
+    before = {title: b["total_views"] for title, b in all_books.items()}
+    fetch_videos.refresh_video_stats(all_books, 1, store=store)
+    changed = {title for title, b in all_books.items() if b["total_views"] != before[title]}
+    assert changed == {"FACTFULNESS", "ニュータイプの時代", "イシューからはじめよ知的生産のシンプルな本質"}
+    assert all_books["FACTFULNESS"]["total_views"] == before["FACTFULNESS"] + 1000
+    assert fetch_videos.select_stats_refresh_targets(known_videos(store), 50, store=store) == []
+
+
+def test_denylist_hits_are_counted_exactly_across_threads(monkeypatch):
+    monkeypatch.setattr(fetch_videos, "denylist_hits", Counter())
+    titles = ["購入特典のご案内", "Kindle端末で読む"] * 2000
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert not any(executor.map(is_valid_book_title, titles))
+    assert sorted(fetch_videos.denylist_hits.values()) == [2000, 2000]
@@ -0,0 +1,28 @@
+"""fetch_videos の取得から export までの出力を、並列化する前の実装の出力（fixtures/golden/）と比べる
+
+fixtures/videos.json の動画を FakeYouTube で返し、--full で取得した結果を比べる。
+golden/ は並列化する前の fetch_videos.py の main() で同じ動画から書き出したもの。
+rankings*.json は後から image_url と出版社が加わったので、以前からあるフィールドと並び順を比べる。
+"""
+
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR, load_fixture
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_full_fetch_matches_previous_output(fetch_env, workers):
+    fetch_env.run("--full", "--no-cache", "--stats-budget", "0", "--workers", str(workers))
+    fetch_env.export()
+
+    for name in ("books.json", "fetch_state.json"):
+        with open(os.path.join(FIXTURES_DIR, "golden", name), "r", encoding="utf-8") as f:
+            assert fetch_env.read(name) == f.read(), name
+    for name in ("rankings.json", "rankings_views.json", "rankings_likes.json"):
+        expected = load_fixture(f"golden/{name}")
+        entries = json.loads(fetch_env.read(name))
+        assert [{key: entry[key] for key in previous} for entry, previous in zip(entries, expected)] == expected
+        assert len(entries) == len(expected)
@@ -0,0 +1,309 @@
+"""共通HTTPクライアント（http_client）
+
+ローカルの http.server に対する HttpClient.request（接続の再利用・圧縮の展開・リトライ・
+リダイレクト・HTTPError・ホスト別の集計）、サーキットブレーカー（CircuitBreaker）の状態遷移、
+トークンバケット（TokenBucket）のレート制限。
+"""
+
+import gzip
+import json
+import socket
+import threading
+import urllib.error
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpen, HttpClient, TokenBucket, parse_retry_after
+
+
+def opened_breaker(threshold=2):
+    """threshold 回失敗させて開いた直後の（停止期間0秒の）ブレーカー"""
+    breaker = CircuitBreaker("test", threshold=threshold, cooldown=900)
+    for _ in range(threshold - 1):
+        assert breaker.record_failure() is False
+    assert breaker.record_failure(retry_after=0) is True
+    return breaker
+
+
+def test_closed_until_threshold():
+    breaker = CircuitBreaker("test", threshold=3)
+    assert breaker.check() is False
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.check() is False
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test", threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.record_failure() is False
+    assert breaker.check() is False
+
+
+def test_open_rejects_calls_during_cooldown():
+    breaker = CircuitBreaker("test", threshold=1, cooldown=900)
+    assert breaker.record_failure() is True
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    assert breaker.trips == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = opened_breaker()
+    assert breaker.check() is True
+    # 試行の結果が出るまで他の呼び出しは止めたまま
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+
+
+def test_probe_success_closes():
+    breaker = opened_breaker()
+    assert breaker.check() is True
+    breaker.record_success()
+    assert breaker.check() is False
+    assert breaker.failures == 0
+
+
+def test_probe_failure_reopens():
+    breaker = opened_breaker(threshold=3)
+    assert breaker.check() is True
+    # 半開の試行の失敗は閾値に関わらず1回で開き直す
+    assert breaker.record_failure() is True
+    with pytest.raises(CircuitOpen):
+        breaker.check()
+    assert breaker.trips == 2
+
+
+def test_released_probe_allows_next_probe():
+    breaker = opened_breaker()
+    assert breaker.check() is True
+    # レート制限と関係のないエラーで終わった試行は、閉じも開き直しもしない
+    breaker.release_probe()
+    assert breaker.check() is True
+    breaker.record_success()
+    assert breaker.check() is False
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"Retry-After": "120"}) == 120
+    assert parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+    assert parse_retry_after({"Retry-After": "soon"}) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after(None) is None
+
+
+class FakeClock:
+    """time.monotonic / time.sleep の代わり。sleep すると時刻だけ進める"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_client, "time", fake)
+    return fake
+
+
+def test_token_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_token_bucket_keeps_average_rate(clock):
+    bucket = TokenBucket(rate=5)
+    start = clock.now
+    for _ in range(11):
+        bucket.acquire()
+    # 最初の1回はすぐ通り、残り10回は 1/5 秒ずつ
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_token_bucket_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60  # 長く空いても貯まるのは burst 回分まで
+    assert [bucket.acquire() for _ in range(2)] == [0, 0]
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_client_rate_limit_is_per_host_and_counts_wait(clock):
+    client = HttpClient()
+    client.set_rate_limit("api.example.com", 4)
+    for _ in range(3):
+        client._throttle("api.example.com")
+        client._throttle("other.example.com")
+    assert client.stats()["api.example.com"]["wait"] == pytest.approx(0.5)
+    assert "other.example.com" not in client.stats()
+
+    client.set_rate_limit("api.example.com", None)
+    before = clock.now
+    client._throttle("api.example.com")
+    assert clock.now == before
+
+
+class Handler(BaseHTTPRequestHandler):
+    """パスごとに決まった応答を返すテスト用サーバー（keep-alive 対応）"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.peers.add(self.client_address)
+            hits = server.paths.count(self.path)
+        body = json.dumps({"path": self.path, "n": "あ" * 200}, ensure_ascii=False).encode("utf-8")
+        route = self.path.split("?")[0]
+        if route == "/json":
+            self.reply(200, body, [("Content-Type", "application/json")])
+        elif route == "/gzip":
+            self.reply(200, gzip.compress(body), [("Content-Encoding", "gzip")])
+        elif route == "/deflate":
+            self.reply(200, zlib.compress(body), [("Content-Encoding", "deflate")])
+        elif route == "/raw-deflate":
+            raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            self.reply(200, raw.compress(body) + raw.flush(), [("Content-Encoding", "deflate")])
+        elif route == "/flaky":
+            # 最初の2回は 503
+            self.reply(503 if hits <= 2 else 200, body)
+        elif route == "/down":
+            self.reply(502, b"bad gateway")
+        elif route == "/redirect":
+            self.reply(302, headers=[("Location", "/json?from=redirect")])
+        elif route == "/loop":
+            self.reply(302, headers=[("Location", "/loop")])
+        elif route == "/missing":
+            self.reply(404, b'{"error": "not found"}', [("Retry-After", "5")])
+        else:
+            self.reply(500)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.lock = threading.Lock()
+    httpd.paths = []
+    httpd.peers = set()
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF", 0)
+    client = HttpClient(timeout=5, retries=2)
+    yield client
+    client.close()
+
+
+def test_connections_are_reused_per_host(server, client):
+    for i in range(5):
+        assert client.get_json(f"{server.url}/json", {"i": i})["path"] == f"/json?i={i}"
+    stats = client.stats()["127.0.0.1"]
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert len(server.peers) == 1
+
+
+@pytest.mark.parametrize("path", ["/gzip", "/deflate", "/raw-deflate"])
+def test_compressed_bodies_are_decoded_and_counted(server, client, path):
+    assert client.get_json(f"{server.url}{path}")["path"] == path
+    stats = client.stats()["127.0.0.1"]
+    assert 0 < stats["wire_bytes"] < stats["bytes"]
+
+
+def test_5xx_is_retried_until_success(server, client):
+    attempts = []
+    assert client.get_json(f"{server.url}/flaky", on_attempt=lambda: attempts.append(1))["path"] == "/flaky"
+    assert server.paths == ["/flaky"] * 3
+    assert len(attempts) == 3
+    assert client.stats()["127.0.0.1"]["errors"] == 2
+
+
+def test_5xx_after_retries_raises_http_error(server, client):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        client.request(f"{server.url}/down", retries=1)
+    assert e.value.code == 502
+    assert e.value.read() == b"bad gateway"
+    assert server.paths == ["/down"] * 2
+
+
+def test_4xx_raises_urllib_compatible_error_without_retry(server, client):
+    with pytest.raises(urllib.error.HTTPError) as e:
+        client.request(f"{server.url}/missing")
+    assert e.value.code == 404
+    assert e.value.headers["Retry-After"] == "5"
+    assert parse_retry_after(e.value.headers) == 5
+    assert json.loads(e.value.read()) == {"error": "not found"}
+    assert server.paths == ["/missing"]
+
+
+def test_redirects_are_followed(server, client):
+    assert client.get_json(f"{server.url}/redirect")["path"] == "/json?from=redirect"
+    with pytest.raises(urllib.error.HTTPError) as e:
+        client.request(f"{server.url}/loop")
+    assert e.value.code == 302
+    assert server.paths.count("/loop") == http_client.MAX_REDIRECTS + 1
+
+
+def test_connection_errors_are_retried_then_raised(client):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]  # 閉じた後は誰も待ち受けていないポート
+    attempts = []
+    with pytest.raises(ConnectionRefusedError):
+        client.request(f"http://127.0.0.1:{port}/json", on_attempt=lambda: attempts.append(1))
+    assert len(attempts) == 3
+    assert client.stats()["127.0.0.1"]["errors"] == 3
+
+
+def test_on_attempt_can_stop_before_sending(server, client):
+    def refuse():
+        raise RuntimeError("budget")
+
+    with pytest.raises(RuntimeError):
+        client.request(f"{server.url}/json", on_attempt=refuse)
+    assert server.paths == []
+
+
+def test_youtube_quota_is_charged_per_attempt(server, monkeypatch, tmp_path):
+    import fetch_videos
+    from youtube_quota import QuotaTracker
+
+    monkeypatch.setattr(http_client, "RETRY_BACKOFF", 0)
+    monkeypatch.setattr(fetch_videos, "YOUTUBE_API_BASE", server.url)
+    monkeypatch.setattr(fetch_videos, "rate_limiter", fetch_videos.RateLimiter(0))
+    monkeypatch.setattr(fetch_videos, "quota", QuotaTracker(run_budget=100, path=str(tmp_path / "quota.json")))
+    assert fetch_videos.api_get("flaky", {"id": "x"})["path"].startswith("/flaky?")
+    # 503 でリトライした2回も計上する
+    assert fetch_videos.quota.used == {"flaky": 3}
@@ -0,0 +1,134 @@
+"""書誌情報APIの検索キャッシュ（lookup_cache）と、Google Books の検索結果のキャッシュ・見送り"""
+
+import io
+import urllib.error
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import fetch_amazon
+import http_client
+import lookup_cache
+from lookup_cache import MISS, LookupCache, normalize_query
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LookupCache(str(tmp_path / "lookup_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def days_later(monkeypatch):
+    """呼ぶと lookup_cache の現在時刻を days 日進める"""
+    start = datetime.now(timezone.utc)
+
+    def advance(days):
+        class FrozenDateTime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return start + timedelta(days=days)
+
+        monkeypatch.setattr(lookup_cache, "datetime", FrozenDateTime)
+
+    advance(0)
+    return advance
+
+
+def test_normalize_query_ignores_spacing_and_case():
+    assert normalize_query("  Deep   Work　入門 ") == normalize_query("deep work 入門") == "deep work 入門"
+
+
+def test_put_and_get(cache):
+    assert cache.get("ndl", "FACTFULNESS") is MISS
+    cache.put("ndl", "FACTFULNESS", "9784822289607")
+    cache.put("ndl", "存在しない本", None)
+    assert cache.get("ndl", "factfulness ") == "9784822289607"
+    assert cache.get("ndl", "存在しない本") is None  # 否定キャッシュ
+    assert cache.get("google_books", "FACTFULNESS") is MISS  # ソースごとに別
+    assert cache.stats["ndl"] == {"hits": 1, "negative_hits": 1, "misses": 1}
+
+
+def test_found_and_not_found_expire_separately(cache, days_later):
+    cache.put("google_books", "found", {"totalItems": 1})
+    cache.put("google_books", "missing", None)
+    found_days, missing_days = lookup_cache.TTL_DAYS["google_books"]
+
+    days_later(missing_days + 1)
+    assert cache.get("google_books", "missing") is MISS
+    assert cache.get("google_books", "found") == {"totalItems": 1}
+
+    days_later(found_days + 1)
+    assert cache.get("google_books", "found") is MISS
+    assert cache.purge_expired() == 2
+
+
+def test_disabled_cache_neither_reads_nor_writes(lookup, monkeypatch):
+    lookup_cache.put("ndl", "x", "1")
+    monkeypatch.setattr(lookup_cache, "enabled", False)
+    assert lookup_cache.get("ndl", "x") is MISS
+    lookup_cache.put("ndl", "y", "2")
+    assert lookup.get("ndl", "y") is MISS
+
+
+def http_error(code):
+    return urllib.error.HTTPError(fetch_amazon.GOOGLE_BOOKS_API, code, "", {}, io.BytesIO(b""))
+
+
+@pytest.fixture
+def google_books(monkeypatch):
+    """Google Books API の応答を responses の先頭から順に返す（例外なら送出）"""
+    responses = []
+
+    def get_json(url, params=None, **kwargs):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(http_client, "get_json", get_json)
+    # 1回の 429/403 でブレーカーが開き、見送りになるようにする
+    monkeypatch.setattr(fetch_amazon, "google_books_breaker",
+                        http_client.CircuitBreaker("test", threshold=1, cooldown=0))
+    return responses
+
+
+def test_google_books_results_are_cached(lookup, google_books):
+    found = {"totalItems": 1, "items": [{"volumeInfo": {"publisher": "日経BP"}}]}
+    google_books.extend([found, {"totalItems": 0}])
+    assert fetch_amazon.search_google_books("FACTFULNESS") == found
+    assert fetch_amazon.search_google_books("存在しない本") == {"totalItems": 0}
+    # 2回目は問い合わせない（0件は否定キャッシュ）
+    assert fetch_amazon.search_google_books("factfulness") == found
+    assert fetch_amazon.search_google_books("存在しない本") is None
+    assert google_books == []
+
+
+def test_deferred_google_lookup_is_not_cached(lookup, google_books):
+    google_books.append(http_error(429))
+    with pytest.raises(fetch_amazon.LookupDeferred):
+        fetch_amazon.search_google_books("FACTFULNESS", retry=1)
+    assert lookup.get("google_books", "FACTFULNESS") is MISS
+
+    # 見送った書籍は次の実行で問い合わせ直せる
+    found = {"totalItems": 1, "items": []}
+    google_books.append(found)
+    assert fetch_amazon.search_google_books("FACTFULNESS", retry=1) == found
+    assert lookup.get("google_books", "FACTFULNESS") == found
+
+
+def test_other_errors_are_not_cached(lookup, google_books):
+    google_books.extend([http_error(500), OSError("timeout")])
+    assert fetch_amazon.search_google_books("FACTFULNESS", retry=1) is None
+    assert fetch_amazon.search_google_books("FACTFULNESS", retry=1) is None
+    assert lookup.get("google_books", "FACTFULNESS") is MISS
+
+
+def test_deferred_books_are_saved_for_the_next_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch_amazon, "DEFERRED_FILE", str(tmp_path / "enrichment_deferred.json"))
+    books = [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}]
+    fetch_amazon.save_deferred(books, {"b": "Google Books API 429"})
+    assert fetch_amazon.load_deferred() == {"b": "Google Books API 429"}
+    fetch_amazon.save_deferred(books, {})
+    assert fetch_amazon.load_deferred() == {}
@@ -0,0 +1,57 @@
+"""openBD の一括取得（openbd.fetch_openbd_bulk）: バッチ分割と検索キャッシュ"""
+
+import urllib.parse
+
+import pytest
+
+import http_client
+import lookup_cache
+import openbd
+
+# openBD に登録されているISBN（それ以外は null が返る）
+KNOWN = {"9784478025819": "嫌われる勇気", "9784863940246": "FACTFULNESS", "9784761270438": "エッセンシャル思考"}
+
+
+@pytest.fixture
+def openbd_api(monkeypatch):
+    """http_client.get_json を openBD の応答の代わりにし、問い合わせたISBNのバッチを記録する"""
+    batches = []
+
+    def get_json(url, **kwargs):
+        batch = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)["isbn"][0].split(",")
+        batches.append(batch)
+        return [{"summary": {"isbn": isbn, "title": KNOWN[isbn]}} if isbn in KNOWN else None
+                for isbn in batch]
+
+    monkeypatch.setattr(http_client, "get_json", get_json)
+    return batches
+
+
+def test_bulk_fetch_splits_into_batches_in_order(lookup, openbd_api):
+    isbns = ["9784478025819", "9780000000001", "9784863940246", "9784478025819", "", "9784761270438"]
+    records = openbd.fetch_openbd_bulk(isbns, batch_size=2)
+    # 重複と空文字を除き、指定順のまま batch_size 件ずつ問い合わせる
+    assert openbd_api == [["9784478025819", "9780000000001"], ["9784863940246", "9784761270438"]]
+    assert {isbn: r["summary"]["title"] for isbn, r in records.items()} == KNOWN
+
+
+def test_results_and_not_found_are_cached(lookup, openbd_api):
+    openbd.fetch_openbd_bulk(["9784478025819", "9780000000001"])
+    assert lookup_cache.get("openbd", "9784478025819")["summary"]["title"] == "嫌われる勇気"
+    assert lookup_cache.get("openbd", "9780000000001") is None  # 否定キャッシュ
+
+    # キャッシュ済みのISBNは問い合わせず、新しいISBNだけを1回で取得する
+    records = openbd.fetch_openbd_bulk(["9784478025819", "9780000000001", "9784863940246"])
+    assert openbd_api[1:] == [["9784863940246"]]
+    assert set(records) == {"9784478025819", "9784863940246"}
+    assert openbd.fetch_openbd("9780000000001") is None
+    assert len(openbd_api) == 2
+
+
+def test_failed_batch_is_skipped_and_not_cached(lookup, monkeypatch):
+    def get_json(url, **kwargs):
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(http_client, "get_json", get_json)
+    assert openbd.fetch_openbd_bulk(["9784478025819"]) == {}
+    assert lookup_cache.get("openbd", "9784478025819") is lookup_cache.MISS
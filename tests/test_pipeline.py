@@ -0,0 +1,89 @@
+"""pipeline: 入力ハッシュが前回と同じステージを実行しない"""
+
+import argparse
+
+import pytest
+
+import fetch_amazon
+import pipeline
+from pipeline import Stage, load_state, run_stage
+
+
+class FakeStage:
+    """ストアの代わりに dict を読み書きするステージ（実行回数を数える）"""
+
+    def __init__(self, tmp_path, outputs=(), inputs=None):
+        self.source = tmp_path / "stage.py"
+        self.source.write_text("VERSION = 1\n", encoding="utf-8")
+        self.runs = 0
+        self.stage = Stage("fake", [str(self.source)], inputs or (lambda store: store["books"]),
+                           self.run, [str(p) for p in outputs])
+
+    def run(self, store, args):
+        self.runs += 1
+
+
+@pytest.fixture
+def state_file(tmp_path, monkeypatch):
+    path = tmp_path / "pipeline_state.json"
+    monkeypatch.setattr(pipeline, "STATE_FILE", str(path))
+    return path
+
+
+def run(fake, store, force=False):
+    return run_stage(fake.stage, store, argparse.Namespace(force=force), load_state())
+
+
+def test_stage_is_skipped_until_inputs_or_code_change(tmp_path, state_file):
+    fake = FakeStage(tmp_path)
+    store = {"books": ["a", "b"]}
+    assert run(fake, store) is True
+    assert run(fake, store) is False
+    assert fake.runs == 1
+
+    store["books"].append("c")
+    assert run(fake, store) is True
+    fake.source.write_text("VERSION = 2\n", encoding="utf-8")
+    assert run(fake, store) is True
+    assert run(fake, store, force=True) is True
+    assert run(fake, store) is False
+    assert fake.runs == 4
+
+
+def test_hash_is_recorded_after_the_stage_runs(tmp_path, state_file):
+    fake = FakeStage(tmp_path)
+    store = {"books": ["a"]}
+    # ステージ自身が入力を変えても、次の実行では変更なしとみなす
+    fake.stage = fake.stage._replace(run=lambda store, args: store["books"].append("merged"))
+    assert run(fake, store) is True
+    assert run(fake, store) is False
+
+
+def test_missing_output_reruns_the_stage(tmp_path, state_file):
+    output = tmp_path / "out.json"
+    fake = FakeStage(tmp_path, outputs=[output])
+    output.write_text("{}", encoding="utf-8")
+    store = {"books": ["a"]}
+    assert run(fake, store) is True
+    assert run(fake, store) is False
+    output.unlink()
+    assert run(fake, store) is True
+
+
+def test_stage_without_known_inputs_always_runs(tmp_path, state_file):
+    fake = FakeStage(tmp_path, inputs=lambda store: None)
+    assert run(fake, {}) is True
+    assert run(fake, {}) is True
+    assert fake.runs == 2
+
+
+def test_deferred_lookups_rerun_fetch_amazon(tmp_path, monkeypatch):
+    class Store:
+        def books_without_isbn(self):
+            return [{"id": "a", "title": "A"}]
+
+    monkeypatch.setattr(fetch_amazon, "DEFERRED_FILE", str(tmp_path / "enrichment_deferred.json"))
+    monkeypatch.setattr(fetch_amazon, "CSV_FILE", str(tmp_path / "books_no_isbn_edit.csv"))
+    assert pipeline._amazon_inputs(Store()) == {"books": [("a", "A")], "csv": None}
+    (tmp_path / "enrichment_deferred.json").write_text("[]", encoding="utf-8")
+    assert pipeline._amazon_inputs(Store()) is None
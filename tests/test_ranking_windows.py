@@ -0,0 +1,174 @@
+"""ranking_windows: 期間別ランキングの集計を、期間ごとに全動画を数え直した結果と比べる
+
+ストアに保存した時系列（BookStore.update_series）に動画を追記・作り直ししたときも同じ結果になること。
+"""
+
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import book_store
+from book_store import book_point
+from ranking_windows import WINDOW_DAYS, WINDOW_KEYS, BookSeries, build_windows
+
+AS_OF = date(2026, 3, 10)
+CHANNELS = ["本要約チャンネル", "フェルミ漫画大学", "PIVOT", None]
+
+
+def random_books(n, seed=0):
+    """as_of の前後にまたがる公開日の紹介動画を持つ書籍（同じ日・チャンネル不明の動画も含む）"""
+    rng = random.Random(seed)
+    books = []
+    for i in range(n):
+        videos = []
+        for j in range(rng.randint(0, 12)):
+            published = AS_OF - timedelta(days=rng.randint(-3, 3 * 365))
+            videos.append({"video_id": f"b{i}v{j}",
+                           "published": f"{published.isoformat()}T{rng.randint(0, 23):02d}:00:00Z",
+                           "channel": rng.choice(CHANNELS),
+                           "view_count": rng.randint(0, 10000), "like_count": rng.randint(0, 500)})
+        books.append({"id": f"b{i}", "videos": videos})
+    return books
+
+
+def brute_force(books, start, end):
+    """公開日が [start, end) の動画だけを残した書籍ごとの rows（ranking_windows.json と同じ形）"""
+    rows = []
+    for i, book in enumerate(books):
+        videos = [v for v in book["videos"] if start <= date.fromisoformat(v["published"][:10]) < end]
+        if videos:
+            point, channels = book_point({"videos": videos})
+            rows.append([i, len(videos), sum(v["view_count"] for v in videos),
+                         sum(v["like_count"] for v in videos), point, channels])
+    return rows
+
+
+def expected_windows(books):
+    result = {f"{n}d": brute_force(books, AS_OF - timedelta(days=n - 1), AS_OF + timedelta(days=1))
+              for n in WINDOW_DAYS}
+    years = {int(v["published"][:4]) for b in books for v in b["videos"]}
+    for year in (y for y in years if y <= AS_OF.year):
+        result[str(year)] = brute_force(books, date(year, 1, 1), min(date(year + 1, 1, 1), AS_OF + timedelta(days=1)))
+    return result
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_windows_match_brute_force_totals(seed):
+    books = random_books(60, seed)
+    result = build_windows(books, AS_OF)
+    assert result["as_of"] == "2026-03-10"
+    expected = expected_windows(books)
+    assert list(result["windows"]) == ["7d", "30d", "365d"] + sorted(
+        (k for k in expected if not k.endswith("d")), reverse=True)
+    for key, rows in expected.items():
+        window = result["windows"][key]
+        assert window["rows"] == rows, key
+        for name, column in WINDOW_KEYS:
+            # 降順、同点は rows の順
+            assert window["orders"][name] == sorted(range(len(rows)), key=lambda r: -rows[r][column]), (key, name)
+
+
+def test_window_boundaries_are_inclusive_days():
+    def video(days_ago):
+        day = AS_OF - timedelta(days=days_ago)
+        return {"published": f"{day.isoformat()}T23:59:59Z", "channel": "PIVOT", "view_count": 1, "like_count": 0}
+
+    books = [{"id": "a", "videos": [video(0), video(6), video(7), video(-1), video(29), video(30)]}]
+    windows = build_windows(books, AS_OF)["windows"]
+    # 7d は as_of を含む7日間（6日前まで）。as_of より後の動画はどの期間にも入らない
+    assert windows["7d"]["rows"] == [[0, 2, 2, 0, 6, 1]]
+    assert windows["30d"]["rows"] == [[0, 4, 4, 0, 8, 1]]
+    assert windows["2026"]["rows"] == [[0, 5, 5, 0, 9, 1]]
+
+
+def assert_series_equal(a, b):
+    assert a.to_state() == b.to_state()
+    assert a.channel_days == b.channel_days
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_extend_matches_a_series_built_at_once(seed):
+    rng = random.Random(seed)
+    videos = sorted(random_books(1, seed)[0]["videos"] + random_books(1, seed + 10)[0]["videos"],
+                    key=lambda v: v["published"])
+    split = rng.randint(0, len(videos))
+    # 新しい動画だけの追記と、過去の日付が混ざった追記（並べ直し）
+    for added in (videos[split:], rng.sample(videos[:split], k=split // 2) + videos[split:]):
+        existing = [v for v in videos if v not in added]
+        series = BookSeries(existing)
+        series.extend(added)
+        assert_series_equal(series, BookSeries(existing + added))
+    assert_series_equal(BookSeries.from_state(BookSeries(videos).to_state()), BookSeries(videos))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = book_store.BookStore(str(tmp_path / "books.sqlite3"))
+    yield store
+    store.close()
+
+
+def stored_books(books):
+    """random_books の書籍を BookStore に保存できる形にする"""
+    return [{"title": book["id"], "count": len(book["videos"]), "total_views": 0, "total_likes": 0,
+             "amazon_url": None, **book} for book in books]
+
+
+def windows_from_store(store):
+    catalog_books, videos = store.load_catalog()
+    series, counts = store.update_series(catalog_books, videos)
+    books = book_store.assemble_books(catalog_books, videos)
+    return build_windows(books, AS_OF, series=series)["windows"], counts
+
+
+def assert_windows_match(windows, books):
+    assert {key: window["rows"] for key, window in windows.items()} == expected_windows(books)
+
+
+def test_stored_series_are_reused_and_appended(store, tmp_path):
+    books = random_books(40, seed=1)
+    store.replace_books(stored_books(books))
+    windows, counts = windows_from_store(store)
+    assert counts == {"reused": 0, "appended": 0, "rebuilt": 40}
+    assert_windows_match(windows, books)
+
+    # 開き直しても保存した時系列をそのまま使う
+    store.close()
+    store = book_store.BookStore(str(tmp_path / "books.sqlite3"))
+    windows, counts = windows_from_store(store)
+    assert counts == {"reused": 40, "appended": 0, "rebuilt": 0}
+    assert_windows_match(windows, books)
+
+    # 新しい動画（過去の日付も1本）が増えた書籍だけを追記する
+    books[3]["videos"].append({"video_id": "new1", "published": "2026-03-09T10:00:00Z", "channel": "PIVOT",
+                               "view_count": 700, "like_count": 7})
+    books[5]["videos"].append({"video_id": "new2", "published": "2024-05-01T10:00:00Z", "channel": None,
+                               "view_count": 80, "like_count": 8})
+    store.upsert_books(stored_books([books[3], books[5]]))
+    windows, counts = windows_from_store(store)
+    assert counts == {"reused": 38, "appended": 2, "rebuilt": 0}
+    assert_windows_match(windows, books)
+    store.close()
+
+
+def test_series_with_refreshed_or_removed_videos_are_rebuilt(store):
+    books = [b for b in random_books(30, seed=2) if b["videos"]]
+    store.replace_books(stored_books(books))
+    windows_from_store(store)
+
+    # 統計を取り直した過去の動画は、その後ろの累積和がすべて変わる
+    video = books[0]["videos"][0]
+    video["view_count"] += 12345
+    video["like_count"] += 67
+    books[1]["videos"].pop()
+    store.upsert_books(stored_books(books[:2]))
+    store.record_stats_refresh([video["video_id"]])
+    windows, counts = windows_from_store(store)
+    assert counts == {"reused": len(books) - 2, "appended": 0, "rebuilt": 2}
+    assert_windows_match(windows, books)
+
+    # 無くなった書籍の時系列は消す
+    store.delete_books([books[2]["id"]])
+    windows_from_store(store)
+    assert store._conn.execute("SELECT COUNT(*) FROM book_series").fetchone()[0] == len(books) - 1
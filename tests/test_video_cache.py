@@ -0,0 +1,52 @@
+"""動画の生データのキャッシュ（video_cache.VideoCache）"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from video_cache import VideoCache
+
+
+def record(video_id, published="2025-01-01T00:00:00Z", fetched_at=None, channel_id="UC1"):
+    return {"video_id": video_id, "channel_id": channel_id, "channel_title": "ch", "title": f"t{video_id}",
+            "published": published, "description": "d", "duration_sec": 600, "view_count": 10,
+            "like_count": 1, "fetched_at": fetched_at}
+
+
+def days_ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = VideoCache(str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_get_many_returns_cached_records_and_counts_misses(cache):
+    cache.put_many([record("a"), record("b")])
+    found = cache.get_many(["a", "b", "c"])
+    assert set(found) == {"a", "b"}
+    assert found["a"]["title"] == "ta"
+    assert found["a"]["fetched_at"]  # 省略時は保存した時刻
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_get_many_skips_records_older_than_max_age(cache):
+    cache.put_many([record("old", fetched_at=days_ago(40)), record("new", fetched_at=days_ago(1))])
+    assert set(cache.get_many(["old", "new"], max_age_days=30)) == {"new"}
+    assert set(cache.get_many(["old", "new"])) == {"old", "new"}
+
+
+def test_put_many_overwrites(cache):
+    cache.put_many([record("a")])
+    cache.put_many([dict(record("a"), title="changed")])
+    assert cache.get_many(["a"])["a"]["title"] == "changed"
+    assert cache.count() == 1
+
+
+def test_channel_records_newest_first(cache):
+    cache.put_many([record("a", "2025-01-01T00:00:00Z"), record("b", "2025-03-01T00:00:00Z"),
+                    record("c", "2025-02-01T00:00:00Z"), record("x", channel_id="UC2")])
+    assert [r["video_id"] for r in cache.channel_records("UC1")] == ["b", "c", "a"]
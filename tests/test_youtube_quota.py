@@ -0,0 +1,84 @@
+"""YouTube API のクォータ集計（youtube_quota）と予算内の取得順（fetch_videos.plan_channel_order）"""
+
+import io
+import json
+import urllib.error
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from youtube_quota import QuotaExhausted, QuotaTracker, is_quota_error, quota_day
+
+
+def test_charge_counts_units_per_endpoint(tmp_path):
+    quota = QuotaTracker(run_budget=300, path=str(tmp_path / "quota.json"))
+    quota.charge("videos")
+    quota.charge("videos")
+    quota.charge("search")
+    assert quota.used == {"videos": 2, "search": 100}
+    assert quota.remaining == 198
+
+
+def test_charge_stops_before_the_budget_is_exceeded(tmp_path):
+    quota = QuotaTracker(run_budget=101, path=str(tmp_path / "quota.json"))
+    quota.charge("search")
+    with pytest.raises(QuotaExhausted):
+        quota.charge("search")
+    assert quota.exhausted
+    # 一度止まったら安い呼び出しも通さない
+    with pytest.raises(QuotaExhausted):
+        quota.charge("videos")
+    assert quota.used_total == 100
+
+
+def test_budget_is_limited_by_todays_usage(tmp_path):
+    path = tmp_path / "quota.json"
+    path.write_text(json.dumps({quota_day(): {"videos": 9950}}), encoding="utf-8")
+    assert QuotaTracker(path=str(path)).budget == 50
+    assert QuotaTracker(run_budget=20, path=str(path)).budget == 20
+    assert QuotaTracker(run_budget=20, daily_limit=9960, path=str(path)).budget == 10
+
+
+def test_save_adds_to_todays_history_and_drops_old_days(tmp_path):
+    path = tmp_path / "quota.json"
+    today = quota_day()
+    old = (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=40)).strftime("%Y-%m-%d")
+    path.write_text(json.dumps({old: {"videos": 1}, today: {"videos": 5}}), encoding="utf-8")
+    quota = QuotaTracker(run_budget=100, path=str(path))
+    quota.charge("videos")
+    quota.charge("playlistItems")
+    quota.save()
+    assert json.loads(path.read_text(encoding="utf-8")) == {today: {"videos": 6, "playlistItems": 1}}
+    # 保存した分は予算から引かれ、次の save で二重に数えない
+    assert (quota.used_before, quota.budget, quota.used) == (7, 98, {})
+    quota.save()
+    assert json.loads(path.read_text(encoding="utf-8"))[today] == {"videos": 6, "playlistItems": 1}
+
+
+def test_quota_day_follows_pacific_time():
+    assert quota_day(datetime(2025, 1, 1, 5, 0, tzinfo=timezone.utc)) == "2024-12-31"
+    assert quota_day(datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc)) == "2025-01-01"
+
+
+def http_error(code, reasons):
+    body = json.dumps({"error": {"errors": [{"reason": r} for r in reasons]}}).encode("utf-8")
+    return urllib.error.HTTPError("https://example.com", code, "", {}, io.BytesIO(body))
+
+
+def test_is_quota_error():
+    assert is_quota_error(http_error(403, ["quotaExceeded"]))
+    assert is_quota_error(http_error(403, ["dailyLimitExceeded"]))
+    assert not is_quota_error(http_error(403, ["forbidden"]))
+    assert not is_quota_error(http_error(429, ["quotaExceeded"]))
+
+
+def test_plan_channel_order_puts_new_then_valuable_channels_first():
+    from fetch_videos import plan_channel_order
+
+    now = datetime.now(timezone.utc)
+    ago = lambda days: (now - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    channels = [{"name": n, "channel_id": n} for n in ("a", "b", "c", "d")]
+    fetch_state = {"a": ago(1), "b": ago(10), "d": ago(1)}
+    books = {"x": {"videos": [{"channel": "a"}] * 30 + [{"channel": "b"}]}}
+    # c は未取得、b は 2件 × 11日、a は 31件 × 2日、d は 1件 × 2日
+    assert [ch["name"] for ch in plan_channel_order(channels, fetch_state, books)] == ["c", "a", "b", "d"]